@@ -6,33 +6,104 @@ from appium import webdriver
 from appium.options.android import UiAutomator2Options
 from typing import Optional
 from dotenv import load_dotenv
+from selenium.common.exceptions import WebDriverException
 
-# Load environment variables
+# Load environment variables before the framework modules below read their settings from them
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+from tests.mobile.fixtures.app_state import app_state_of, navigate, next_state_of, record_reuse
+from tests.mobile.fixtures.driver_pool import DriverPool, PoolStats
+from tests.mobile.utils.appium_server import AppiumServer
+from tests.mobile.utils.cassette import (
+    CASSETTE_MODE,
+    CASSETTE_MODES,
+    Cassette,
+    CassetteMismatch,
+    cassette_path,
+    recording_driver,
+    replay_driver,
+)
+from tests.mobile.utils.command_profiler import PROFILE_COMMANDS, command_profiler
+from tests.mobile.utils.device_allocator import DeviceAllocator, discover_devices
+from tests.mobile.utils.install_cache import install_cache
+from tests.mobile.utils.log_buffer import configure_logging
+from tests.mobile.utils.logcat import LOGCAT_CAPTURE, LogcatCollector
+from tests.mobile.utils.perf_sampler import PERF_SAMPLING, PerfSampler
+from tests.mobile.utils.retry import RETRY_ATTEMPTS, SessionHealer, healer_of
+
+pytest_plugins = [
+    "tests.mobile.fixtures.app_state_scheduler",
+    "tests.mobile.fixtures.duration_scheduler",
+    "tests.mobile.fixtures.appium_fixture",
+    "tests.mobile.fixtures.wait_report",
+    "tests.mobile.fixtures.command_report",
+    "tests.mobile.fixtures.screenshot_report",
+    "tests.mobile.fixtures.scroll_report",
+    "tests.mobile.fixtures.recovery_report",
+    "tests.mobile.fixtures.log_report",
+    "tests.mobile.fixtures.logcat_report",
+    "tests.mobile.fixtures.perf_report",
+]
+
+# Configure logging (LOG_MODE=buffered holds framework logs back until a test fails)
+configure_logging()
 logger = logging.getLogger(__name__)
 
-@pytest.fixture
-def appium_driver():
-    """Create Appium WebDriver instance."""
-    logger.info("Setting up Appium driver")
-    
+pool_stats_key = pytest.StashKey[PoolStats]()
+
+
+@pytest.hookimpl(tryfirst=True, hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    """Expose each phase's report on the item so fixtures can see the test outcome."""
+    outcome = yield
+    rep = outcome.get_result()
+    setattr(item, f"rep_{rep.when}", rep)
+
+
+@pytest.fixture(scope="session")
+def device_lease():
+    """Lease a device and port range to this xdist worker for the whole run."""
+    allocator = DeviceAllocator(discover_devices(), os.getenv('DEVICE_LEASE_DIR'))
+    lease = allocator.acquire()
+    yield lease
+    allocator.release(lease)
+
+
+@pytest.fixture(scope="session")
+def appium_server_url(device_lease):
+    """URL of the Appium server sessions are created on."""
+    if os.getenv('APPIUM_SPAWN_SERVER', 'false').lower() != 'true':
+        yield os.getenv('APPIUM_SERVER_URL', 'http://127.0.0.1:4723')
+        return
+
+    # One local server per worker, on the port reserved by the lease
+    server = AppiumServer(
+        device_lease.appium_port,
+        binary=os.getenv('APPIUM_BINARY', 'appium'),
+        log_dir=os.getenv('APPIUM_LOG_DIR', './results/appium'),
+    )
+    server.start()
+    yield server.url
+    server.stop()
+
+
+@pytest.fixture(scope="session")
+def appium_options() -> UiAutomator2Options:
+    """Capabilities used for every session in this worker."""
     # Get environment variables
     app_path = os.getenv('APP_PATH', './ApiDemos-debug.apk')
     device_name = os.getenv('DEVICE_NAME', 'Pixel_7_API_35')
     platform_version = os.getenv('PLATFORM_VERSION', '14.0')
     app_package = os.getenv('APP_PACKAGE', 'io.appium.android.apis')
     app_activity = os.getenv('APP_ACTIVITY', '.ApiDemos')
-    
+
     # Log environment configuration
-    logger.info(f"App path: {app_path}")
-    logger.info(f"Device name: {device_name}")
-    logger.info(f"Platform version: {platform_version}")
-    logger.info(f"App package: {app_package}")
-    logger.info(f"App activity: {app_activity}")
-    
+    logger.info("App path: %s", app_path)
+    logger.info("Device name: %s", device_name)
+    logger.info("Platform version: %s", platform_version)
+    logger.info("App package: %s", app_package)
+    logger.info("App activity: %s", app_activity)
+
     # Set up capabilities using UiAutomator2Options
     options = UiAutomator2Options()
     options.platform_name = 'Android'
@@ -46,41 +117,180 @@ def appium_driver():
     options.auto_grant_permissions = True
     options.new_command_timeout = 300
     options.system_port = 8201
-    
+    return options
+
+
+@pytest.fixture(scope="session")
+def driver_pool(request, device_lease, appium_server_url, appium_options):
+    """Worker-wide pool of live Appium sessions shared by consecutive tests."""
+    device_lease.apply(appium_options)
+    app_path = appium_options.app
+    install_plan = install_cache.apply(appium_options, device_lease.udid)
+    recorded = []
+
     # Log capabilities
     logger.info("Appium capabilities:")
-    caps = options.to_capabilities()
+    caps = appium_options.to_capabilities()
     for key, value in caps.items():
-        logger.info(f"  {key}: {value}")
-    
-    try:
-        # Create driver with options
+        logger.info("  %s: %s", key, value)
+
+    def create_driver():
         logger.info("Creating Appium driver")
-        driver = webdriver.Remote('http://127.0.0.1:4723', options=options)
-        logger.info("Appium driver created successfully")
-        
-        # Set implicit wait
-        driver.implicitly_wait(10)
-        
-        yield driver
-        
-        # Cleanup
-        logger.info("Cleaning up Appium driver")
         try:
-            if app_package:
-                driver.terminate_app(app_package)
-            driver.quit()
-            logger.info("Appium driver cleanup completed")
-        except Exception as e:
-            logger.error(f"Error during driver cleanup: {str(e)}")
-            
+            driver = webdriver.Remote(appium_server_url, options=appium_options)
+        except WebDriverException as e:
+            if recorded or not any(install_plan):
+                raise
+            # Something the install cache skipped was not usable after all, e.g. after an Appium upgrade
+            logger.warning("Session failed with cached installs, installing everything again: %s", e)
+            install_cache.forget(device_lease.udid)
+            appium_options.app = app_path
+            appium_options.skip_server_installation = False
+            appium_options.skip_device_initialization = False
+            driver = webdriver.Remote(appium_server_url, options=appium_options)
+        logger.info("Appium driver created successfully")
+        if not recorded:
+            install_cache.record_session(device_lease.udid, app_path, appium_options.app_package)
+            recorded.append(True)
+        if PROFILE_COMMANDS:
+            command_profiler.instrument(driver)
+        if RETRY_ATTEMPTS:
+            # Retries failed commands and replaces a dead session in place
+            SessionHealer(driver, appium_options)
+        if LOGCAT_CAPTURE:
+            # Keeps the app's recent logcat for the report of a failing test
+            LogcatCollector(driver, appium_options.app_package, device_lease.udid).start()
+        if PERF_SAMPLING:
+            # Samples the app's CPU and memory while each test runs
+            PerfSampler(driver, appium_options.app_package).start()
+
+        # Implicit waits stay off; page objects and helpers wait explicitly per call
+        return driver
+
+    pool = DriverPool(
+        create_driver,
+        app_package=appium_options.app_package,
+        reset_strategy=os.getenv('DRIVER_RESET_STRATEGY', 'restart'),
+        prewarm=os.getenv('DRIVER_POOL_PREWARM', 'true').lower() == 'true',
+    )
+    yield pool
+
+    logger.info("Shutting down Appium driver pool")
+    pool.shutdown()
+    request.config.stash[pool_stats_key] = pool.stats
+    if hasattr(request.config, 'workeroutput'):
+        request.config.workeroutput['driver_pool'] = pool.stats.as_dict()
+
+
+@pytest.fixture
+def appium_driver(request):
+    """Hand out a live Appium session from the pool and reset the app afterwards."""
+    if CASSETTE_MODE != 'off':
+        yield from _cassette_driver(request)
+        return
+
+    driver_pool = request.getfixturevalue('driver_pool')
+    state = app_state_of(request.node)
+    logger.info("Setting up Appium driver")
+    try:
+        driver = driver_pool.acquire()
     except Exception as e:
-        logger.error(f"Failed to create Appium driver: {str(e)}")
+        logger.error("Failed to create Appium driver: %s", e)
         raise
+    if state is not None and driver_pool.state != state.name:
+        navigate(driver, state)
+    healer = healer_of(driver)
+    if healer is not None and state is not None:
+        # A replacement session starts on the launch screen; bring it back to the test's state
+        healer.on_new_session = lambda new_driver: navigate(new_driver, state)
+
+    yield driver
+
+    if healer is not None:
+        healer.on_new_session = None
+
+    # A failed test may have left the session in a bad state; let the pool
+    # health-check it instead of trusting it blindly.
+    rep = getattr(request.node, 'rep_call', None)
+    next_state = next_state_of(request.node)
+    if rep is not None and rep.failed and not driver_pool.is_healthy(driver):
+        driver_pool.release(driver, reset='session')
+    elif (rep is None or not rep.failed) and state is not None and next_state is not None \
+            and next_state.name == state.name:
+        # The next test starts where this one left the app
+        record_reuse(state, next_state.reset or driver_pool.reset_strategy)
+        driver_pool.release(driver, reset='none', state=state.name)
+    else:
+        driver_pool.release(driver, reset=next_state.reset if next_state else None)
+
+
+def _cassette_driver(request):
+    """Run the test on its own session, recorded to or replayed from the test's cassette."""
+    if CASSETTE_MODE not in CASSETTE_MODES:
+        raise ValueError(f"Unknown APPIUM_CASSETTE_MODE {CASSETTE_MODE!r}, expected one of {CASSETTE_MODES}")
+    path = cassette_path(request.node.nodeid)
+    options = request.getfixturevalue('appium_options')
+    if CASSETTE_MODE == 'replay':
+        if not os.path.exists(path):
+            pytest.skip(f"No cassette recorded at {path}")
+        cassette = Cassette.load(path)
+        driver = replay_driver(options, cassette)
+    else:
+        request.getfixturevalue('device_lease').apply(options)
+        cassette = Cassette(path)
+        driver = recording_driver(request.getfixturevalue('appium_server_url'), options, cassette)
+    if PROFILE_COMMANDS:
+        command_profiler.instrument(driver)
+
+    yield driver
+
+    try:
+        driver.quit()
+    except CassetteMismatch:
+        # Already recorded on the cassette; reported below
+        pass
+    rep = getattr(request.node, 'rep_call', None)
+    passed = rep is not None and rep.passed
+    if CASSETTE_MODE == 'record':
+        if passed:
+            cassette.save()
+        else:
+            logger.warning("Test did not pass, keeping the previous cassette at %s", path)
+    elif passed and (cassette.mismatches or cassette.unplayed()):
+        pytest.fail(
+            "; ".join(cassette.mismatches)
+            or f"Replay ended with {cassette.unplayed()} recorded interactions unplayed in {path}",
+            pytrace=False,
+        )
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    """Collect pool counters from xdist workers."""
+    data = getattr(node, 'workeroutput', {}).get('driver_pool')
+    if data:
+        stats = node.config.stash.setdefault(pool_stats_key, PoolStats())
+        stats.merge(data)
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    """Report how much session setup the driver pool saved."""
+    stats = config.stash.get(pool_stats_key, None)
+    if stats is None or not stats.sessions_created:
+        return
+    terminalreporter.write_sep("=", "Appium driver pool")
+    terminalreporter.write_line(
+        f"sessions created: {stats.sessions_created} "
+        f"(avg {stats.average_creation_seconds:.1f}s, {stats.prewarmed} pre-warmed)"
+    )
+    terminalreporter.write_line(f"sessions reused: {stats.sessions_reused}")
+    terminalreporter.write_line(f"sessions replaced: {stats.sessions_replaced}")
+    terminalreporter.write_line(f"setup time saved: {stats.seconds_saved:.1f}s")
+
 
 @pytest.fixture(scope="session")
 def event_loop():
     """Create event loop for async tests."""
     loop = asyncio.get_event_loop_policy().new_event_loop()
     yield loop
-    loop.close() 
\ No newline at end of file
+    loop.close()
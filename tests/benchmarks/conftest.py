@@ -0,0 +1,32 @@
+import os
+
+import pytest
+from appium import webdriver
+
+from tests.mobile.pages.api_demos_page import ApiDemosPage
+from tests.mobile.utils.fake_appium_server import FakeAppiumServer, fake_options
+
+# Simulated round-trip time of the fake server, in seconds
+FAKE_SERVER_LATENCY = float(os.getenv('FAKE_SERVER_LATENCY', '0.002'))
+
+
+@pytest.fixture(scope="session")
+def fake_server():
+    """Start an in-process Appium stand-in for the benchmark session."""
+    with FakeAppiumServer(latency=FAKE_SERVER_LATENCY) as server:
+        yield server
+
+
+@pytest.fixture
+def fake_driver(fake_server):
+    """Provide a session on the fake server, back on the main screen."""
+    driver = webdriver.Remote(fake_server.url, options=fake_options())
+    try:
+        yield driver
+    finally:
+        driver.quit()
+
+
+@pytest.fixture
+def api_demos_page(fake_driver) -> ApiDemosPage:
+    return ApiDemosPage(fake_driver)
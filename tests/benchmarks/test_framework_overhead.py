@@ -0,0 +1,252 @@
+import base64
+import logging
+
+import pytest
+from appium import webdriver
+from selenium.common.exceptions import TimeoutException
+
+from tests.benchmarks.conftest import FAKE_SERVER_LATENCY
+from tests.mobile.base.base_page import BasePage
+from tests.mobile.pages.api_demos_page import ApiDemosPage
+from tests.mobile.pages.custom_title_page import CustomTitlePage
+from tests.mobile.base.scroller import ScrollIndexCache, Scroller, ScrollStats
+from tests.mobile.base.settings_profile import SETTINGS_PROFILES, apply_profile
+from tests.mobile.fixtures.driver_pool import DriverPool
+from tests.mobile.utils.fake_appium_server import FakeAppiumServer, fake_options
+from tests.mobile.utils.log_buffer import LogBuffer
+from tests.mobile.utils.logcat import LogcatCollector
+from tests.mobile.utils.perf_sampler import PerfSampler
+from tests.mobile.utils.screenshots import ScreenshotPipeline
+from tests.mobile.utils.visual import BaselineCache, check_screen
+from tests.mobile.utils.waits import AdaptiveWait, WaitStats
+
+logger = logging.getLogger(__name__)
+
+
+def test_session_creation(benchmark, fake_server):
+    """Create and quit a fresh session, as a per-test fixture would."""
+    def create_and_quit():
+        driver = webdriver.Remote(fake_server.url, options=fake_options())
+        driver.quit()
+        return driver.session_id
+    assert benchmark(create_and_quit) not in fake_server.sessions
+
+
+def test_pooled_session(benchmark, fake_server):
+    """Hand out a pooled session and reset the app between tests."""
+    pool = DriverPool(lambda: webdriver.Remote(fake_server.url, options=fake_options()),
+                      app_package='io.appium.android.apis', reset_strategy='restart', prewarm=False)
+    try:
+        benchmark(lambda: pool.release(pool.acquire()))
+        # Every round after the first reuses the one session
+        assert pool.stats.sessions_created == 1
+        assert pool.stats.sessions_replaced == 0
+    finally:
+        pool.shutdown()
+
+
+def test_find_elements_text_filter(benchmark, api_demos_page):
+    """Find the list items and read each one's text to pick one out."""
+    def find_views():
+        items = api_demos_page.find_elements("ID", "android:id/text1")
+        return [item for item in items if item.text == "Views"]
+    assert len(benchmark(find_views)) == 1
+
+
+def test_snapshot_text_filter(benchmark, api_demos_page):
+    """Answer the same lookup from one page source snapshot."""
+    def find_views():
+        api_demos_page.invalidate_snapshot()
+        return api_demos_page.snapshot().find(resource_id="android:id/text1", text="Views")
+    assert len(benchmark(find_views)) == 1
+
+
+def test_scroll_indexed(benchmark, fake_server, api_demos_page):
+    """Scroll the Views list to its last item with drags computed from a learned index."""
+    indexes, stats = ScrollIndexCache(), ScrollStats()
+
+    def scroll():
+        steps = fake_server.device_steps
+        api_demos_page.click_element("ACCESSIBILITY_ID", "Views")
+        Scroller(api_demos_page, indexes, stats).scroll_to(lambda node: node.text == "WebView3", "WebView3")
+        api_demos_page.back()
+        return fake_server.device_steps - steps
+    logger.info("Indexed scroll: %s device-side gestures once the list is indexed", benchmark(scroll))
+    assert all(result[1] for result in stats.as_dict()['results'])
+
+
+def test_scroll_ui_scrollable(benchmark, fake_server, fake_driver):
+    """Scroll the same list with UiScrollable, which rewinds and re-checks the hierarchy per swipe."""
+    page = ApiDemosPage(fake_driver)
+
+    def scroll():
+        steps = fake_server.device_steps
+        page.click_element("ACCESSIBILITY_ID", "Views")
+        fake_driver.find_element(
+            "-android uiautomator",
+            'new UiScrollable(new UiSelector().scrollable(true)).scrollIntoView(new UiSelector().text("WebView3"))')
+        page.back()
+        return fake_server.device_steps - steps
+    steps = benchmark(scroll)
+    logger.info("UiScrollable: %s device-side swipes and hierarchy checks", steps)
+    assert steps > 0
+
+
+@pytest.fixture(scope="module")
+def busy_server():
+    """A fake server whose hierarchy dumps cost time and whose screens animate after a tap."""
+    with FakeAppiumServer(latency=FAKE_SERVER_LATENCY, dump_latency=0.004, idle_delay=0.05) as server:
+        yield server
+
+
+@pytest.mark.parametrize("profile", sorted(SETTINGS_PROFILES))
+def test_lookup_by_settings_profile(benchmark, busy_server, profile):
+    """Open a menu and look up its items under each settings profile."""
+    benchmark.group = "settings profiles"
+    driver = webdriver.Remote(busy_server.url, options=fake_options())
+    try:
+        page = BasePage(driver)
+        apply_profile(driver, profile)
+
+        def open_and_find():
+            page.click_element("ACCESSIBILITY_ID", "App")
+            items = page.find_elements("ID", "android:id/text1")
+            page.back()
+            return items
+        assert benchmark(open_and_find)
+    finally:
+        driver.quit()
+
+
+@pytest.fixture
+def custom_title_page(fake_driver) -> CustomTitlePage:
+    fake_driver.execute_script('mobile: startActivity', {'intent': f"io.appium.android.apis/{CustomTitlePage.ACTIVITY}"})
+    return CustomTitlePage(fake_driver)
+
+
+def test_send_keys_per_field(benchmark, custom_title_page):
+    """Find, clear and type into each title field, then read each one back."""
+    page = custom_title_page
+
+    def fill():
+        page.send_keys(*page.LEFT_TEXT, "Left Title")
+        page.send_keys(*page.RIGHT_TEXT, "Right Title")
+        return [page.get_text(*page.LEFT_TEXT), page.get_text(*page.RIGHT_TEXT)]
+    assert benchmark(fill) == ["Left Title", "Right Title"]
+
+
+def test_fill_form(benchmark, custom_title_page):
+    """Set both title fields with one lookup pass and verify them with one read-back."""
+    page = custom_title_page
+
+    def fill():
+        page.invalidate_snapshot()
+        return page.fill_form({page.LEFT_TEXT: "Left Title", page.RIGHT_TEXT: "Right Title"}, verify=True)
+    assert benchmark(fill).ok
+
+
+def test_wait_for_present_element(benchmark, api_demos_page):
+    """Wait for an element that is already on screen."""
+    assert benchmark(api_demos_page.find_element, "ACCESSIBILITY_ID", "API Demos").text == "API Demos"
+
+
+def test_wait_timeout(benchmark, fake_driver):
+    """Poll for a missing element until a short timeout expires."""
+    wait = AdaptiveWait(fake_driver, timeout=0.25, stats=WaitStats())
+
+    def wait_for_missing():
+        with pytest.raises(TimeoutException):
+            wait.presence("accessibility id", "Missing")
+    benchmark.pedantic(wait_for_missing, rounds=10)
+    waits, seconds, _polls, timeouts = wait.stats.as_dict()["accessibility id=Missing"]
+    assert timeouts == waits
+    assert seconds >= 0.25 * waits
+
+
+def test_screenshot(benchmark, fake_driver):
+    """Fetch and decode a full-screen screenshot."""
+    png = benchmark(fake_driver.get_screenshot_as_png)
+    assert png.startswith(b'\x89PNG')
+
+
+def test_screenshot_to_file(benchmark, fake_driver, tmp_path):
+    """Fetch a screenshot and write it to disk."""
+    path = tmp_path / "screen.png"
+    benchmark(fake_driver.get_screenshot_as_file, str(path))
+    assert base64.b64encode(path.read_bytes()).decode('ascii') == fake_driver.get_screenshot_as_base64()
+
+
+def test_screenshot_pipeline(benchmark, fake_driver, tmp_path):
+    """Time the test thread spends queueing a screenshot for a background write."""
+    pipeline = ScreenshotPipeline(directory=str(tmp_path))
+
+    def capture():
+        # Every fake frame is identical; forget the last one so each capture is written
+        pipeline.forget(fake_driver.session_id)
+        pipeline.capture(fake_driver, "screen.png")
+    try:
+        benchmark(capture)
+    finally:
+        pipeline.shutdown()
+    assert pipeline.stats.written == pipeline.stats.captured
+
+
+def test_visual_check(benchmark, fake_driver, tmp_path):
+    """Fetch, decode and compare a screenshot against a cached baseline."""
+    cache = BaselineCache(str(tmp_path))
+    cache.save("main", fake_driver.get_screenshot_as_png())
+    result = benchmark(check_screen, fake_driver, "main", cache=cache)
+    assert result.passed
+
+
+def test_page_logging(benchmark, api_demos_page, caplog):
+    """Logging cost of a page lookup at the configured log level."""
+    message = f"Finding element: {api_demos_page.ACCESSIBILITY_BUTTON}"
+    benchmark(logger.info, message)
+    # Emitted exactly when the configured level lets INFO through
+    emitted = [record for record in caplog.records if record.getMessage() == message]
+    assert bool(emitted) == logger.isEnabledFor(logging.INFO)
+
+
+def test_buffered_logging(benchmark, api_demos_page, caplog):
+    """Logging cost of the same lookup with LOG_MODE=buffered, when the test passes."""
+    buffered = logging.getLogger('benchmarks.buffered')
+    buffer = LogBuffer()
+    buffered.addHandler(buffer)
+    buffered.setLevel(logging.INFO)
+    buffered.propagate = False
+    try:
+        benchmark(buffered.info, "Finding element: %s", api_demos_page.ACCESSIBILITY_BUTTON)
+    finally:
+        buffered.removeHandler(buffer)
+    message = f"Finding element: {api_demos_page.ACCESSIBILITY_BUTTON}"
+    assert buffer.records
+    assert {record.getMessage() for record in buffer.records} == {message}
+    # Kept in the buffer only, nothing reached the console handlers
+    assert not [record for record in caplog.records if record.name == buffered.name]
+
+
+def test_logcat_poll(benchmark, fake_server, fake_driver):
+    """Fetch and filter 500 new logcat lines, half of them the app's, into a bounded buffer."""
+    session = fake_server.sessions[fake_driver.session_id]
+    # No background thread: the benchmark drives the fetches
+    collector = LogcatCollector(fake_driver, 'io.appium.android.apis', capacity=1000)
+    collector._command = collector._find_command()
+
+    def log_and_poll():
+        for i in range(250):
+            session.log(f"onBindViewHolder position={i}", level='D', tag='RecyclerView')
+            session.log(f"Composition: {i} layers", level='D', tag='SurfaceFlinger', pid=577)
+        collector.poll()
+    benchmark(log_and_poll)
+    assert 0 < len(collector.entries) <= 1000
+
+
+def test_perf_sample_round(benchmark, fake_driver):
+    """One round of CPU and memory sampling, as the background sampler takes every PERF_INTERVAL."""
+    # No background thread: the benchmark drives the rounds
+    sampler = PerfSampler(fake_driver, 'io.appium.android.apis', ('cpuinfo', 'memoryinfo'))
+    sampler.begin('benchmark')
+    benchmark(sampler.sample)
+    summary = sampler.end()
+    assert summary['memoryinfo.totalPss']['samples'] >= 1
@@ -1,6 +1,8 @@
 import pytest
-from appium import webdriver
-from appium.webdriver.common.mobileby import MobileBy
+from appium.webdriver.common.appiumby import AppiumBy
+from tests.mobile.pages.api_demos_page import ApiDemosPage
+from tests.mobile.pages.custom_title_page import CustomTitlePage
+from tests.mobile.utils.navigation import Navigator
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import logging
@@ -9,31 +11,18 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Test configuration
-APPIUM_SERVER = 'http://localhost:4723'
-CAPS = {
-    'platformName': 'Android',
-    'automationName': 'UiAutomator2',
-    'deviceName': 'Pixel_7_API_35',
-    'app': './ApiDemos-debug.apk',
-    'autoGrantPermissions': True
-}
-
 @pytest.fixture
-def driver():
-    """Set up and tear down the Appium driver."""
-    logger.info("Setting up Appium driver")
-    driver = webdriver.Remote(APPIUM_SERVER, CAPS)
-    yield driver
-    logger.info("Tearing down Appium driver")
-    driver.quit()
+def driver(appium_driver):
+    """Provide a pooled Appium driver."""
+    return appium_driver
 
+@pytest.mark.app_state(page=ApiDemosPage)
 def test_app_launch(driver):
     """Test basic app launch and verification."""
     logger.info("Starting app launch test")
     wait = WebDriverWait(driver, 10)
     element = wait.until(
-        EC.presence_of_element_located((MobileBy.ACCESSIBILITY_ID, "API Demos"))
+        EC.presence_of_element_located((AppiumBy.ACCESSIBILITY_ID, "API Demos"))
     )
     assert element.is_displayed()
     logger.info("App launch test completed successfully")
@@ -41,53 +30,25 @@ def test_app_launch(driver):
 def test_custom_title_interaction(driver):
     """Test interaction with the Custom Title feature."""
     logger.info("Starting custom title interaction test")
-    wait = WebDriverWait(driver, 10)
-    
-    # Navigate to Views
-    logger.info("Navigating to Views")
-    views = wait.until(
-        EC.element_to_be_clickable((MobileBy.ACCESSIBILITY_ID, "Views"))
-    )
-    views.click()
-    
-    # Navigate to Custom
-    logger.info("Navigating to Custom")
-    custom = wait.until(
-        EC.element_to_be_clickable((MobileBy.ACCESSIBILITY_ID, "Custom"))
-    )
-    custom.click()
-    
-    # Click on Custom Title
-    logger.info("Clicking Custom Title")
-    driver.find_element(
-        MobileBy.ANDROID_UIAUTOMATOR,
-        'new UiScrollable(new UiSelector().scrollable(true)).scrollIntoView(new UiSelector().text("Custom Title"))'
-    ).click()
-    
-    # Interact with text fields
-    logger.info("Interacting with text fields")
-    left_text = wait.until(
-        EC.presence_of_element_located((MobileBy.ID, "io.appium.android.apis:id/left_text"))
-    )
-    right_text = driver.find_element(MobileBy.ID, "io.appium.android.apis:id/right_text")
-    
-    left_text.clear()
-    left_text.send_keys("Left Title")
-    right_text.clear()
-    right_text.send_keys("Right Title")
-    
-    # Apply changes
-    logger.info("Applying text changes")
-    driver.find_element(MobileBy.ACCESSIBILITY_ID, "Change Left").click()
-    driver.find_element(MobileBy.ACCESSIBILITY_ID, "Change Right").click()
-    
-    # Verify changes
-    logger.info("Verifying text changes")
-    assert wait.until(
-        EC.presence_of_element_located((MobileBy.XPATH, "//*[@text='Left Title']"))
-    ).is_displayed()
-    assert wait.until(
-        EC.presence_of_element_located((MobileBy.XPATH, "//*[@text='Right Title']"))
-    ).is_displayed()
-    
-    logger.info("Custom title interaction test completed successfully") 
\ No newline at end of file
+    # Launches the Custom Title activity directly, falling back to the menus
+    page = Navigator(driver).open(CustomTitlePage)
+
+    # Set both text fields in one pass and read them back once
+    form = page.fill_form({page.LEFT_TEXT: "Left Title", page.RIGHT_TEXT: "Right Title"}, verify=True)
+    assert form.ok, form.mismatches
+
+    # The rest of the flow is shipped to the server as one batch
+    with page.batch() as batch:
+        # Apply changes
+        batch.click(*page.CHANGE_LEFT_BUTTON)
+        batch.click(*page.CHANGE_RIGHT_BUTTON)
+
+        # Verify changes
+        batch.wait_for(*page.title_locator("Left Title"))
+        batch.wait_for(*page.title_locator("Right Title"))
+
+    for step in batch.result.steps:
+        logger.info("%s: %s (%.0fms)", step.name, 'ok' if step.ok else step.error, step.elapsed_ms)
+    assert batch.result.ok, batch.result.error
+
+    logger.info("Custom title interaction test completed successfully")
@@ -0,0 +1,237 @@
+import json
+import logging
+import time
+import weakref
+from typing import Any, Dict, List, Optional
+
+from selenium.common.exceptions import UnknownMethodException, WebDriverException
+
+logger = logging.getLogger(__name__)
+
+# Sessions whose server has no execute-driver plugin, so batches go straight to the local path
+_unsupported_sessions = weakref.WeakKeyDictionary()
+
+# WebdriverIO script run on the Appium server. Steps are executed in order with the
+# same find-then-act semantics as BasePage; the first failing step stops the batch.
+_SCRIPT_TEMPLATE = """
+const steps = %(steps)s;
+const timeout = %(timeout)d;
+const elementKey = 'element-6066-11e4-a52e-4f735466cecf';
+const find = async (using, value) => {
+  const deadline = Date.now() + timeout;
+  while (true) {
+    try {
+      const element = await driver.findElement(using, value);
+      const id = element && (element[elementKey] || element.ELEMENT);
+      if (id) return id;
+    } catch (e) {}
+    if (Date.now() >= deadline) throw new Error(`Element not found with ${using}: ${value}`);
+    await new Promise((resolve) => setTimeout(resolve, 100));
+  }
+};
+const results = [];
+for (const step of steps) {
+  const started = Date.now();
+  try {
+    let value = null;
+    switch (step.action) {
+      case 'click': await driver.elementClick(await find(step.using, step.value)); break;
+      case 'clear': await driver.elementClear(await find(step.using, step.value)); break;
+      case 'send_keys': {
+        const id = await find(step.using, step.value);
+        await driver.elementClear(id);
+        await driver.elementSendKeys(id, step.text);
+        break;
+      }
+      case 'get_text': value = await driver.getElementText(await find(step.using, step.value)); break;
+      case 'wait_for': await find(step.using, step.value); break;
+      case 'back': await driver.back(); break;
+      case 'execute': value = await driver.executeScript(step.script, [step.args]); break;
+      default: throw new Error(`Unknown batch action ${step.action}`);
+    }
+    results.push({ok: true, value: value === undefined ? null : value, ms: Date.now() - started});
+  } catch (e) {
+    results.push({ok: false, error: String(e && e.message || e), ms: Date.now() - started});
+    break;
+  }
+}
+return results;
+"""
+
+
+class StepResult:
+    """Outcome of one recorded step."""
+
+    def __init__(self, name: str, ok: bool, value: Any = None, elapsed_ms: float = 0.0,
+                 error: Optional[str] = None):
+        self.name = name
+        self.ok = ok
+        self.value = value
+        self.elapsed_ms = elapsed_ms
+        self.error = error
+
+    def __repr__(self):
+        status = 'ok' if self.ok else f'failed: {self.error}'
+        return f"<StepResult {self.name} {status} {self.elapsed_ms:.0f}ms>"
+
+
+class BatchResult:
+    """Per-step results of a batch and how it was executed."""
+
+    def __init__(self, steps: List[StepResult], remote: bool, elapsed_ms: float):
+        self.steps = steps
+        self.remote = remote
+        self.elapsed_ms = elapsed_ms
+
+    @property
+    def ok(self) -> bool:
+        return all(step.ok for step in self.steps)
+
+    @property
+    def error(self) -> Optional[str]:
+        failed = next((step for step in self.steps if not step.ok), None)
+        return f"{failed.name}: {failed.error}" if failed else None
+
+    @property
+    def values(self) -> List[Any]:
+        return [step.value for step in self.steps]
+
+    def raise_for_failure(self):
+        if not self.ok:
+            raise WebDriverException(f"Batch step failed: {self.error}")
+
+
+class ActionBatch:
+    """Record page-object actions and run them in a single ``executeDriverScript`` call.
+
+    When the server lacks the execute-driver plugin the steps run locally, one
+    command at a time, through the page object so the results look the same.
+    Any other failure of the script call is raised: some steps may have run on
+    the server, and running the batch again could repeat them.
+    """
+
+    def __init__(self, page, timeout: int = 10):
+        self.page = page
+        self.timeout = timeout
+        self._steps: List[Dict[str, Any]] = []
+        self.result: Optional[BatchResult] = None
+
+    def __enter__(self) -> 'ActionBatch':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.run()
+
+    def click(self, locator_type: str, locator_value: str) -> 'ActionBatch':
+        return self._add('click', locator_type, locator_value)
+
+    def clear(self, locator_type: str, locator_value: str) -> 'ActionBatch':
+        return self._add('clear', locator_type, locator_value)
+
+    def send_keys(self, locator_type: str, locator_value: str, text: str) -> 'ActionBatch':
+        return self._add('send_keys', locator_type, locator_value, text=text)
+
+    def get_text(self, locator_type: str, locator_value: str) -> 'ActionBatch':
+        return self._add('get_text', locator_type, locator_value)
+
+    def wait_for(self, locator_type: str, locator_value: str) -> 'ActionBatch':
+        return self._add('wait_for', locator_type, locator_value)
+
+    def back(self) -> 'ActionBatch':
+        self._steps.append({'action': 'back', 'name': 'back'})
+        return self
+
+    def execute(self, script: str, args: Optional[Dict[str, Any]] = None) -> 'ActionBatch':
+        """Record a ``mobile:`` command such as ``mobile: scrollGesture``."""
+        self._steps.append({'action': 'execute', 'name': script, 'script': script, 'args': args or {}})
+        return self
+
+    def run(self) -> BatchResult:
+        """Execute the recorded steps and return their results."""
+        start = time.perf_counter()
+        driver = self.page.driver
+        steps = None
+        if driver not in _unsupported_sessions:
+            steps = self._run_remote(driver)
+        remote = steps is not None
+        if steps is None:
+            steps = self._run_local()
+        self.result = BatchResult(steps, remote, (time.perf_counter() - start) * 1000)
+        self._steps = []
+        # The batch acted on the UI behind the page object's back
+        self.page._ui_changed()
+        if self.page.element_cache is not None:
+            self.page.element_cache.invalidate()
+        logger.info("Ran batch of %s steps %s in %.0fms", len(steps), 'remotely' if remote else 'locally',
+                    self.result.elapsed_ms)
+        return self.result
+
+    def _add(self, action: str, locator_type: str, locator_value: str, **extra) -> 'ActionBatch':
+        self._steps.append({
+            'action': action,
+            'name': f"{action} {locator_type}={locator_value}",
+            'locator_type': locator_type,
+            'using': self.page._get_locator_type(locator_type),
+            'value': locator_value,
+            **extra,
+        })
+        return self
+
+    def _run_remote(self, driver) -> Optional[List[StepResult]]:
+        script = _SCRIPT_TEMPLATE % {
+            'steps': json.dumps([{k: v for k, v in step.items() if k != 'locator_type'} for step in self._steps]),
+            'timeout': self.timeout * 1000,
+        }
+        try:
+            response = driver.execute_driver(script, script_type='webdriverio',
+                                             timeout_ms=(self.timeout * len(self._steps) + 30) * 1000)
+        except WebDriverException as e:
+            if not (isinstance(e, UnknownMethodException) or _is_missing_plugin(e)):
+                # The script may have run some steps already; running them locally would repeat them
+                logger.warning("Remote batch failed, not knowing which steps ran: %s", e)
+                raise
+            logger.info("Server has no execute-driver plugin, running batches locally")
+            _unsupported_sessions[driver] = True
+            return None
+        return [
+            StepResult(step['name'], item.get('ok', False), item.get('value'), item.get('ms', 0), item.get('error'))
+            for step, item in zip(self._steps, response.result)
+        ]
+
+    def _run_local(self) -> List[StepResult]:
+        results = []
+        for step in self._steps:
+            started = time.perf_counter()
+            try:
+                value = self._run_local_step(step)
+                results.append(StepResult(step['name'], True, value, (time.perf_counter() - started) * 1000))
+            except WebDriverException as e:
+                results.append(StepResult(step['name'], False, None, (time.perf_counter() - started) * 1000,
+                                          e.msg or type(e).__name__))
+                break
+        return results
+
+    def _run_local_step(self, step: Dict[str, Any]) -> Any:
+        page = self.page
+        action = step['action']
+        if action == 'back':
+            page.back()
+        elif action == 'execute':
+            return page.driver.execute_script(step['script'], step['args'])
+        elif action == 'click':
+            page.click_element(step['locator_type'], step['value'])
+        elif action == 'clear':
+            page.find_element(step['locator_type'], step['value']).clear()
+        elif action == 'send_keys':
+            page.send_keys(step['locator_type'], step['value'], step['text'])
+        elif action == 'get_text':
+            return page.get_text(step['locator_type'], step['value'])
+        elif action == 'wait_for':
+            page.find_element(step['locator_type'], step['value'])
+        return None
+
+
+def _is_missing_plugin(error: WebDriverException) -> bool:
+    message = (error.msg or '').lower()
+    return any(hint in message for hint in ('unknown command', 'could not be found', 'not supported', 'execute-driver'))
@@ -1,96 +1,296 @@
-from typing import List, Tuple
+from typing import Callable, List, Mapping, Optional, Tuple
 from appium.webdriver.common.appiumby import AppiumBy
 from appium.webdriver.webdriver import WebDriver
-from selenium.webdriver.support.wait import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException, TimeoutException
+from tests.mobile.base.action_batch import ActionBatch
+from tests.mobile.base.element_cache import ElementCache
+from tests.mobile.base.form_filler import FormFiller, FormResult
+from tests.mobile.base.page_snapshot import PageSnapshot, SnapshotNode, escape_selector_value
+from tests.mobile.base.scroller import ScrollResult, Scroller
+from tests.mobile.base.settings_profile import apply_profile
+from tests.mobile.utils.retry import retry_stale
+from tests.mobile.utils.waits import AdaptiveWait, describe_locator
+
+LOCATOR_MAP = {
+    'ACCESSIBILITY_ID': AppiumBy.ACCESSIBILITY_ID,
+    'CLASS_NAME': AppiumBy.CLASS_NAME,
+    'ID': AppiumBy.ID,
+    'NAME': AppiumBy.NAME,
+    'XPATH': AppiumBy.XPATH,
+    'CSS_SELECTOR': AppiumBy.CSS_SELECTOR,
+    'TAG_NAME': AppiumBy.TAG_NAME,
+    '-android uiautomator': AppiumBy.ANDROID_UIAUTOMATOR,
+    'ANDROID_VIEWTAG': AppiumBy.ANDROID_VIEWTAG,
+    'IOS_PREDICATE': AppiumBy.IOS_PREDICATE,
+    'IOS_CLASS_CHAIN': AppiumBy.IOS_CLASS_CHAIN
+}
 
 class BasePage:
-    def __init__(self, driver: WebDriver):
+    # Reuse resolved element handles between calls. Opt in per page object;
+    # leave it off for screens whose views are re-created or recycled often.
+    use_element_cache = False
+    element_cache_size = 32
+    # UiAutomator2 settings profile applied when the page is created, by name (see SETTINGS_PROFILES)
+    # or as a settings dict; None keeps whatever the session has
+    SETTINGS_PROFILE = None
+
+    def __init__(self, driver: WebDriver, use_element_cache: Optional[bool] = None):
         self.driver = driver
-        self.wait = WebDriverWait(self.driver, 10)
+        apply_profile(driver, self.SETTINGS_PROFILE)
+        self.wait = AdaptiveWait(self.driver, 10)
+        self._snapshot = None
+        if use_element_cache is None:
+            use_element_cache = self.use_element_cache
+        self.element_cache = None
+        if use_element_cache:
+            self.element_cache = ElementCache(lambda: self.driver.current_activity, self.element_cache_size)
 
     def find_element(self, locator_type: str, locator_value: str, timeout: int = 10):
         """Find a single element with wait."""
+        by = self._get_locator_type(locator_type)
+        if self.element_cache is not None:
+            element = self.element_cache.get((by, locator_value))
+            if element is not None:
+                return element
         try:
-            by = self._get_locator_type(locator_type)
-            return self.wait.until(
-                EC.presence_of_element_located((by, locator_value))
-            )
+            element = self.wait.presence(by, locator_value, timeout)
         except TimeoutException:
             raise TimeoutException(f"Element not found with {locator_type}: {locator_value}")
+        if self.element_cache is not None:
+            self.element_cache.put((by, locator_value), element)
+        return element
 
     def find_elements(self, locator_type: str, locator_value: str, timeout: int = 10) -> List:
         """Find multiple elements with wait."""
         try:
             by = self._get_locator_type(locator_type)
-            return self.wait.until(
-                EC.presence_of_all_elements_located((by, locator_value))
-            )
+            return self.wait.presence_of_all(by, locator_value, timeout)
         except TimeoutException:
             return []
 
-    def click_element(self, locator_type: str, locator_value: str):
+    def click_element(self, locator_type: str, locator_value: str, timeout: int = 10):
         """Click element with wait."""
         by = self._get_locator_type(locator_type)
-        element = self.wait.until(
-            EC.element_to_be_clickable((by, locator_value))
-        )
-        element.click()
+        element = self.element_cache.get((by, locator_value)) if self.element_cache is not None else None
+        if element is not None:
+            try:
+                element.click()
+                self._ui_changed()
+                return
+            except StaleElementReferenceException:
+                self.element_cache.invalidate((by, locator_value))
+
+        def find_and_click():
+            element = self.wait.until(
+                EC.element_to_be_clickable((by, locator_value)),
+                f"Element not clickable with {locator_type}: {locator_value}",
+                timeout,
+                describe_locator(by, locator_value),
+            )
+            if self.element_cache is not None:
+                self.element_cache.put((by, locator_value), element)
+            element.click()
+        retry_stale(find_and_click, f"click {locator_type}={locator_value}",
+                    on_stale=lambda: self._forget_element(by, locator_value))
+        self._ui_changed()
 
     def send_keys(self, locator_type: str, locator_value: str, text: str):
         """Send keys to element with wait."""
-        element = self.find_element(locator_type, locator_value)
-        element.clear()
-        element.send_keys(text)
+        def clear_and_type(element):
+            element.clear()
+            element.send_keys(text)
+        self._with_element(locator_type, locator_value, clear_and_type)
+        # Typing changes text, not the screen, so cached handles stay valid
+        self.invalidate_snapshot()
+
+    def fill_form(self, fields: Mapping[Tuple[str, str], str], verify: bool = False,
+                  hide_keyboard: bool = True, timeout: int = 10) -> FormResult:
+        """Set several text fields, given as ``{(locator_type, locator_value): text}``, in few commands."""
+        return FormFiller(self, timeout).fill(fields, verify, hide_keyboard)
 
     def is_element_visible(self, locator_type: str, locator_value: str, timeout: int = 5) -> bool:
         """Check if element is visible."""
         try:
             by = self._get_locator_type(locator_type)
             self.wait.until(
-                EC.visibility_of_element_located((by, locator_value))
+                EC.visibility_of_element_located((by, locator_value)),
+                timeout=timeout,
+                locator=describe_locator(by, locator_value),
             )
             return True
         except TimeoutException:
             return False
 
-    def scroll_to_element(self, locator_type: str, locator_value: str):
-        """Scroll to element using Android UI Automator."""
-        self.driver.execute_script(
-            'mobile: scrollGesture',
-            {
-                'left': 100, 'top': 100, 'width': 200, 'height': 200,
-                'direction': 'down',
-                'percent': 0.75
-            }
-        )
+    def scroll_to_element(self, locator_type: str, locator_value: str, container: Optional[str] = None) -> ScrollResult:
+        """Scroll the screen's list until the element is fully shown."""
+        by = self._get_locator_type(locator_type)
+        found = None
+        if by == AppiumBy.ACCESSIBILITY_ID:
+            matches = lambda node: node.content_desc == locator_value
+        elif by == AppiumBy.ID:
+            matches = lambda node: node.resource_id == locator_value or (
+                ':' not in locator_value and node.resource_id.endswith(f':id/{locator_value}'))
+        elif by == AppiumBy.CLASS_NAME:
+            matches = lambda node: node.class_name == locator_value
+        else:
+            # The snapshot cannot evaluate this strategy; explore and ask the server after each drag
+            matches = lambda node: False
+            found = lambda frame: bool(self.driver.find_elements(by, locator_value))
+        result = Scroller(self).scroll_to(matches, f"{locator_type}={locator_value}", found, container)
+        if not result.found:
+            raise NoSuchElementException(f"Element not found after scrolling with {locator_type}: {locator_value}")
+        return result
+
+    def scroll_to_text(self, text: str, container: Optional[str] = None) -> ScrollResult:
+        """Scroll the screen's list until an item with the given text or content-desc is fully shown."""
+        result = Scroller(self).scroll_to(lambda node: text in (node.text, node.content_desc), text,
+                                          container=container)
+        if not result.found:
+            raise NoSuchElementException(f"Text not found after scrolling: {text}")
+        return result
 
     def wait_for_element_to_disappear(self, locator_type: str, locator_value: str, timeout: int = 10):
         """Wait for element to disappear."""
         by = self._get_locator_type(locator_type)
         self.wait.until(
-            EC.invisibility_of_element_located((by, locator_value))
+            EC.invisibility_of_element_located((by, locator_value)),
+            f"Element still visible with {locator_type}: {locator_value}",
+            timeout,
+            describe_locator(by, locator_value),
         )
 
     def get_text(self, locator_type: str, locator_value: str) -> str:
         """Get element text with wait."""
-        element = self.find_element(locator_type, locator_value)
-        return element.text
+        return self._with_element(locator_type, locator_value, lambda element: element.text)
+
+    def back(self):
+        """Navigate back."""
+        self.driver.back()
+        self._ui_changed()
+
+    def snapshot(self) -> PageSnapshot:
+        """Return an indexed snapshot of the current screen, fetching the page source once."""
+        if self._snapshot is None:
+            self._snapshot = PageSnapshot(self.driver.page_source)
+        return self._snapshot
+
+    def invalidate_snapshot(self):
+        """Drop the cached snapshot so the next query sees the current UI."""
+        self._snapshot = None
+
+    def tap_node(self, node: SnapshotNode):
+        """Tap the centre of a snapshot node without looking the element up again."""
+        x, y = node.center
+        self.driver.execute_script('mobile: clickGesture', {'x': x, 'y': y})
+        self._ui_changed()
+
+    def tap_text(self, locator_type: str, locator_value: str, text: str, timeout: int = 10) -> bool:
+        """Tap the element matching the locator whose text equals the given text, waiting for it to show."""
+        if self._fresh_snapshot().find_by_locator(locator_type, locator_value) is None:
+            # Strategy the snapshot cannot answer, filter on the server's elements instead
+            element = self._wait_for_text_element(locator_type, locator_value, text, timeout)
+            if element is None:
+                return False
+            element.click()
+            self._ui_changed()
+            return True
+        node = next((node for node in self.snapshot().find_by_locator(locator_type, locator_value)
+                     if node.text == text), None)
+        if node is None:
+            # Not in the captured hierarchy, e.g. left out of a compressed dump; try one targeted lookup
+            element = self._find_text_on_server(locator_type, locator_value, text)
+            if element is not None:
+                element.click()
+                self._ui_changed()
+                return True
+            node = self._wait_for_text_node(locator_type, locator_value, text, timeout)
+        if node is None:
+            return False
+        self.tap_node(node)
+        return True
+
+    def is_text_displayed(self, locator_type: str, locator_value: str, text: str, timeout: int = 10) -> bool:
+        """Check whether an element matching the locator shows the given text, waiting up to the timeout."""
+        if self._fresh_snapshot().find_by_locator(locator_type, locator_value) is None:
+            return self._wait_for_text_element(locator_type, locator_value, text, timeout) is not None
+        return self._wait_for_text_node(locator_type, locator_value, text, timeout) is not None
+
+    def batch(self, timeout: int = 10) -> ActionBatch:
+        """Record actions to run on the server in a single round trip."""
+        return ActionBatch(self, timeout)
+
+    def element_cache_stats(self) -> dict:
+        """Hit/miss counters of the element cache (empty when the cache is off)."""
+        return self.element_cache.stats() if self.element_cache is not None else {}
+
+    def _with_element(self, locator_type: str, locator_value: str, action: Callable):
+        """Run an action on the element, looking it up again if the handle went stale."""
+        by = self._get_locator_type(locator_type)
+        return retry_stale(lambda: action(self.find_element(locator_type, locator_value)),
+                           f"{locator_type}={locator_value}", on_stale=lambda: self._forget_element(by, locator_value))
+
+    def _fresh_snapshot(self) -> PageSnapshot:
+        """Snapshot of the screen as it is now, never one cached before the call."""
+        self.invalidate_snapshot()
+        return self.snapshot()
+
+    def _wait_for_text_node(self, locator_type: str, locator_value: str, text: str,
+                            timeout: int) -> Optional[SnapshotNode]:
+        """Poll snapshots until a node matching the locator shows the text; None on timeout.
+
+        The first poll uses the snapshot already taken, every later one reads the screen again.
+        """
+        def matching_node(_driver):
+            node = next((node for node in self.snapshot().find_by_locator(locator_type, locator_value)
+                         if node.text == text), None)
+            if node is None:
+                self.invalidate_snapshot()
+            return node
+
+        by = self._get_locator_type(locator_type)
+        try:
+            return self.wait.until(matching_node, f"Text not displayed: {text}", timeout,
+                                   f"{describe_locator(by, locator_value)} text={text}")
+        except TimeoutException:
+            return None
+
+    def _wait_for_text_element(self, locator_type: str, locator_value: str, text: str, timeout: int):
+        """Poll the server's elements until one matching the locator shows the text; None on timeout."""
+        by = self._get_locator_type(locator_type)
+        try:
+            return self.wait.until(
+                lambda driver: next((element for element in driver.find_elements(by, locator_value)
+                                     if element.text == text), None),
+                f"Text not displayed: {text}", timeout, f"{describe_locator(by, locator_value)} text={text}")
+        except TimeoutException:
+            return None
+
+    def _find_text_on_server(self, locator_type: str, locator_value: str, text: str):
+        """Look up the element showing the text with a single UiSelector query; None when there is none."""
+        selector = f'new UiSelector().text("{escape_selector_value(text)}")'
+        if locator_type in ('ID', AppiumBy.ID):
+            if ':' in locator_value:
+                selector += f'.resourceId("{escape_selector_value(locator_value)}")'
+            else:
+                selector += f'.resourceIdMatches(".*:id/{escape_selector_value(locator_value)}")'
+        elif locator_type in ('ACCESSIBILITY_ID', AppiumBy.ACCESSIBILITY_ID):
+            selector += f'.description("{escape_selector_value(locator_value)}")'
+        elif locator_type in ('CLASS_NAME', AppiumBy.CLASS_NAME):
+            selector += f'.className("{escape_selector_value(locator_value)}")'
+        elements = self.driver.find_elements(AppiumBy.ANDROID_UIAUTOMATOR, selector)
+        return elements[0] if elements else None
+
+    def _forget_element(self, by: str, locator_value: str):
+        if self.element_cache is not None:
+            self.element_cache.invalidate((by, locator_value))
+
+    def _ui_changed(self):
+        """Forget everything derived from the screen as it was before a UI action."""
+        self.invalidate_snapshot()
+        if self.element_cache is not None:
+            self.element_cache.mark_dirty()
 
     def _get_locator_type(self, locator_type: str):
         """Convert string locator type to AppiumBy attribute."""
-        locator_map = {
-            'ACCESSIBILITY_ID': AppiumBy.ACCESSIBILITY_ID,
-            'CLASS_NAME': AppiumBy.CLASS_NAME,
-            'ID': AppiumBy.ID,
-            'NAME': AppiumBy.NAME,
-            'XPATH': AppiumBy.XPATH,
-            'CSS_SELECTOR': AppiumBy.CSS_SELECTOR,
-            'TAG_NAME': AppiumBy.TAG_NAME,
-            '-android uiautomator': AppiumBy.ANDROID_UIAUTOMATOR,
-            'ANDROID_VIEWTAG': AppiumBy.ANDROID_VIEWTAG,
-            'IOS_PREDICATE': AppiumBy.IOS_PREDICATE,
-            'IOS_CLASS_CHAIN': AppiumBy.IOS_CLASS_CHAIN
-        }
-        return locator_map.get(locator_type, AppiumBy.ID) 
\ No newline at end of file
+        return LOCATOR_MAP.get(locator_type, AppiumBy.ID)
@@ -0,0 +1,80 @@
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from appium.webdriver.webelement import WebElement
+
+Locator = Tuple[str, str]
+
+
+class ElementCache:
+    """Bounded LRU cache of resolved element handles keyed by ``(by, value)``.
+
+    Handles belong to the activity they were resolved on. After a UI action the
+    cache is marked dirty and the next lookup checks ``current_activity`` once;
+    if the activity changed every handle is dropped. Handles that turn out to be
+    stale are evicted by the caller through :meth:`invalidate`.
+    """
+
+    def __init__(self, activity_getter: Callable[[], str], max_size: int = 32):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._activity_getter = activity_getter
+        self._activity: Optional[str] = None
+        self._dirty = False
+        self._elements: "OrderedDict[Locator, WebElement]" = OrderedDict()
+
+    def get(self, locator: Locator) -> Optional[WebElement]:
+        """Return the cached handle for the locator, or None on a miss."""
+        if self._dirty:
+            self._check_activity()
+        element = self._elements.get(locator)
+        if element is None:
+            self.misses += 1
+            return None
+        self._elements.move_to_end(locator)
+        self.hits += 1
+        return element
+
+    def put(self, locator: Locator, element: WebElement):
+        """Store a freshly resolved handle, evicting the least recently used one if full."""
+        if self._activity is None:
+            self._activity = self._activity_getter()
+        self._elements[locator] = element
+        self._elements.move_to_end(locator)
+        while len(self._elements) > self.max_size:
+            self._elements.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, locator: Optional[Locator] = None):
+        """Drop one handle, or every handle when no locator is given."""
+        if locator is None:
+            self.invalidations += len(self._elements)
+            self._elements.clear()
+            self._activity = None
+        elif self._elements.pop(locator, None) is not None:
+            self.invalidations += 1
+
+    def mark_dirty(self):
+        """Note that the UI changed, so the activity is re-checked before the next hit."""
+        if self._elements:
+            self._dirty = True
+
+    def stats(self) -> Dict[str, int]:
+        """Counters for profiling cache effectiveness."""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'size': len(self._elements),
+        }
+
+    def _check_activity(self):
+        self._dirty = False
+        activity = self._activity_getter()
+        if activity != self._activity:
+            self.invalidate()
+            self._activity = activity
@@ -0,0 +1,165 @@
+import logging
+import time
+import weakref
+from typing import Dict, List, Mapping, NamedTuple, Tuple
+
+from appium.webdriver.common.appiumby import AppiumBy
+from selenium.common.exceptions import UnknownMethodException, WebDriverException
+
+from tests.mobile.utils.retry import retry_stale
+
+logger = logging.getLogger(__name__)
+
+Locator = Tuple[str, str]
+
+# Ways of setting a field's text, fastest first
+ENTRY_METHODS = ('replace', 'clipboard', 'type')
+
+# Android KEYCODE_PASTE
+_KEYCODE_PASTE = 279
+
+# Fastest entry method each session's driver supports, once known
+_entry_methods = weakref.WeakKeyDictionary()
+
+
+class FormResult(NamedTuple):
+    # Text each field should have, by locator
+    values: Dict[Locator, str]
+    method: str
+    # Fields whose read-back text differs, with the text found; empty when not verified
+    mismatches: Dict[Locator, str]
+    verified: bool
+    elapsed_ms: float
+
+    @property
+    def ok(self) -> bool:
+        return not self.mismatches
+
+
+def is_unsupported(error: WebDriverException) -> bool:
+    """Whether a command failed because the driver does not implement it."""
+    message = (error.msg or '').lower()
+    return isinstance(error, UnknownMethodException) or 'unsupported' in message or 'unknown command' in message \
+        or 'not implemented' in message
+
+
+class FormFiller:
+    """Set many text fields of a page with as few commands as the driver allows.
+
+    Fields are looked up together: one XPath union, matched against the page
+    snapshot to tell the elements apart. Text is set with
+    ``mobile: replaceElementValue`` (one command, no keyboard), or else pasted
+    from the clipboard, or else typed. Pasting leaves the last field's text on
+    the device clipboard, replacing whatever was there. The method that works
+    is remembered per session. The keyboard is hidden once at the end, and only when it was
+    used. Verification reads every field back from one fresh snapshot.
+    """
+
+    def __init__(self, page, timeout: int = 10):
+        self.page = page
+        self.timeout = timeout
+
+    def fill(self, fields: Mapping[Locator, str], verify: bool = False, hide_keyboard: bool = True) -> FormResult:
+        start = time.perf_counter()
+        values = {tuple(locator): str(value) for locator, value in fields.items()}
+        elements = self._resolve(list(values))
+        method = _entry_methods.get(self.page.driver, ENTRY_METHODS[0])
+        for locator, value in values.items():
+            method = self._enter(elements, locator, value, method)
+        if hide_keyboard and method != 'replace':
+            self._hide_keyboard()
+        self.page.invalidate_snapshot()
+        mismatches = self._read_back(values, elements) if verify else {}
+        result = FormResult(values, method, mismatches, verify, (time.perf_counter() - start) * 1000)
+        logger.info("Filled %s fields by %s in %.0fms%s", len(values), method, result.elapsed_ms,
+                    f", {len(mismatches)} differ" if mismatches else '')
+        return result
+
+    def _resolve(self, locators: List[Locator]) -> Dict[Locator, object]:
+        """Look every field up at once, falling back to a waiting lookup per field."""
+        elements = self._resolve_together(locators) if len(locators) > 1 else {}
+        for locator in locators:
+            if locator not in elements:
+                elements[locator] = self.page.find_element(*locator, timeout=self.timeout)
+        return elements
+
+    def _resolve_together(self, locators: List[Locator]) -> Dict[Locator, object]:
+        snapshot = self.page.snapshot()
+        nodes = {}
+        for locator in locators:
+            by = self.page._get_locator_type(locator[0])
+            found = snapshot.find_by_locator(by, locator[1]) if by in (AppiumBy.ID, AppiumBy.ACCESSIBILITY_ID) \
+                else None
+            if found:
+                nodes[locator] = found[0]
+        ids = {node.resource_id for locator, node in nodes.items()
+               if self.page._get_locator_type(locator[0]) == AppiumBy.ID}
+        descriptions = {node.content_desc for locator, node in nodes.items()
+                        if self.page._get_locator_type(locator[0]) == AppiumBy.ACCESSIBILITY_ID}
+        if len(nodes) < 2 or any("'" in value for value in ids | descriptions):
+            return {}
+        # XPath returns a union in document order, the order of the snapshot's nodes
+        union = ' | '.join([f"//*[@resource-id='{value}']" for value in sorted(ids)]
+                           + [f"//*[@content-desc='{value}']" for value in sorted(descriptions)])
+        expected = [node for node in snapshot.nodes if node.resource_id in ids or node.content_desc in descriptions]
+        found = self.page.driver.find_elements(AppiumBy.XPATH, union)
+        if len(found) != len(expected):
+            # The screen changed since the snapshot
+            self.page.invalidate_snapshot()
+            return {}
+        position = {id(node): index for index, node in enumerate(expected)}
+        return {locator: found[position[id(node)]] for locator, node in nodes.items()}
+
+    def _enter(self, elements: Dict[Locator, object], locator: Locator, value: str, method: str) -> str:
+        """Set one field's text; return the method that worked."""
+        driver = self.page.driver
+
+        def element():
+            if locator not in elements:
+                elements[locator] = self.page.find_element(*locator, timeout=self.timeout)
+            return elements[locator]
+
+        for candidate in ENTRY_METHODS[ENTRY_METHODS.index(method):]:
+            try:
+                retry_stale(lambda: self._set_text(candidate, element(), value), f"fill {locator[0]}={locator[1]}",
+                            on_stale=lambda: elements.pop(locator, None))
+            except WebDriverException as e:
+                if candidate == ENTRY_METHODS[-1] or not is_unsupported(e):
+                    raise
+                logger.info("Text entry by %s is not supported, falling back: %s", candidate, e.msg)
+                continue
+            _entry_methods[driver] = candidate
+            return candidate
+        return method
+
+    def _set_text(self, method: str, element, value: str):
+        driver = self.page.driver
+        if method == 'replace':
+            driver.execute_script('mobile: replaceElementValue', {'elementId': element.id, 'text': value})
+        elif method == 'clipboard':
+            driver.set_clipboard_text(value)
+            element.clear()
+            element.click()
+            driver.execute_script('mobile: pressKey', {'keycode': _KEYCODE_PASTE})
+        else:
+            element.clear()
+            element.send_keys(value)
+
+    def _hide_keyboard(self):
+        try:
+            self.page.driver.hide_keyboard()
+        except WebDriverException as e:
+            # Not shown, e.g. the field was filled without focusing it
+            logger.info("Keyboard not hidden: %s", e.msg)
+
+    def _read_back(self, values: Dict[Locator, str], elements: Dict[Locator, object]) -> Dict[Locator, str]:
+        """Compare every field with its expected text, reading one snapshot."""
+        snapshot = self.page.snapshot()
+        mismatches = {}
+        for locator, value in values.items():
+            nodes = snapshot.find_by_locator(self.page._get_locator_type(locator[0]), locator[1])
+            # Strategies the snapshot cannot answer are read from the element
+            actual = nodes[0].text if nodes else elements[locator].text
+            if actual != value:
+                mismatches[locator] = actual
+        return mismatches
@@ -0,0 +1,138 @@
+import io
+import re
+import xml.etree.ElementTree as ET
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+from appium.webdriver.common.appiumby import AppiumBy
+
+_BOUNDS_PATTERN = re.compile(r'\[(-?\d+),(-?\d+)\]\[(-?\d+),(-?\d+)\]')
+
+
+class SnapshotNode(NamedTuple):
+    """A single view from the UiAutomator2 hierarchy."""
+    class_name: str
+    resource_id: str
+    text: str
+    content_desc: str
+    bounds: Tuple[int, int, int, int]
+    clickable: bool
+    scrollable: bool
+    displayed: bool
+    depth: int = 0
+
+    @property
+    def center(self) -> Tuple[int, int]:
+        left, top, right, bottom = self.bounds
+        return (left + right) // 2, (top + bottom) // 2
+
+    def ui_selector(self) -> str:
+        """Build a UiSelector that targets this node with a single lookup."""
+        selector = 'new UiSelector()'
+        if self.resource_id:
+            selector += f'.resourceId("{self.resource_id}")'
+        if self.content_desc:
+            selector += f'.description("{escape_selector_value(self.content_desc)}")'
+        elif self.text:
+            selector += f'.text("{escape_selector_value(self.text)}")'
+        if not self.resource_id and not self.content_desc and not self.text:
+            selector += f'.className("{self.class_name}")'
+        return selector
+
+
+class PageSnapshot:
+    """Local, indexed copy of the page source answering lookups without round trips.
+
+    The hierarchy is parsed once with a streaming parser and indexed by
+    resource-id, text, content-desc and class, so finding and filtering many
+    elements costs a single ``page_source`` call instead of one call per element.
+    """
+
+    def __init__(self, source: Union[str, bytes]):
+        self.nodes: List[SnapshotNode] = []
+        self._by_resource_id: Dict[str, List[int]] = {}
+        self._by_text: Dict[str, List[int]] = {}
+        self._by_content_desc: Dict[str, List[int]] = {}
+        self._by_class: Dict[str, List[int]] = {}
+        self._parse(source.encode('utf-8') if isinstance(source, str) else source)
+
+    def find(self, resource_id: Optional[str] = None, text: Optional[str] = None,
+             content_desc: Optional[str] = None, class_name: Optional[str] = None) -> List[SnapshotNode]:
+        """Return nodes matching every given attribute, in document order."""
+        candidates = None
+        for index, value in ((self._by_resource_id, resource_id), (self._by_text, text),
+                             (self._by_content_desc, content_desc), (self._by_class, class_name)):
+            if value is None:
+                continue
+            positions = self._lookup_resource_id(value) if index is self._by_resource_id else index.get(value, [])
+            candidates = set(positions) if candidates is None else candidates.intersection(positions)
+            if not candidates:
+                return []
+        if candidates is None:
+            return list(self.nodes)
+        return [self.nodes[position] for position in sorted(candidates)]
+
+    def find_by_locator(self, locator_type: str, locator_value: str) -> Optional[List[SnapshotNode]]:
+        """Resolve a BasePage-style locator locally.
+
+        Returns None when the locator strategy cannot be answered from the
+        snapshot, so callers can fall back to a server-side lookup.
+        """
+        if locator_type in ('ID', AppiumBy.ID):
+            return self.find(resource_id=locator_value)
+        if locator_type in ('ACCESSIBILITY_ID', AppiumBy.ACCESSIBILITY_ID):
+            return self.find(content_desc=locator_value)
+        if locator_type in ('CLASS_NAME', AppiumBy.CLASS_NAME):
+            return self.find(class_name=locator_value)
+        return None
+
+    def descendants(self, node: SnapshotNode) -> List[SnapshotNode]:
+        """Return the nodes nested inside ``node``, in document order."""
+        position = self.nodes.index(node) + 1
+        children = []
+        while position < len(self.nodes) and self.nodes[position].depth > node.depth:
+            children.append(self.nodes[position])
+            position += 1
+        return children
+
+    def _lookup_resource_id(self, value: str) -> List[int]:
+        if value in self._by_resource_id or ':' in value:
+            return self._by_resource_id.get(value, [])
+        # Appium prefixes bare ids with the app package, e.g. 'left_text' -> '<package>:id/left_text'
+        suffix = f':id/{value}'
+        return [position for key, positions in self._by_resource_id.items()
+                if key.endswith(suffix) for position in positions]
+
+    def _parse(self, source: bytes):
+        depth = 0
+        for event, element in ET.iterparse(io.BytesIO(source), events=('start', 'end')):
+            if event == 'end':
+                element.clear()
+                depth -= 1
+                continue
+            depth += 1
+            if element.tag == 'hierarchy':
+                continue
+            attrib = element.attrib
+            match = _BOUNDS_PATTERN.match(attrib.get('bounds', ''))
+            node = SnapshotNode(
+                class_name=attrib.get('class', element.tag),
+                resource_id=attrib.get('resource-id', ''),
+                text=attrib.get('text', ''),
+                content_desc=attrib.get('content-desc', ''),
+                bounds=tuple(int(value) for value in match.groups()) if match else (0, 0, 0, 0),
+                clickable=attrib.get('clickable') == 'true',
+                scrollable=attrib.get('scrollable') == 'true',
+                displayed=attrib.get('displayed', 'true') == 'true',
+                depth=depth,
+            )
+            position = len(self.nodes)
+            self.nodes.append(node)
+            for index, value in ((self._by_resource_id, node.resource_id), (self._by_text, node.text),
+                                 (self._by_content_desc, node.content_desc), (self._by_class, node.class_name)):
+                if value:
+                    index.setdefault(value, []).append(position)
+
+
+def escape_selector_value(value: str) -> str:
+    """Quote a value for use inside a UiSelector string argument."""
+    return value.replace('\\', '\\\\').replace('"', '\\"')
@@ -0,0 +1,302 @@
+import logging
+import math
+import os
+import statistics
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from tests.mobile.base.page_snapshot import PageSnapshot, SnapshotNode
+
+logger = logging.getLogger(__name__)
+
+# Share of the container one drag moves; the rest overlaps so consecutive frames can be aligned
+SCROLL_DRAG_RATIO = float(os.getenv('SCROLL_DRAG_RATIO', '0.7'))
+# Gestures a single scroll may use before giving up
+SCROLL_MAX_GESTURES = int(os.getenv('SCROLL_MAX_GESTURES', '30'))
+
+# Items are told apart by what identifies them to a user
+ItemKey = Tuple[str, str, str]
+
+
+def item_key(node: SnapshotNode) -> ItemKey:
+    return node.resource_id, node.text, node.content_desc
+
+
+class IndexedItem(NamedTuple):
+    node: SnapshotNode
+    # Distance from the index origin to the item's top edge, in content pixels
+    top: int
+    height: int
+
+
+class Frame(NamedTuple):
+    """The scrollable container and its whole items on one snapshot."""
+    container: SnapshotNode
+    items: List[SnapshotNode]
+
+    @property
+    def height(self) -> int:
+        return self.container.bounds[3] - self.container.bounds[1]
+
+    def offset_in(self, node: SnapshotNode) -> int:
+        return node.bounds[1] - self.container.bounds[1]
+
+
+class ListIndex:
+    """Order and geometry of one scrollable container's items.
+
+    Positions are content pixels from wherever the list was scrolled when
+    indexing began, so items above that point get negative positions. The
+    index grows as frames are merged in and knows the list completely once
+    both ends have been reached.
+    """
+
+    def __init__(self):
+        self.items: Dict[ItemKey, IndexedItem] = {}
+        self.at_start = False
+        self.at_end = False
+        # Pixels a drag falls short of the requested distance (the touch slop)
+        self.drag_loss = 0.0
+
+    @property
+    def complete(self) -> bool:
+        return self.at_start and self.at_end
+
+    def find(self, matches: Callable[[SnapshotNode], bool]) -> Optional[IndexedItem]:
+        """Return the first indexed item, in list order, that ``matches``."""
+        for item in sorted(self.items.values(), key=lambda item: item.top):
+            if matches(item.node):
+                return item
+        return None
+
+    def align(self, frame: Frame) -> Tuple[Optional[int], int]:
+        """Return the frame's scroll offset implied by the items it shares with the index, and how many agree."""
+        implied = [self.items[item_key(node)].top - frame.offset_in(node)
+                   for node in frame.items if item_key(node) in self.items]
+        if not implied:
+            return None, 0
+        offset = int(statistics.median(implied))
+        return offset, sum(abs(value - offset) <= 2 for value in implied)
+
+    def merge(self, frame: Frame, offset: int):
+        unknown = False
+        for node in frame.items:
+            top, bottom = node.bounds[1], node.bounds[3]
+            unknown = unknown or item_key(node) not in self.items
+            self.items[item_key(node)] = IndexedItem(node, offset + frame.offset_in(node), bottom - top)
+        if unknown and self.complete:
+            # Items a complete index never saw: the list changed since it was explored
+            self.at_start = self.at_end = False
+
+
+class ScrollIndexCache:
+    """List indexes per container, shared by every page in the process.
+
+    Screens of one app often reuse a container id (e.g. ``android:id/list``),
+    so a frame is matched to the index that agrees with most of its items.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._indexes: Dict[str, List[ListIndex]] = {}
+
+    def lookup(self, frame: Frame) -> Tuple[ListIndex, int]:
+        """Return the index of the frame's list and the frame's offset in it, starting one if needed."""
+        container = f"{frame.container.class_name}#{frame.container.resource_id}"
+        with self._lock:
+            indexes = self._indexes.setdefault(container, [])
+            best, best_offset, best_score = None, 0, 0
+            for index in indexes:
+                offset, score = index.align(frame)
+                if score > best_score:
+                    best, best_offset, best_score = index, offset, score
+            # One shared title can be a coincidence; most of the visible items cannot
+            if best is not None and best_score * 2 >= len(frame.items):
+                return best, best_offset
+            index = ListIndex()
+            indexes.append(index)
+            return index, 0
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+
+
+scroll_indexes = ScrollIndexCache()
+
+
+class ScrollResult(NamedTuple):
+    target: str
+    found: bool
+    gestures: int
+    lookups: int
+    # Whether the target's position came from the index rather than from exploring
+    indexed: bool
+    elapsed_ms: float
+
+
+class ScrollStats:
+    """Gestures and lookups used by scrolls, per target."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.results: List[list] = []
+
+    def record(self, result: ScrollResult):
+        with self._lock:
+            self.results.append(list(result))
+
+    def as_dict(self) -> Dict[str, List[list]]:
+        with self._lock:
+            return {'results': list(self.results)}
+
+    def merge(self, data: Dict[str, List[list]]):
+        with self._lock:
+            self.results.extend(data.get('results', []))
+
+    def summary(self) -> Dict[str, float]:
+        with self._lock:
+            results = [ScrollResult(*result) for result in self.results]
+        if not results:
+            return {'scrolls': 0}
+        return {
+            'scrolls': len(results),
+            'not_found': sum(not result.found for result in results),
+            'indexed': sum(result.indexed for result in results),
+            'gestures': sum(result.gestures for result in results),
+            'lookups': sum(result.lookups for result in results),
+            'mean_gestures': statistics.mean(result.gestures for result in results),
+            'seconds': sum(result.elapsed_ms for result in results) / 1000,
+        }
+
+
+scroll_stats = ScrollStats()
+
+
+class Scroller:
+    """Scroll a page's list straight to a target using a learned index of its items.
+
+    The first scrolls on a list explore it with overlapping drags, recording
+    each item's position; afterwards the distance to a known item is computed
+    and covered in as few ``mobile: dragGesture`` calls as the drag length
+    allows, and arrival is verified with one snapshot. Drags are measured
+    against the index, so the loss to touch slop is learned and compensated.
+    """
+
+    def __init__(self, page, indexes: ScrollIndexCache = scroll_indexes, stats: ScrollStats = scroll_stats):
+        self.page = page
+        self.indexes = indexes
+        self.stats = stats
+
+    def scroll_to(self, matches: Callable[[SnapshotNode], bool], target: str,
+                  found: Optional[Callable[[Frame], bool]] = None,
+                  container: Optional[str] = None) -> ScrollResult:
+        """Scroll until an item that ``matches`` is whole on screen.
+
+        ``found`` replaces the on-screen check for targets the snapshot cannot
+        identify. The index cannot rule such targets out, so the list is swept
+        end to end even when it is fully indexed. ``container`` picks the
+        scrollable view by resource id when a screen has several.
+        """
+        start = time.perf_counter()
+        searching = found is not None
+        found = found or (lambda frame: any(matches(node) for node in frame.items))
+        gestures = lookups = 0
+        indexed = False
+        # List ends this scroll ran into
+        reached_start = reached_end = False
+
+        def result(success: bool) -> ScrollResult:
+            scroll = ScrollResult(target, success, gestures, lookups, indexed, (time.perf_counter() - start) * 1000)
+            self.stats.record(scroll)
+            logger.info("Scroll to %s: %s after %s gestures, %s lookups (%.0fms, %s)",
+                        target, 'found' if success else 'not found', gestures, lookups, scroll.elapsed_ms,
+                        'indexed' if indexed else 'explored')
+            return scroll
+
+        lookups += self.page._snapshot is None
+        frame = self._frame(self.page.snapshot(), container)
+        if found(frame):
+            return result(True)
+        index, offset = self.indexes.lookup(frame)
+        index.merge(frame, offset)
+        page = int(frame.height * SCROLL_DRAG_RATIO)
+
+        while gestures < SCROLL_MAX_GESTURES:
+            item = index.find(matches)
+            if item is not None:
+                indexed = True
+                # Bring the item to the middle of the container
+                distance = item.top + item.height // 2 - (offset + frame.height // 2)
+            elif searching:
+                if reached_start and reached_end:
+                    return result(False)
+                distance = page if not reached_end else -page
+            elif index.complete:
+                return result(False)
+            else:
+                distance = page if not index.at_end else -page
+            if distance == 0:
+                # Indexed at the middle of the screen yet not there; the list changed
+                del index.items[item_key(item.node)]
+                continue
+            count = self._drag(frame, distance, index.drag_loss)
+            gestures += count
+
+            lookups += 1
+            frame = self._frame(self.page.snapshot(), container)
+            moved_to, agreeing = index.align(frame)
+            if moved_to is None or agreeing == 0:
+                # Nothing known is on screen any more; assume the drag went as asked
+                moved_to = offset + distance
+            moved = moved_to - offset
+            if abs(moved) <= 2:
+                if distance > 0:
+                    index.at_end = reached_end = True
+                else:
+                    index.at_start = reached_start = True
+            elif item is not None and 0 < moved / distance <= 1:
+                # Short of the request by the slop on every drag, unless the list end stopped it
+                shortfall = (abs(distance) - abs(moved)) / count
+                if shortfall < frame.height * 0.1:
+                    index.drag_loss = (index.drag_loss + shortfall) / 2
+            offset = moved_to
+            index.merge(frame, offset)
+            if found(frame):
+                return result(True)
+            if item is not None and abs(moved) <= 2:
+                # The indexed position is out of date; explore from here
+                del index.items[item_key(item.node)]
+        return result(False)
+
+    def _frame(self, snapshot: PageSnapshot, container: Optional[str]) -> Frame:
+        scrollables = [node for node in snapshot.find(resource_id=container) if node.scrollable] if container \
+            else [node for node in snapshot.nodes if node.scrollable]
+        if not scrollables:
+            raise ValueError(f"No scrollable container{f' {container}' if container else ''} on screen")
+        node = max(scrollables, key=lambda n: (n.bounds[2] - n.bounds[0]) * (n.bounds[3] - n.bounds[1]))
+        left, top, right, bottom = node.bounds
+        labelled = [child for child in snapshot.descendants(node) if child.text or child.content_desc]
+        # Views cut off by the container edges report clipped bounds; only whole ones have true positions
+        inside = [child for child in labelled if child.bounds[1] > top and child.bounds[3] < bottom]
+        full_height = max((child.bounds[3] - child.bounds[1] for child in inside), default=0)
+        items = [child for child in labelled
+                 if child in inside or (full_height and child.bounds[3] - child.bounds[1] >= full_height)]
+        return Frame(node, items)
+
+    def _drag(self, frame: Frame, distance: int, loss: float) -> int:
+        """Move the content by ``distance`` pixels (positive reveals later items); return the gestures used."""
+        left, top, right, bottom = frame.container.bounds
+        x, y = (left + right) // 2, (top + bottom) // 2
+        longest = int(frame.height * SCROLL_DRAG_RATIO)
+        count = max(1, math.ceil(abs(distance) / longest))
+        step = distance / count
+        for _ in range(count):
+            length = min(abs(step) + loss, frame.height * 0.9)
+            half = int(math.copysign(length / 2, step))
+            self.page.driver.execute_script('mobile: dragGesture', {
+                'startX': x, 'startY': y + half, 'endX': x, 'endY': y - half,
+            })
+        self.page._ui_changed()
+        return count
@@ -0,0 +1,91 @@
+import logging
+import os
+import weakref
+from typing import Any, Dict, Mapping, Optional, Union
+
+from appium.webdriver.webdriver import WebDriver
+
+logger = logging.getLogger(__name__)
+
+# Apply the UiAutomator2 settings profile page objects declare; false leaves the session's settings alone
+APPLY_SETTINGS_PROFILES = os.getenv('APPLY_SETTINGS_PROFILES', 'true').lower() == 'true'
+
+# Named UiAutomator2 settings profiles page objects pick from with SETTINGS_PROFILE
+SETTINGS_PROFILES: Dict[str, Dict[str, Any]] = {
+    # UiAutomator2's own defaults: every view in the dump, up to 10s waiting for the screen to go idle
+    'default': {
+        'ignoreUnimportantViews': False,
+        'waitForIdleTimeout': 10000,
+        'allowInvisibleElements': False,
+    },
+    # Compressed hierarchy (views unimportant for accessibility left out) and a short idle wait,
+    # for screens whose elements are all found by id, description or text
+    'fast': {
+        'ignoreUnimportantViews': True,
+        'waitForIdleTimeout': 25,
+        'allowInvisibleElements': False,
+    },
+}
+
+# Settings each driver's session is known to have: (session id, settings)
+_active = weakref.WeakKeyDictionary()
+# Settings each driver's session had before any profile was applied: (session id, settings)
+_initial = weakref.WeakKeyDictionary()
+
+
+def profile_settings(profile: Union[str, Mapping[str, Any]]) -> Dict[str, Any]:
+    """The settings of a profile, given by name or as a settings mapping."""
+    if isinstance(profile, str):
+        if profile not in SETTINGS_PROFILES:
+            raise ValueError(f"Unknown settings profile {profile!r}, expected one of {tuple(SETTINGS_PROFILES)}")
+        return SETTINGS_PROFILES[profile]
+    return dict(profile)
+
+
+def active_settings(driver: WebDriver) -> Dict[str, Any]:
+    """The session's current settings, read from the server once per session."""
+    session_id, settings = _active.get(driver, (None, None))
+    if session_id != driver.session_id:
+        # New driver, or a session replaced by the healer with its settings back at their defaults
+        settings = driver.get_settings()
+        _active[driver] = (driver.session_id, settings)
+        _initial[driver] = (driver.session_id, dict(settings))
+    return settings
+
+
+def apply_profile(driver: WebDriver, profile: Optional[Union[str, Mapping[str, Any]]]) -> Dict[str, Any]:
+    """Bring the session's settings in line with ``profile``; return the settings that had to change.
+
+    Nothing is sent when the session already has them.
+    """
+    if profile is None or not APPLY_SETTINGS_PROFILES:
+        return {}
+    changes = _update(driver, profile_settings(profile))
+    if changes:
+        logger.info("Applied settings profile %s: %s", profile if isinstance(profile, str) else 'custom', changes)
+    return changes
+
+
+def restore_settings(driver: WebDriver) -> Dict[str, Any]:
+    """Put back the settings the session had before profiles were applied; return the settings that changed.
+
+    Used when a pooled session is handed back, so the next test does not inherit the last page's profile.
+    """
+    session_id, initial = _initial.get(driver, (None, None))
+    if session_id is None or session_id != driver.session_id:
+        # No profile was applied, or the session was replaced and starts from its defaults anyway
+        return {}
+    changes = _update(driver, initial)
+    if changes:
+        logger.info("Restored session settings: %s", changes)
+    return changes
+
+
+def _update(driver: WebDriver, wanted: Mapping[str, Any]) -> Dict[str, Any]:
+    """Send the settings of ``wanted`` the session does not have yet."""
+    settings = active_settings(driver)
+    changes = {key: value for key, value in wanted.items() if settings.get(key) != value}
+    if changes:
+        driver.update_settings(changes)
+        settings.update(changes)
+    return changes
@@ -1,31 +1,28 @@
 import pytest
 import logging
-from appium import webdriver
 from appium.options.android import UiAutomator2Options
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-@pytest.fixture
-def appium_driver(request):
-    """Create and configure the Appium driver."""
-    logger.info("Setting up Appium driver")
-    
+@pytest.fixture(scope="session")
+def appium_options():
+    """Configure the capabilities for sessions created by the driver pool."""
     # App configuration
     app_path = "./ApiDemos-debug.apk"
     device_name = "Pixel_7_API_35"
     platform_version = "15.0"
     app_package = "io.appium.android.apis"
     app_activity = ".ApiDemos"
-    
+
     # Log the configuration
-    logger.info(f"App path: {app_path}")
-    logger.info(f"Device name: {device_name}")
-    logger.info(f"Platform version: {platform_version}")
-    logger.info(f"App package: {app_package}")
-    logger.info(f"App activity: {app_activity}")
-    
+    logger.info("App path: %s", app_path)
+    logger.info("Device name: %s", device_name)
+    logger.info("Platform version: %s", platform_version)
+    logger.info("App package: %s", app_package)
+    logger.info("App activity: %s", app_activity)
+
     # Set up UiAutomator2 options with increased timeouts
     options = UiAutomator2Options()
     options.automation_name = "UiAutomator2"
@@ -39,7 +36,7 @@ def appium_driver(request):
     options.auto_grant_permissions = True
     options.new_command_timeout = 300
     options.system_port = 8201
-    
+
     # Additional settings for stability
     options.set_capability('uiautomator2ServerLaunchTimeout', 60000)  # 60 seconds
     options.set_capability('uiautomator2ServerInstallTimeout', 60000)  # 60 seconds
@@ -49,26 +46,5 @@ def appium_driver(request):
     options.set_capability('autoGrantPermissions', True)
     options.set_capability('skipServerInstallation', False)
     options.set_capability('skipDeviceInitialization', False)
-    
-    # Log the capabilities
-    logger.info("Appium capabilities:")
-    for key, value in options.capabilities.items():
-        logger.info(f"  {key}: {value}")
-    
-    # Create the driver
-    logger.info("Creating Appium driver")
-    try:
-        driver = webdriver.Remote('http://127.0.0.1:4723', options=options)
-        logger.info("Appium driver created successfully")
-        
-        def fin():
-            logger.info("Cleaning up Appium driver")
-            if driver:
-                driver.quit()
-            logger.info("Appium driver cleanup completed")
-        
-        request.addfinalizer(fin)
-        return driver
-    except Exception as e:
-        logger.error(f"Failed to create Appium driver: {str(e)}")
-        raise 
\ No newline at end of file
+
+    return options
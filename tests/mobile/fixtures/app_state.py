@@ -0,0 +1,94 @@
+import logging
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import pytest
+
+from tests.mobile.utils.navigation import Navigator, tap_path
+from tests.mobile.fixtures.driver_pool import RESET_STRATEGIES
+
+logger = logging.getLogger(__name__)
+
+next_item_key = pytest.StashKey[Optional[pytest.Item]]()
+
+
+class AppState(NamedTuple):
+    """Screen a test starts on, and how to get there from a fresh launch."""
+    name: str
+    path: Tuple = ()
+    reset: Optional[str] = None
+    page: Optional[type] = None
+
+
+class SchedulerStats:
+    """What running same-state tests back to back saved."""
+
+    def __init__(self):
+        self.groups = 0
+        self.restarts_saved = 0
+        self.navigation_steps_saved = 0
+        self.navigations = 0
+        self.navigation_steps = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return dict(vars(self))
+
+    def merge(self, data: Dict[str, int]):
+        for key, value in data.items():
+            if key == 'groups':
+                # Every worker collects the whole suite
+                self.groups = max(self.groups, value)
+            else:
+                setattr(self, key, getattr(self, key) + value)
+
+
+scheduler_stats = SchedulerStats()
+
+
+def app_state_of(item: Optional[pytest.Item]) -> Optional[AppState]:
+    """Read a test's ``app_state`` marker.
+
+    ``@pytest.mark.app_state("main")`` names the state directly, with optional
+    ``path`` (accessibility ids tapped from launch) and ``reset``;
+    ``@pytest.mark.app_state(page=ApiDemosPage)`` takes them from the page
+    object's ``APP_STATE``, ``NAVIGATION`` and ``RESET`` attributes.
+    """
+    marker = item.get_closest_marker('app_state') if item is not None else None
+    if marker is None:
+        return None
+    page = marker.kwargs.get('page')
+    name = marker.args[0] if marker.args else getattr(page, 'APP_STATE', None)
+    if name is None:
+        raise pytest.UsageError(f"{item.nodeid}: app_state needs a state name or a page with APP_STATE")
+    path = tuple(marker.kwargs.get('path', getattr(page, 'NAVIGATION', ())))
+    reset = marker.kwargs.get('reset', getattr(page, 'RESET', None))
+    if reset is not None and reset not in RESET_STRATEGIES:
+        raise pytest.UsageError(f"{item.nodeid}: unknown reset {reset!r}, expected one of {RESET_STRATEGIES}")
+    return AppState(name, path, reset, page)
+
+
+def navigate(driver, state: AppState):
+    """Bring a freshly reset app to ``state``."""
+    if not state.path:
+        return
+    if getattr(state.page, 'ACTIVITY', None):
+        # The navigator launches the page's activity directly when it can
+        logger.info("Opening app state %s with the navigator", state.name)
+        Navigator(driver).open(state.page)
+        scheduler_stats.navigations += 1
+        return
+    logger.info("Navigating to app state %s: %s taps", state.name, len(state.path))
+    tap_path(driver, state.path)
+    scheduler_stats.navigations += 1
+    scheduler_stats.navigation_steps += len(state.path)
+
+
+def next_state_of(item: pytest.Item) -> Optional[AppState]:
+    """State of the test this worker runs after ``item``."""
+    return app_state_of(item.stash.get(next_item_key, None))
+
+
+def record_reuse(state: AppState, skipped_reset: str):
+    """Count the reset and navigation skipped between two tests sharing ``state``."""
+    if skipped_reset != 'none':
+        scheduler_stats.restarts_saved += 1
+    scheduler_stats.navigation_steps_saved += len(state.path)
@@ -0,0 +1,64 @@
+from typing import Dict
+
+import pytest
+
+from tests.mobile.fixtures.app_state import app_state_of, next_item_key, scheduler_stats
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "app_state(name=None, path=(), reset=None, page=None): screen the test starts on and leaves the app "
+        "on; tests sharing a state are run back to back without resetting the app in between",
+    )
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_collection_modifyitems(session, config, items):
+    """Run tests that share an app state back to back, and on the same xdist worker."""
+    groups: Dict[str, list] = {}
+    for item in items:
+        state = app_state_of(item)
+        name = state.name if state else None
+        if state is not None:
+            # Honoured with --dist loadgroup; must be added before xdist reads it
+            item.add_marker(pytest.mark.xdist_group(name=f"app_state:{name}"))
+        # Unmarked tests keep their own position
+        groups.setdefault(name if state else f"unmarked:{item.nodeid}", []).append(item)
+    items[:] = [item for group in groups.values() for item in group]
+    scheduler_stats.groups = sum(1 for key in groups if not key.startswith('unmarked:'))
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item, nextitem):
+    """Let the driver fixture see which test comes next on this worker."""
+    item.stash[next_item_key] = nextitem
+    yield
+
+
+def pytest_sessionfinish(session):
+    """Hand this worker's scheduling counters to the xdist controller."""
+    if hasattr(session.config, 'workeroutput'):
+        session.config.workeroutput['app_state'] = scheduler_stats.as_dict()
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    """Merge scheduling counters from an xdist worker."""
+    data = getattr(node, 'workeroutput', {}).get('app_state')
+    if data:
+        scheduler_stats.merge(data)
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    """Report the restarts and navigation the state-affinity ordering saved."""
+    stats = scheduler_stats
+    if not stats.groups:
+        return
+    terminalreporter.write_sep("=", "App state scheduling")
+    terminalreporter.write_line(f"state groups: {stats.groups}")
+    terminalreporter.write_line(f"app restarts saved: {stats.restarts_saved}")
+    terminalreporter.write_line(
+        f"navigation steps saved: {stats.navigation_steps_saved} "
+        f"(performed: {stats.navigation_steps} over {stats.navigations} navigations)"
+    )
@@ -2,100 +2,155 @@ import asyncio
 import pytest
 import logging
 from appium.webdriver.webdriver import WebDriver
-from appium.options.android import UiAutomator2Options
-from appium.webdriver.common.mobileby import MobileBy
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
-from typing import AsyncGenerator
+from appium.webdriver.common.appiumby import AppiumBy
+from selenium.common.exceptions import (
+    NoSuchElementException,
+    StaleElementReferenceException,
+    TimeoutException,
+    WebDriverException,
+)
+from typing import Dict, Generator
+
+from tests.mobile.base.form_filler import is_unsupported
+from tests.mobile.utils.async_appium_client import AsyncAppiumClient, AsyncElement, AsyncSession, wait_until
+from tests.mobile.utils.retry import RETRY_ATTEMPTS
+from tests.mobile.utils.waits import describe_locator
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class AppiumHelper:
-    def __init__(self, driver: WebDriver):
+    """Async helpers driving the same session as a sync driver.
+
+    Commands go through a non-blocking client attached to ``driver``'s session,
+    so sync page objects and these helpers can be mixed in one test while
+    several helpers (one per device) run concurrently on one event loop.
+    """
+
+    def __init__(self, driver: WebDriver, client: AsyncAppiumClient = None):
         self.driver = driver
-        self.wait = WebDriverWait(self.driver, 10)
+        self.client = client or AsyncAppiumClient.for_driver(driver)
+        self._session = self.client.attach(driver.session_id)
         self.logger = logging.getLogger(__name__)
-    
+
+    @property
+    def session(self) -> AsyncSession:
+        """The driver's current session; follows it when the retry layer replaced the session."""
+        if self._session.session_id != self.driver.session_id:
+            self._session = self.client.attach(self.driver.session_id)
+        return self._session
+
     async def find_and_click(self, locator: tuple, timeout: int = 10) -> None:
         """Find element and click with explicit wait."""
         try:
-            self.logger.info(f"Finding and clicking element: {locator}")
-            element = self.wait.until(EC.element_to_be_clickable(locator))
-            element.click()
-            self.logger.info(f"Successfully clicked element: {locator}")
+            self.logger.info("Finding and clicking element: %s", locator)
+            for attempt in range(RETRY_ATTEMPTS + 1):
+                element = await self._wait_for_clickable(locator, timeout)
+                try:
+                    await element.click()
+                    break
+                except StaleElementReferenceException:
+                    if attempt == RETRY_ATTEMPTS:
+                        raise
+                    self.logger.warning("Element went stale before the click, looking it up again: %s", locator)
+            self.logger.info("Successfully clicked element: %s", locator)
         except TimeoutException as e:
-            self.logger.error(f"Timeout waiting for element: {locator}")
+            self.logger.error("Timeout waiting for element: %s", locator)
             raise TimeoutException(f"Element not clickable: {locator}") from e
-        
+
     async def find_and_send_keys(self, locator: tuple, text: str, timeout: int = 10) -> None:
         """Find element and send keys with explicit wait."""
         try:
-            self.logger.info(f"Finding element to send keys: {locator}")
-            element = self.wait.until(EC.presence_of_element_located(locator))
-            element.clear()  # Clear existing text
-            element.send_keys(text)
-            self.logger.info(f"Successfully sent keys to element: {locator}")
+            self.logger.info("Finding element to send keys: %s", locator)
+            element = await self.session.wait_for_element(*locator, timeout=timeout)
+            await element.clear()  # Clear existing text
+            await element.send_keys(text)
+            self.logger.info("Successfully sent keys to element: %s", locator)
         except TimeoutException as e:
-            self.logger.error(f"Timeout waiting for element: {locator}")
+            self.logger.error("Timeout waiting for element: %s", locator)
             raise TimeoutException(f"Element not found: {locator}") from e
-    
+
+    async def fill_form(self, fields: Dict[tuple, str], verify: bool = False, timeout: int = 10) -> Dict[tuple, str]:
+        """Set several text fields at once; return the fields whose read-back text differs when verifying."""
+        self.logger.info("Filling %s fields", len(fields))
+        # Lookups go out concurrently instead of one round trip after another
+        elements = await asyncio.gather(*(self.session.wait_for_element(*locator, timeout=timeout)
+                                          for locator in fields))
+        typed = False
+        for element, text in zip(elements, fields.values()):
+            if not typed:
+                try:
+                    await self.session.execute_script('mobile: replaceElementValue',
+                                                      {'elementId': element.id, 'text': text})
+                    continue
+                except WebDriverException as e:
+                    if not is_unsupported(e):
+                        raise
+                    typed = True
+            await element.clear()
+            await element.send_keys(text)
+        if typed:
+            try:
+                await self.session.execute_script('mobile: hideKeyboard', {})
+            except WebDriverException as e:
+                self.logger.info("Keyboard not hidden: %s", e.msg)
+        if not verify:
+            return {}
+        texts = await asyncio.gather(*(element.text() for element in elements))
+        return {locator: actual for (locator, text), actual in zip(fields.items(), texts) if actual != text}
+
     async def wait_for_text(self, text: str, timeout: int = 10) -> None:
         """Wait for text to be present on the page."""
         try:
-            self.logger.info(f"Waiting for text: {text}")
-            self.wait.until(
-                EC.presence_of_element_located(
-                    (MobileBy.ANDROID_UIAUTOMATOR, f'new UiSelector().text("{text}")')
-                )
+            self.logger.info("Waiting for text: %s", text)
+            await self.session.wait_for_element(
+                AppiumBy.ANDROID_UIAUTOMATOR, f'new UiSelector().text("{text}")', timeout=timeout
             )
-            self.logger.info(f"Successfully found text: {text}")
+            self.logger.info("Successfully found text: %s", text)
         except TimeoutException as e:
-            self.logger.error(f"Timeout waiting for text: {text}")
+            self.logger.error("Timeout waiting for text: %s", text)
             raise TimeoutException(f"Text not found: {text}") from e
-    
-    async def scroll_to_text(self, text: str) -> None:
+
+    async def scroll_to_text(self, text: str, timeout: int = 10) -> None:
         """Scroll to element with specific text."""
         try:
-            self.logger.info(f"Scrolling to text: {text}")
-            selector = (
-                MobileBy.ANDROID_UIAUTOMATOR,
+            self.logger.info("Scrolling to text: %s", text)
+            element = await self.session.wait_for_element(
+                AppiumBy.ANDROID_UIAUTOMATOR,
                 f'new UiScrollable(new UiSelector().scrollable(true)).scrollIntoView('
-                f'new UiSelector().text("{text}"))'
+                f'new UiSelector().text("{text}"))',
+                timeout=timeout,
             )
-            element = self.wait.until(EC.presence_of_element_located(selector))
-            element.click()
-            self.logger.info(f"Successfully scrolled to and clicked text: {text}")
+            await element.click()
+            self.logger.info("Successfully scrolled to and clicked text: %s", text)
         except TimeoutException as e:
-            self.logger.error(f"Timeout scrolling to text: {text}")
+            self.logger.error("Timeout scrolling to text: %s", text)
             raise TimeoutException(f"Text not found after scrolling: {text}") from e
 
-def create_driver() -> WebDriver:
-    """Create and return an Appium driver with proper capabilities."""
-    options = UiAutomator2Options()
-    options.platform_name = 'Android'
-    options.automation_name = 'UiAutomator2'
-    options.device_name = 'Pixel_7_API_35'
-    options.app = './ApiDemos-debug.apk'
-    options.auto_grant_permissions = True
-    
-    return WebDriver(
-        command_executor='http://localhost:4723/wd/hub',
-        options=options
-    )
+    async def close(self) -> None:
+        """Close the helper's HTTP connections; the session itself stays with the driver."""
+        await self.client.close()
+
+    async def _wait_for_clickable(self, locator: tuple, timeout: int) -> AsyncElement:
+        async def clickable():
+            try:
+                element = await self.session.find_element(*locator)
+                if await element.is_displayed() and await element.is_enabled():
+                    return element
+            except (NoSuchElementException, StaleElementReferenceException):
+                # Not there yet; session-level errors are left to propagate
+                pass
+            return None
+        return await wait_until(clickable, timeout, message=f"Element not clickable: {locator}",
+                                locator=describe_locator(*locator))
 
 @pytest.fixture
-async def appium_helper() -> AsyncGenerator[AppiumHelper, None]:
-    """Fixture to provide AppiumHelper instance with driver setup and teardown."""
-    logger.info("Setting up Appium driver")
-    driver = create_driver()  # This is now synchronous
-    helper = AppiumHelper(driver)
-    
+def appium_helper(appium_driver, event_loop) -> Generator[AppiumHelper, None, None]:
+    """Fixture to provide an AppiumHelper on the pooled driver's session."""
+    helper = AppiumHelper(appium_driver)
     try:
         yield helper
     finally:
-        logger.info("Tearing down Appium driver")
-        if driver:
-            driver.quit() 
\ No newline at end of file
+        logger.info("Closing Appium helper connections")
+        event_loop.run_until_complete(helper.close())
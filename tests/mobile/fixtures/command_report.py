@@ -0,0 +1,71 @@
+import os
+
+import pytest
+
+from tests.mobile.utils.command_profiler import PROFILE_COMMANDS, command_profiler
+
+PROFILE_OUTPUT = os.getenv('PROFILE_OUTPUT', './results/command_profile.json')
+
+# Number of commands and tests listed in the terminal summary
+SLOWEST = 10
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item, nextitem):
+    """Attribute commands, including fixture setup and teardown, to the running test."""
+    command_profiler.current_test = item.nodeid
+    yield
+    command_profiler.current_test = None
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_sessionfinish(session):
+    """Ship records to the xdist controller, or write the JSON artifact."""
+    if not PROFILE_COMMANDS:
+        return
+    if hasattr(session.config, 'workeroutput'):
+        session.config.workeroutput['command_records'] = command_profiler.records
+    else:
+        command_profiler.write_json(PROFILE_OUTPUT)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    """Merge command records from an xdist worker."""
+    records = getattr(node, 'workeroutput', {}).get('command_records')
+    if records:
+        command_profiler.merge(records)
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    """Summarise round trips and the slowest commands and tests."""
+    if not PROFILE_COMMANDS or not command_profiler.records:
+        return
+    summary = command_profiler.summary()
+    terminalreporter.write_sep("=", "Appium commands")
+    terminalreporter.write_line(
+        f"{summary['round_trips']} round trips, {summary['failures']} failed, "
+        f"{summary['retries']} retried; profile written to {PROFILE_OUTPUT}"
+    )
+
+    terminalreporter.write_line("")
+    terminalreporter.write_line(f"{'count':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'total':>8}  command")
+    commands = sorted(summary['commands'].items(), key=lambda item: item[1]['total'], reverse=True)
+    for name, stats in commands[:SLOWEST]:
+        terminalreporter.write_line(
+            f"{stats['count']:6d} {stats['p50'] * 1000:6.0f}ms {stats['p95'] * 1000:6.0f}ms "
+            f"{stats['p99'] * 1000:6.0f}ms {stats['total']:7.2f}s  {name}"
+        )
+
+    terminalreporter.write_line("")
+    terminalreporter.write_line(f"{'trips':>6} {'p95':>8} {'total':>8}  test")
+    tests = sorted(summary['tests'].items(), key=lambda item: item[1]['total'], reverse=True)
+    for name, stats in tests[:SLOWEST]:
+        terminalreporter.write_line(
+            f"{stats['count']:6d} {stats['p95'] * 1000:6.0f}ms {stats['total']:7.2f}s  {name}"
+        )
+
+    terminalreporter.write_line("")
+    terminalreporter.write_line("slowest single commands:")
+    for test, _session, command, locator, seconds, *_rest in command_profiler.slowest_commands(SLOWEST):
+        terminalreporter.write_line(f"{seconds * 1000:8.0f}ms  {command} {locator or ''}  ({test})")
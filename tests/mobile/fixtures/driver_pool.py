@@ -0,0 +1,196 @@
+import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from appium.webdriver.webdriver import WebDriver
+
+from tests.mobile.base.settings_profile import restore_settings
+from tests.mobile.utils.logcat import collector_of
+from tests.mobile.utils.perf_sampler import sampler_of
+from tests.mobile.utils.retry import healer_of
+
+logger = logging.getLogger(__name__)
+
+# How the app is brought back to a clean state between tests on a reused session
+RESET_STRATEGIES = ('none', 'restart', 'clear', 'session')
+
+
+class PoolStats:
+    """Counters describing how the pool served sessions."""
+
+    def __init__(self):
+        self.sessions_created = 0
+        self.sessions_reused = 0
+        self.sessions_replaced = 0
+        self.prewarmed = 0
+        self.creation_seconds = 0.0
+        self.reset_seconds = 0.0
+
+    @property
+    def average_creation_seconds(self) -> float:
+        if not self.sessions_created:
+            return 0.0
+        return self.creation_seconds / self.sessions_created
+
+    @property
+    def seconds_saved(self) -> float:
+        """Estimated setup time saved by reusing sessions instead of creating new ones."""
+        average_reset = self.reset_seconds / self.sessions_reused if self.sessions_reused else 0.0
+        return max(0.0, self.sessions_reused * (self.average_creation_seconds - average_reset))
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            'sessions_created': self.sessions_created,
+            'sessions_reused': self.sessions_reused,
+            'sessions_replaced': self.sessions_replaced,
+            'prewarmed': self.prewarmed,
+            'creation_seconds': self.creation_seconds,
+            'reset_seconds': self.reset_seconds,
+        }
+
+    def merge(self, data: Dict[str, float]):
+        """Add counters reported by another pool (e.g. an xdist worker)."""
+        for key, value in data.items():
+            setattr(self, key, getattr(self, key) + value)
+
+
+class DriverPool:
+    """Keep a live Appium session per worker and hand it out to consecutive tests.
+
+    Between tests the session's settings are restored and the app is reset
+    according to ``reset_strategy`` instead of tearing the whole session down:
+
+    - ``none``: leave the app as the previous test left it
+    - ``restart``: terminate and re-activate the app
+    - ``clear``: clear app data (``pm clear``) and re-activate the app
+    - ``session``: quit and create a fresh session (the old per-test behaviour)
+
+    Sessions are health-checked before being handed out; dead ones are replaced
+    transparently, and replacements are created in the background while the
+    previous test is still tearing down whenever possible.
+    """
+
+    def __init__(self, factory: Callable[[], WebDriver], app_package: Optional[str] = None,
+                 reset_strategy: str = 'restart', prewarm: bool = True):
+        if reset_strategy not in RESET_STRATEGIES:
+            raise ValueError(f"Unknown reset strategy {reset_strategy!r}, expected one of {RESET_STRATEGIES}")
+        self.factory = factory
+        self.app_package = app_package
+        self.reset_strategy = reset_strategy
+        self.prewarm = prewarm
+        self.stats = PoolStats()
+        self._idle: Optional[WebDriver] = None
+        # App state (see the app_state marker) the idle session was left in, if known
+        self.state: Optional[str] = None
+        self._warming: Optional[Future] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='appium-prewarm')
+
+    def acquire(self) -> WebDriver:
+        """Return a live session, reusing the idle one when it is still healthy."""
+        driver, self._idle = self._idle, None
+        if driver is not None:
+            if self.is_healthy(driver):
+                self.stats.sessions_reused += 1
+                logger.info("Reusing Appium session %s", driver.session_id)
+                return driver
+            logger.warning("Appium session %s is no longer healthy, replacing it", driver.session_id)
+            self.state = None
+            self.stats.sessions_replaced += 1
+            self._quit(driver)
+
+        if self._warming is not None:
+            warming, self._warming = self._warming, None
+            try:
+                driver = warming.result()
+                self.stats.prewarmed += 1
+                logger.info("Using pre-warmed Appium session %s", driver.session_id)
+                return driver
+            except Exception as e:
+                logger.warning("Pre-warmed session failed to start, creating one now: %s", e)
+        return self._create()
+
+    def release(self, driver: WebDriver, reset: Optional[str] = None, state: Optional[str] = None):
+        """Take a session back after a test and prepare it for the next one.
+
+        ``state`` records the app state a session released with ``reset='none'`` is left in.
+        """
+        strategy = reset or self.reset_strategy
+        self.state = state if strategy == 'none' else None
+        if strategy == 'session':
+            self._discard(driver)
+            return
+        start = time.perf_counter()
+        try:
+            # Settings profiles applied by the test's pages would otherwise carry over to the next test
+            restore_settings(driver)
+            self.reset_app(driver, strategy)
+        except Exception as e:
+            logger.warning("Resetting app failed, discarding session %s: %s", driver.session_id, e)
+            self.state = None
+            self.stats.sessions_replaced += 1
+            self._discard(driver)
+            return
+        self.stats.reset_seconds += time.perf_counter() - start
+        self._idle = driver
+
+    def reset_app(self, driver: WebDriver, strategy: str):
+        """Bring the app under test back to its launch state."""
+        if strategy == 'none' or not self.app_package:
+            return
+        if strategy == 'clear':
+            driver.execute_script('mobile: clearApp', {'appId': self.app_package})
+        else:
+            driver.terminate_app(self.app_package)
+        driver.activate_app(self.app_package)
+
+    def is_healthy(self, driver: WebDriver) -> bool:
+        """Check the session still answers commands."""
+        if not driver.session_id:
+            return False
+        try:
+            driver.current_package
+            return True
+        except Exception:
+            return False
+
+    def shutdown(self):
+        """Quit every session owned by the pool."""
+        if self._warming is not None:
+            try:
+                self._quit(self._warming.result())
+            except Exception as e:
+                logger.warning("Pre-warmed session failed to start: %s", e)
+            self._warming = None
+        if self._idle is not None:
+            self._quit(self._idle)
+            self._idle = None
+        self._executor.shutdown(wait=True)
+
+    def _discard(self, driver: WebDriver):
+        self._quit(driver)
+        if self.prewarm:
+            self._warming = self._executor.submit(self._create)
+
+    def _create(self) -> WebDriver:
+        start = time.perf_counter()
+        driver = self.factory()
+        self.stats.creation_seconds += time.perf_counter() - start
+        self.stats.sessions_created += 1
+        logger.info("Created Appium session %s", driver.session_id)
+        return driver
+
+    def _quit(self, driver: WebDriver):
+        healer = healer_of(driver)
+        if healer is not None:
+            # A session on its way out is not worth re-creating
+            healer.attempts = 0
+        for background in (collector_of(driver), sampler_of(driver)):
+            if background is not None:
+                background.stop()
+        try:
+            if self.app_package:
+                driver.terminate_app(self.app_package)
+            driver.quit()
+        except Exception as e:
+            logger.error("Error during driver cleanup: %s", e)
@@ -0,0 +1,105 @@
+import os
+from typing import Dict, List
+
+import pytest
+from xdist.scheduler import LoadGroupScheduling
+
+from tests.mobile.utils.timing_db import lpt_assign, timing_db
+
+# Order xdist work (--dist loadgroup) by past durations; false keeps xdist's own order
+DURATION_SCHEDULING = os.getenv('DURATION_SCHEDULING', 'true').lower() == 'true'
+
+
+class RunDurations:
+    """Durations of this run's tests and the busy time of every worker."""
+
+    def __init__(self):
+        self.tests: Dict[str, float] = {}
+        self.workers: Dict[str, float] = {}
+        # Worker loads the scheduler expected, longest first; empty without the duration scheduler
+        self.predicted: List[float] = []
+
+    def add(self, nodeid: str, worker: str, duration: float):
+        self.tests[nodeid] = self.tests.get(nodeid, 0.0) + duration
+        self.workers[worker] = self.workers.get(worker, 0.0) + duration
+
+
+run_durations = RunDurations()
+
+
+class DurationScheduling(LoadGroupScheduling):
+    """Hand out the longest remaining work unit to whichever worker runs dry first.
+
+    This is longest-processing-time-first list scheduling, with each test's
+    duration taken from the timing DB. Tests sharing an ``xdist_group`` (and so
+    an app state) stay one unit; every other test is its own. A worker gets its
+    next unit only when it is down to its last test, so long units do not queue
+    up behind each other on one worker while another idles.
+    """
+
+    def __init__(self, config: pytest.Config, log=None):
+        super().__init__(config, log)
+        self.unit_durations: Dict[str, float] = {}
+
+    def schedule(self):
+        if self.collection is None and self.registered_collections:
+            collection = next(iter(self.registered_collections.values()))
+            estimates = timing_db.estimates(collection)
+            for nodeid in collection:
+                scope = self._split_scope(nodeid)
+                self.unit_durations[scope] = self.unit_durations.get(scope, 0.0) + estimates[nodeid]
+            predicted, _ = lpt_assign(self.unit_durations, len(self.nodes))
+            run_durations.predicted = sorted(predicted, reverse=True)
+        super().schedule()
+
+    def _assign_work_unit(self, node):
+        longest = max(self.workqueue, key=lambda scope: self.unit_durations.get(scope, 0.0))
+        self.workqueue.move_to_end(longest, last=False)
+        super()._assign_work_unit(node)
+
+    def _reschedule(self, node):
+        # A worker holds its last test back until the next one arrives, so one pending test means it is nearly idle
+        if self.workqueue and not node.shutting_down and self._pending_of(self.assigned_work[node]) > 1:
+            return
+        super()._reschedule(node)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_xdist_make_scheduler(config, log):
+    """Balance xdist workers by past test durations.
+
+    Only under ``--dist loadgroup``: plain ``load`` carries no groups, and splitting
+    an app-state group across workers would undo its shared navigation.
+    """
+    if DURATION_SCHEDULING and timing_db.enabled and config.getvalue('dist') == 'loadgroup':
+        return DurationScheduling(config, log)
+    return None
+
+
+def pytest_runtest_logreport(report):
+    """Add up each test's setup, call and teardown time, per worker."""
+    if report.when in ('setup', 'call', 'teardown'):
+        node = getattr(report, 'node', None)
+        worker = node.gateway.id if node is not None else 'main'
+        run_durations.add(report.nodeid, worker, report.duration)
+
+
+def pytest_sessionfinish(session):
+    """Store this run's durations; xdist reports reach the controller, so only it writes."""
+    if not hasattr(session.config, 'workerinput'):
+        timing_db.record(run_durations.tests)
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    """Compare the predicted and actual makespan of a duration-scheduled run."""
+    if not run_durations.predicted or not run_durations.workers:
+        return
+    actual = sorted(run_durations.workers.values(), reverse=True)
+    mean = sum(actual) / len(actual)
+    terminalreporter.write_sep("=", "Load balancing")
+    terminalreporter.write_line(
+        f"makespan: predicted {run_durations.predicted[0]:.1f}s, actual {actual[0]:.1f}s "
+        f"(busiest worker {actual[0] / mean if mean else 1:.2f}x the mean)"
+    )
+    for worker, seconds in sorted(run_durations.workers.items()):
+        terminalreporter.write_line(f"{worker}: {seconds:6.1f}s")
@@ -0,0 +1,44 @@
+import pytest
+
+from tests.mobile.utils import log_buffer
+from tests.mobile.utils.log_buffer import LogBuffer, exclude_framework_records
+
+
+@pytest.fixture
+def framework_log() -> LogBuffer:
+    """The running test's buffered framework log, e.g. to print it on demand with ``text()``."""
+    return log_buffer.framework_log
+
+
+def pytest_sessionstart(session):
+    """In buffered mode, stop pytest's live, report and caplog handlers formatting framework records."""
+    plugin = session.config.pluginmanager.get_plugin('logging-plugin')
+    if not log_buffer.framework_log.active or plugin is None:
+        return
+    # pytest also attaches these to non-propagating loggers, so they need their own filter
+    for name in ('log_cli_handler', 'report_handler', 'caplog_handler', 'log_file_handler'):
+        handler = getattr(plugin, name, None)
+        if handler is not None:
+            exclude_framework_records(handler)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item, nextitem):
+    """Start each test with an empty log buffer."""
+    log_buffer.framework_log.clear()
+    yield
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    """Attach the buffered framework log to the report of a failed phase."""
+    outcome = yield
+    rep = outcome.get_result()
+    buffer = log_buffer.framework_log
+    if not buffer.active or not rep.failed or not buffer.records:
+        return
+    rep.sections.append((f"Captured framework log {rep.when}", buffer.text()))
+    if log_buffer.LOG_JSON:
+        buffer.write_json(log_buffer.LOG_JSON, item.nodeid)
+    # Records are shown once; a later failing phase shows only its own
+    buffer.clear()
@@ -0,0 +1,41 @@
+import time
+
+import pytest
+
+from tests.mobile.utils import logcat
+from tests.mobile.utils.logcat import collector_of
+
+test_start_key = pytest.StashKey[float]()
+
+
+def _collectors(item):
+    """Logcat collectors of the drivers the test uses, directly or through a page object."""
+    found = []
+    for value in getattr(item, 'funcargs', {}).values():
+        collector = collector_of(value) or collector_of(getattr(value, 'driver', None))
+        if collector is not None and collector not in found:
+            found.append(collector)
+    return found
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item, nextitem):
+    """Note when each test starts, so its report never shows an earlier test's logcat."""
+    item.stash[test_start_key] = time.time()
+    yield
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    """Attach the app's logcat leading up to the failure to the report of a failed phase."""
+    outcome = yield
+    rep = outcome.get_result()
+    if not rep.failed:
+        return
+    start = max(item.stash.get(test_start_key, 0.0), call.stop - logcat.LOGCAT_WINDOW)
+    for collector in _collectors(item):
+        # Catch up on what was logged since the last background fetch
+        collector.poll()
+        text = collector.text(start)
+        if text:
+            rep.sections.append((f"Captured logcat {rep.when}", text))
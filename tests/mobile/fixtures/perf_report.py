@@ -0,0 +1,66 @@
+import pytest
+
+from tests.mobile.utils import perf_sampler
+from tests.mobile.utils.perf_sampler import end_samplers, perf_report, sampler_of
+from tests.mobile.utils.timing_db import strip_group
+
+
+def _samplers(item):
+    """Performance samplers of the drivers the test uses, directly or through a page object, by fixture name."""
+    found = {}
+    for name, value in getattr(item, 'funcargs', {}).items():
+        sampler = sampler_of(value) or sampler_of(getattr(value, 'driver', None))
+        if sampler is not None and sampler not in found.values():
+            found[name] = sampler
+    return found
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    """Sample the app's performance while the test body runs and keep the summary."""
+    samplers = _samplers(item)
+    if not samplers:
+        yield
+        return
+    for sampler in samplers.values():
+        sampler.begin(item.nodeid)
+    yield
+    summary = end_samplers(samplers)
+    # Keyed without xdist's group suffix, so runs with and without --dist loadgroup compare
+    perf_report.add(strip_group(item.nodeid), summary)
+
+
+def pytest_sessionfinish(session):
+    """Hand summaries to the xdist controller, or write them and compare them with the baseline."""
+    if not perf_report.tests:
+        return
+    if hasattr(session.config, 'workeroutput'):
+        session.config.workeroutput['perf_summaries'] = perf_report.tests
+        return
+    perf_report.write_json(perf_sampler.PERF_OUTPUT)
+    if perf_sampler.PERF_UPDATE_BASELINE:
+        perf_report.update_baseline(perf_sampler.PERF_BASELINE)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    """Merge performance summaries from an xdist worker."""
+    tests = getattr(node, 'workeroutput', {}).get('perf_summaries')
+    if tests:
+        perf_report.merge(tests)
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    """List the series that got worse than the baseline."""
+    if not perf_report.tests:
+        return
+    terminalreporter.write_sep("=", "App performance")
+    if perf_sampler.PERF_UPDATE_BASELINE:
+        terminalreporter.write_line(f"{len(perf_report.tests)} tests sampled; baseline updated at "
+                                    f"{perf_sampler.PERF_BASELINE}")
+        return
+    regressions = perf_report.regressions(perf_sampler.PERF_BASELINE)
+    terminalreporter.write_line(f"{len(perf_report.tests)} tests sampled, {len(regressions)} regressions over "
+                                f"{perf_sampler.PERF_TOLERANCE:.0%}; summaries written to {perf_sampler.PERF_OUTPUT}")
+    for test, series, statistic, before, now in regressions:
+        terminalreporter.write_line(f"{series} {statistic}: {before:.1f} -> {now:.1f}  ({test})")
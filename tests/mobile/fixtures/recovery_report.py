@@ -0,0 +1,42 @@
+import pytest
+
+from tests.mobile.utils.retry import recovery_log
+
+# Number of individual recoveries listed in the terminal summary
+LISTED_RECOVERIES = 10
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item, nextitem):
+    """Attribute recoveries, including those in fixtures, to the running test."""
+    recovery_log.current_test = item.nodeid
+    yield
+    recovery_log.current_test = None
+
+
+def pytest_sessionfinish(session):
+    """Hand this worker's recoveries to the xdist controller."""
+    if hasattr(session.config, 'workeroutput'):
+        session.config.workeroutput['recoveries'] = recovery_log.records
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    """Merge recoveries reported by an xdist worker."""
+    records = getattr(node, 'workeroutput', {}).get('recoveries')
+    if records:
+        recovery_log.merge(records)
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    """Report every failure the retry layer stepped in for."""
+    if not recovery_log.records:
+        return
+    terminalreporter.write_sep("=", "Recoveries")
+    for kind, counts in sorted(recovery_log.summary().items()):
+        terminalreporter.write_line(f"{kind}: {counts['recovered']} recovered, {counts['failed']} failed")
+    terminalreporter.write_line("")
+    for test, command, kind, attempts, action, seconds, recovered in recovery_log.records[-LISTED_RECOVERIES:]:
+        terminalreporter.write_line(
+            f"{'ok  ' if recovered else 'FAIL'} {seconds:6.2f}s {attempts}x {action:<16} {kind:<13} {command}  ({test})"
+        )
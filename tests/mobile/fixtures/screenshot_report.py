@@ -0,0 +1,43 @@
+import pytest
+
+from tests.mobile.utils.screenshots import screenshot_pipeline
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_teardown(item, nextitem):
+    """Make sure a test's screenshots are on disk before the next test starts."""
+    yield
+    if not screenshot_pipeline.flush(timeout=60):
+        item.warn(pytest.PytestWarning("Screenshots were still being written 60s after the test ended"))
+    # Pooled sessions outlive the test; the next test's first frame is always written
+    screenshot_pipeline.forget()
+
+
+def pytest_sessionfinish(session):
+    """Finish pending writes and hand this worker's counters to the xdist controller."""
+    screenshot_pipeline.shutdown()
+    if hasattr(session.config, 'workeroutput'):
+        session.config.workeroutput['screenshots'] = screenshot_pipeline.stats.as_dict()
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    """Merge screenshot counters reported by an xdist worker."""
+    data = getattr(node, 'workeroutput', {}).get('screenshots')
+    if data:
+        screenshot_pipeline.stats.merge(data)
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    """Report how many screenshots were written and how the queue coped."""
+    stats = screenshot_pipeline.stats
+    if not stats.captured:
+        return
+    terminalreporter.write_sep("=", "Screenshots")
+    terminalreporter.write_line(
+        f"captured: {stats.captured}, written: {stats.written} ({stats.bytes_written / 1024:.0f} KiB), "
+        f"duplicates copied: {stats.duplicates}, failed: {stats.failed}"
+    )
+    terminalreporter.write_line(
+        f"max queue depth: {stats.max_queue_depth}, test thread blocked on a full queue: {stats.blocked_seconds:.2f}s"
+    )
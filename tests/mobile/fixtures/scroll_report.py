@@ -0,0 +1,30 @@
+import pytest
+
+from tests.mobile.base.scroller import scroll_stats
+
+
+def pytest_sessionfinish(session):
+    """Hand this worker's scroll results to the xdist controller."""
+    if hasattr(session.config, 'workeroutput'):
+        session.config.workeroutput['scroll_stats'] = scroll_stats.as_dict()
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    """Merge scroll results reported by an xdist worker."""
+    data = getattr(node, 'workeroutput', {}).get('scroll_stats')
+    if data:
+        scroll_stats.merge(data)
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    """Report the gestures and lookups spent scrolling to targets."""
+    summary = scroll_stats.summary()
+    if not summary['scrolls']:
+        return
+    terminalreporter.write_sep("=", "Scrolling")
+    terminalreporter.write_line(
+        f"scrolls: {summary['scrolls']} ({summary['indexed']} from the index, {summary['not_found']} not found), "
+        f"gestures: {summary['gestures']} ({summary['mean_gestures']:.1f} per scroll), "
+        f"lookups: {summary['lookups']}, time: {summary['seconds']:.2f}s"
+    )
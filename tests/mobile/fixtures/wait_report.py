@@ -0,0 +1,31 @@
+import pytest
+
+from tests.mobile.utils.waits import wait_stats
+
+# Number of locators listed in the terminal summary
+SLOWEST_WAITS = 10
+
+
+def pytest_sessionfinish(session):
+    """Hand this worker's wait times to the xdist controller."""
+    if hasattr(session.config, 'workeroutput'):
+        session.config.workeroutput['wait_stats'] = wait_stats.as_dict()
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    """Merge wait times reported by an xdist worker."""
+    data = getattr(node, 'workeroutput', {}).get('wait_stats')
+    if data:
+        wait_stats.merge(data)
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    """List the locators the suite spent the most time waiting for."""
+    rows = wait_stats.slowest(SLOWEST_WAITS)
+    if not rows:
+        return
+    terminalreporter.write_sep("=", "Slowest waits")
+    terminalreporter.write_line(f"{'total':>8} {'waits':>6} {'polls':>6} {'timeouts':>8}  locator")
+    for locator, waits, seconds, polls, timeouts in rows:
+        terminalreporter.write_line(f"{seconds:7.2f}s {waits:6d} {polls:6d} {timeouts:8d}  {locator}")
@@ -1,7 +1,13 @@
 from tests.mobile.base.base_page import BasePage
-from appium.webdriver.common.appiumby import AppiumBy
 
 class ApiDemosPage(BasePage):
+    # App state metadata for the app_state marker and Navigator: the launch screen
+    APP_STATE = "main"
+    ACTIVITY = ".ApiDemos"
+    NAVIGATION = ()
+    # The menu is found by id and text only: a compressed hierarchy and a short idle wait suffice
+    SETTINGS_PROFILE = "fast"
+
     # Locators using resource-id and content-desc
     ACCESSIBILITY_BUTTON = ("ID", "android:id/text1")  # Using resource-id for list items
     ANIMATION_BUTTON = ("ID", "android:id/text1")
@@ -18,35 +24,22 @@ class ApiDemosPage(BasePage):
 
     def tap_accessibility(self):
         """Tap on Accessibility menu item."""
-        elements = self.find_elements(AppiumBy.ID, self.ACCESSIBILITY_BUTTON[1])
-        for element in elements:
-            if element.text == self.ACCESSIBILITY_TEXT:
-                element.click()
-                break
+        self.tap_text(*self.ACCESSIBILITY_BUTTON, self.ACCESSIBILITY_TEXT)
         return self
 
     def tap_animation(self):
         """Tap on Animation menu item."""
-        elements = self.find_elements(AppiumBy.ID, self.ANIMATION_BUTTON[1])
-        for element in elements:
-            if element.text == self.ANIMATION_TEXT:
-                element.click()
-                break
+        self.tap_text(*self.ANIMATION_BUTTON, self.ANIMATION_TEXT)
         return self
 
     def tap_app(self):
         """Tap on App menu item."""
-        elements = self.find_elements(AppiumBy.ID, self.APP_BUTTON[1])
-        for element in elements:
-            if element.text == self.APP_TEXT:
-                element.click()
-                break
+        self.tap_text(*self.APP_BUTTON, self.APP_TEXT)
         return self
 
     def is_main_screen_displayed(self) -> bool:
         """Check if main screen is displayed."""
         try:
-            elements = self.find_elements(AppiumBy.ID, self.ACCESSIBILITY_BUTTON[1])
-            return any(element.text == self.ACCESSIBILITY_TEXT for element in elements)
+            return self.is_text_displayed(*self.ACCESSIBILITY_BUTTON, self.ACCESSIBILITY_TEXT)
         except:
             return False 
\ No newline at end of file
@@ -0,0 +1,24 @@
+from tests.mobile.base.base_page import BasePage
+
+class CustomTitlePage(BasePage):
+    # Navigation metadata: launched directly when possible, otherwise reached through the menus
+    APP_STATE = "custom_title"
+    ACTIVITY = ".app.CustomTitle"
+    NAVIGATION = (
+        "Views",
+        "Custom",
+        ("-android uiautomator",
+         'new UiScrollable(new UiSelector().scrollable(true)).scrollIntoView(new UiSelector().text("Custom Title"))'),
+    )
+    # The titles change after a tap; let the dumps wait for the screen to settle
+    SETTINGS_PROFILE = "default"
+
+    # Locators
+    LEFT_TEXT = ("ID", "io.appium.android.apis:id/left_text")
+    RIGHT_TEXT = ("ID", "io.appium.android.apis:id/right_text")
+    CHANGE_LEFT_BUTTON = ("ACCESSIBILITY_ID", "Change Left")
+    CHANGE_RIGHT_BUTTON = ("ACCESSIBILITY_ID", "Change Right")
+
+    def title_locator(self, text: str) -> tuple:
+        """XPath matching any view showing the given title text."""
+        return ("XPATH", f"//*[@text='{text}']")
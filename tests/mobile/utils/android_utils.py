@@ -1,5 +1,15 @@
+import logging
+import os
 from appium.webdriver.webdriver import WebDriver
-from typing import Dict, Any
+from concurrent.futures import Future
+from typing import Dict, Any, Optional
+
+from tests.mobile.utils.install_cache import install_cache
+from tests.mobile.utils.perf_sampler import parse_table
+from tests.mobile.utils.screenshots import screenshot_pipeline
+from tests.mobile.utils.visual import VisualResult, assert_screen_matches
+
+logger = logging.getLogger(__name__)
 
 class AndroidUtils:
     def __init__(self, driver: WebDriver):
@@ -33,22 +43,53 @@ class AndroidUtils:
             "automation_name": self.driver.capabilities.get("automationName")
         }
 
-    def start_activity(self, app_package: str, app_activity: str):
-        """Start a specific activity."""
-        self.driver.start_activity(app_package, app_activity)
+    def get_performance(self, app_package: str, data_type: str) -> Dict[str, float]:
+        """Get the app's current performance data of one type (e.g. memoryinfo), by column."""
+        return parse_table(data_type, self.driver.get_performance_data(app_package, data_type, 5))
+
+    def start_activity(self, app_package: str, app_activity: str, **intent):
+        """Start a specific activity, with optional `mobile: startActivity` intent options."""
+        self.driver.execute_script('mobile: startActivity', {
+            'intent': f"{app_package}/{app_activity}",
+            'wait': True,
+            **intent,
+        })
 
     def is_app_installed(self, package_name: str) -> bool:
-        """Check if app is installed."""
+        """Check if app is installed, answering from the install cache when it already confirmed it."""
+        udid = self._udid()
+        if udid and install_cache.confirmed(udid, package_name):
+            return True
         return self.driver.is_app_installed(package_name)
 
-    def install_app(self, app_path: str):
-        """Install app from path."""
+    def install_app(self, app_path: str, app_package: Optional[str] = None):
+        """Install app from path, unless the install cache knows this exact APK is on the device."""
+        udid = self._udid()
+        if udid and app_package and install_cache.enabled:
+            digest = install_cache.digest(app_path)
+            if install_cache.is_installed(udid, app_package, digest):
+                logger.info("%s from %s is already installed on %s", app_package, app_path, udid)
+                return
+            self.driver.install_app(app_path)
+            install_cache.record(udid, app_package, digest)
+            return
         self.driver.install_app(app_path)
 
     def remove_app(self, app_package: str):
         """Remove app by package name."""
         self.driver.remove_app(app_package)
+        udid = self._udid()
+        if udid:
+            install_cache.forget(udid, app_package)
+
+    def take_screenshot(self, filename: str) -> Future:
+        """Take screenshot and save it to ``filename`` in the background."""
+        return screenshot_pipeline.capture(self.driver, os.path.abspath(filename))
+
+    def assert_screen_matches(self, name: str, **kwargs) -> VisualResult:
+        """Assert the current screen matches a stored visual baseline."""
+        return assert_screen_matches(self.driver, name, **kwargs)
 
-    def take_screenshot(self, filename: str):
-        """Take screenshot and save to file."""
-        self.driver.get_screenshot_as_file(filename) 
\ No newline at end of file
+    def _udid(self) -> Optional[str]:
+        capabilities = self.driver.capabilities
+        return capabilities.get('deviceUDID') or capabilities.get('udid') or capabilities.get('appium:udid')
@@ -0,0 +1,72 @@
+import logging
+import os
+import subprocess
+import time
+import urllib.request
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AppiumServer:
+    """A local Appium server on a fixed port, spawned on demand and reused if already running."""
+
+    def __init__(self, port: int, host: str = '127.0.0.1', binary: str = 'appium',
+                 log_dir: Optional[str] = None):
+        self.port = port
+        self.host = host
+        self.binary = binary
+        self.log_dir = log_dir
+        self._process: Optional[subprocess.Popen] = None
+        self._log_file = None
+
+    @property
+    def url(self) -> str:
+        return f'http://{self.host}:{self.port}'
+
+    def is_healthy(self, timeout: float = 2.0) -> bool:
+        """Check the server answers GET /status."""
+        try:
+            with urllib.request.urlopen(f'{self.url}/status', timeout=timeout) as response:
+                return response.status == 200
+        except OSError:
+            return False
+
+    def start(self, timeout: float = 60.0):
+        """Start the server unless a healthy one already listens on the port."""
+        if self.is_healthy():
+            logger.info("Reusing Appium server at %s", self.url)
+            return
+        command = [self.binary, '--address', self.host, '--port', str(self.port)]
+        output = subprocess.DEVNULL
+        if self.log_dir:
+            os.makedirs(self.log_dir, exist_ok=True)
+            self._log_file = open(os.path.join(self.log_dir, f'appium-{self.port}.log'), 'ab')
+            output = self._log_file
+        logger.info("Starting Appium server: %s", ' '.join(command))
+        self._process = subprocess.Popen(command, stdout=output, stderr=subprocess.STDOUT)
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self._process.poll() is not None:
+                raise RuntimeError(f"Appium server on port {self.port} exited with code {self._process.returncode}")
+            if self.is_healthy():
+                logger.info("Appium server ready at %s", self.url)
+                return
+            time.sleep(0.5)
+        self.stop()
+        raise RuntimeError(f"Appium server on port {self.port} did not become healthy within {timeout}s")
+
+    def stop(self):
+        """Stop the server if this instance started it."""
+        if self._process is not None:
+            logger.info("Stopping Appium server at %s", self.url)
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+            self._process = None
+        if self._log_file is not None:
+            self._log_file.close()
+            self._log_file = None
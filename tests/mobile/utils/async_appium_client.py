@@ -0,0 +1,247 @@
+import asyncio
+import logging
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, TypeVar
+
+import aiohttp
+from appium.webdriver.webdriver import WebDriver
+from selenium.common.exceptions import (
+    InvalidSelectorException,
+    InvalidSessionIdException,
+    NoSuchElementException,
+    SessionNotCreatedException,
+    StaleElementReferenceException,
+    TimeoutException,
+    UnknownMethodException,
+    WebDriverException,
+)
+
+from tests.mobile.utils.retry import RETRY_ATTEMPTS, backoff, classify, never_sent, recovery_log
+from tests.mobile.utils.waits import describe_locator, poll_intervals, wait_stats
+
+logger = logging.getLogger(__name__)
+
+ELEMENT_KEY = 'element-6066-11e4-a52e-4f735466cecf'
+
+# W3C error codes mapped to the exceptions the sync selenium client raises,
+# so code migrating from page objects keeps its except clauses.
+ERROR_CODES = {
+    'no such element': NoSuchElementException,
+    'stale element reference': StaleElementReferenceException,
+    'invalid selector': InvalidSelectorException,
+    'invalid session id': InvalidSessionIdException,
+    'session not created': SessionNotCreatedException,
+    'timeout': TimeoutException,
+    'unknown method': UnknownMethodException,
+}
+
+# Element lookups are POSTs but change nothing, so repeating them is as safe as repeating a GET
+_LOOKUP_PATH = re.compile(r'^/session/[^/]+(?:/element/[^/]+)?/elements?$')
+
+T = TypeVar('T')
+
+
+def server_url(driver: WebDriver) -> str:
+    """Return the Appium server URL a sync driver talks to."""
+    executor = driver.command_executor
+    client_config = getattr(executor, '_client_config', None)
+    if client_config is not None:
+        return client_config.remote_server_addr.rstrip('/')
+    return executor._url.rstrip('/')
+
+
+def is_idempotent(method: str, path: str) -> bool:
+    """Whether sending a request twice has the same effect as once: GETs and element lookups."""
+    return method == 'GET' or (method == 'POST' and _LOOKUP_PATH.match(path) is not None)
+
+
+class AsyncElement:
+    """Element handle bound to an :class:`AsyncSession`."""
+
+    def __init__(self, session: 'AsyncSession', element_id: str):
+        self.session = session
+        self.id = element_id
+
+    async def click(self) -> None:
+        await self.session.command('POST', f'/element/{self.id}/click', {})
+
+    async def clear(self) -> None:
+        await self.session.command('POST', f'/element/{self.id}/clear', {})
+
+    async def send_keys(self, text: str) -> None:
+        await self.session.command('POST', f'/element/{self.id}/value', {'text': text, 'value': list(text)})
+
+    async def text(self) -> str:
+        return await self.session.command('GET', f'/element/{self.id}/text')
+
+    async def get_attribute(self, name: str) -> Optional[str]:
+        return await self.session.command('GET', f'/element/{self.id}/attribute/{name}')
+
+    async def is_displayed(self) -> bool:
+        return await self.session.command('GET', f'/element/{self.id}/displayed')
+
+    async def is_enabled(self) -> bool:
+        return await self.session.command('GET', f'/element/{self.id}/enabled')
+
+
+class AsyncSession:
+    """A W3C/Appium session driven without blocking the event loop."""
+
+    def __init__(self, client: 'AsyncAppiumClient', session_id: str):
+        self.client = client
+        self.session_id = session_id
+
+    async def command(self, method: str, path: str, payload: Optional[Dict[str, Any]] = None) -> Any:
+        return await self.client.request(method, f'/session/{self.session_id}{path}', payload)
+
+    async def find_element(self, by: str, value: str) -> AsyncElement:
+        result = await self.command('POST', '/element', {'using': by, 'value': value})
+        return AsyncElement(self, result[ELEMENT_KEY])
+
+    async def find_elements(self, by: str, value: str) -> List[AsyncElement]:
+        result = await self.command('POST', '/elements', {'using': by, 'value': value})
+        return [AsyncElement(self, item[ELEMENT_KEY]) for item in result]
+
+    async def wait_for_element(self, by: str, value: str, timeout: float = 10) -> AsyncElement:
+        """Poll for an element, yielding to other sessions between attempts."""
+        async def locate():
+            try:
+                return await self.find_element(by, value)
+            except (NoSuchElementException, StaleElementReferenceException):
+                return None
+        return await wait_until(locate, timeout, message=f"Element not found with {by}: {value}",
+                                locator=describe_locator(by, value))
+
+    async def page_source(self) -> str:
+        return await self.command('GET', '/source')
+
+    async def execute_script(self, script: str, *args: Any) -> Any:
+        return await self.command('POST', '/execute/sync', {'script': script, 'args': list(args)})
+
+    async def back(self) -> None:
+        await self.command('POST', '/back', {})
+
+    async def current_activity(self) -> str:
+        return await self.command('GET', '/appium/device/current_activity')
+
+    async def screenshot(self) -> str:
+        """Return the screenshot as a base64 encoded PNG."""
+        return await self.command('GET', '/screenshot')
+
+    async def quit(self) -> None:
+        await self.client.request('DELETE', f'/session/{self.session_id}')
+
+
+class AsyncAppiumClient:
+    """Non-blocking HTTP client for one Appium server.
+
+    All sessions created or attached through the client share one keep-alive
+    connection pool, so a single event loop can drive several devices at once.
+    """
+
+    def __init__(self, server_url: str, command_timeout: float = 120, max_connections: int = 16):
+        self.server_url = server_url.rstrip('/')
+        self.command_timeout = command_timeout
+        self.max_connections = max_connections
+        self._http: Optional[aiohttp.ClientSession] = None
+
+    @classmethod
+    def for_driver(cls, driver: WebDriver, **kwargs) -> 'AsyncAppiumClient':
+        """Create a client pointing at the same server as a sync driver."""
+        return cls(server_url(driver), **kwargs)
+
+    async def __aenter__(self) -> 'AsyncAppiumClient':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def request(self, method: str, path: str, payload: Optional[Dict[str, Any]] = None) -> Any:
+        """Send a W3C command and return its ``value``, raising selenium exceptions on errors.
+
+        Transient connection failures are retried with the sync driver's backoff, when
+        repeating the request is safe: reads, element lookups, and requests whose
+        connection could not be made. A tap that failed mid-flight is not sent again.
+        """
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            try:
+                value = await self._send(method, path, payload)
+            except Exception as e:
+                transient = isinstance(e, aiohttp.ClientConnectionError) or classify(e) == 'transient'
+                safe = (is_idempotent(method, path) or isinstance(e, aiohttp.ClientConnectorError)
+                        or never_sent(e))
+                if not (transient and safe) or attempt >= RETRY_ATTEMPTS:
+                    if attempt:
+                        recovery_log.record(f"{method} {path}", 'transient', attempt,
+                                            time.perf_counter() - start, False)
+                    raise
+                attempt += 1
+                logger.warning("%s %s failed (%s), retry %s/%s", method, path, e, attempt, RETRY_ATTEMPTS)
+                await asyncio.sleep(backoff(attempt))
+                continue
+            if attempt:
+                recovery_log.record(f"{method} {path}", 'transient', attempt, time.perf_counter() - start, True)
+            return value
+
+    async def _send(self, method: str, path: str, payload: Optional[Dict[str, Any]]) -> Any:
+        if self._http is None or self._http.closed:
+            # Created lazily so the connection pool belongs to the running loop
+            self._http = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                timeout=aiohttp.ClientTimeout(total=self.command_timeout),
+            )
+        async with self._http.request(method, f'{self.server_url}{path}', json=payload) as response:
+            body = await response.json(content_type=None)
+        value = body.get('value') if isinstance(body, dict) else None
+        if isinstance(value, dict) and 'error' in value:
+            exception = ERROR_CODES.get(value['error'], WebDriverException)
+            raise exception(value.get('message', value['error']))
+        if response.status >= 400:
+            raise WebDriverException(f"{method} {path} failed with HTTP {response.status}")
+        return value
+
+    async def create_session(self, capabilities: Dict[str, Any]) -> AsyncSession:
+        """Start a new session with W3C ``alwaysMatch`` capabilities."""
+        value = await self.request('POST', '/session', {'capabilities': {'alwaysMatch': capabilities, 'firstMatch': [{}]}})
+        logger.info("Created async Appium session %s", value['sessionId'])
+        return AsyncSession(self, value['sessionId'])
+
+    def attach(self, session_id: str) -> AsyncSession:
+        """Drive an existing session, e.g. one owned by a sync driver."""
+        return AsyncSession(self, session_id)
+
+    async def close(self) -> None:
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
+
+
+async def wait_until(condition: Callable[[], Awaitable[Optional[T]]], timeout: float = 10,
+                     message: str = '', locator: str = 'condition') -> T:
+    """Await ``condition`` until it returns something truthy, backing off without blocking the loop."""
+    start = time.monotonic()
+    deadline = start + timeout
+    intervals = poll_intervals()
+    polls = 0
+    timed_out = False
+    try:
+        while True:
+            polls += 1
+            result = await condition()
+            if result:
+                return result
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                timed_out = True
+                raise TimeoutException(message or f"Condition not met within {timeout}s")
+            await asyncio.sleep(min(next(intervals), remaining))
+    finally:
+        wait_stats.record(locator, time.monotonic() - start, polls, timed_out)
+
+
+async def run_on_devices(targets: Iterable[T], action: Callable[[T], Awaitable[Any]]) -> List[Any]:
+    """Run the same async flow on several sessions/helpers concurrently."""
+    return await asyncio.gather(*(action(target) for target in targets))
@@ -0,0 +1,190 @@
+import gzip
+import json
+import logging
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+from appium import webdriver
+from appium.options.android import UiAutomator2Options
+from appium.webdriver.appium_connection import AppiumConnection
+from appium.webdriver.webdriver import WebDriver
+
+logger = logging.getLogger(__name__)
+
+# 'record' captures real sessions, 'replay' serves them back without a device, 'off' does neither
+CASSETTE_MODES = ('off', 'record', 'replay')
+CASSETTE_MODE = os.getenv('APPIUM_CASSETTE_MODE', 'off').lower()
+CASSETTE_DIR = os.getenv('CASSETTE_DIR', './tests/mobile/cassettes')
+CASSETTE_VERSION = 1
+
+# Address given to replaying connections; nothing is ever sent to it
+REPLAY_URL = 'http://cassette.invalid'
+
+# Lookups are POSTs but change nothing; like GETs they are what waits poll with
+_READ_ONLY_COMMANDS = ('findElement', 'findElements', 'findChildElement', 'findChildElements')
+
+
+class CassetteMismatch(Exception):
+    """A replayed session sent a command the cassette did not record at that point."""
+
+
+def cassette_path(nodeid: str, directory: str = CASSETTE_DIR) -> str:
+    """Return the cassette file of a test."""
+    return os.path.join(directory, re.sub(r'[^\w.-]+', '_', nodeid).strip('_') + '.json.gz')
+
+
+def _request_key(command: str, params: Optional[Dict[str, Any]]) -> list:
+    # The session id is part of every URL and capabilities hold machine-specific
+    # paths; neither carries meaning for matching
+    if command == 'newSession':
+        return [command, {}]
+    params = {key: value for key, value in (params or {}).items() if key != 'sessionId'}
+    return [command, json.loads(json.dumps(params))]
+
+
+def _is_poll(command: str, method: Optional[str]) -> bool:
+    """Whether a command only reads, so waits may send it any number of times."""
+    return method == 'GET' or command in _READ_ONLY_COMMANDS
+
+
+def _brief(value: Any, limit: int = 300) -> str:
+    text = str(value)
+    return text if len(text) <= limit else text[:limit] + '...'
+
+
+class VirtualClock:
+    """Clock that advances only when slept on, so replayed waits take no time."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += seconds
+
+
+class Cassette:
+    """The command/response stream of one test's session.
+
+    Interactions are stored as ``[command, params, response, repeat]``;
+    identical consecutive exchanges (typically wait polls) are collapsed into
+    one entry with a repeat count, which keeps cassettes small and lets replay
+    absorb a different number of polls than were recorded. Only read-only
+    commands (GETs and element lookups) get that leeway; a tap sent more or
+    fewer times than recorded is a divergence.
+    """
+
+    def __init__(self, path: str, interactions: Optional[List[list]] = None):
+        self.path = path
+        self.interactions = interactions or []
+        self.mismatches: List[str] = []
+        self._position = 0
+        self._served = 0
+        # HTTP method of each command replayed so far
+        self._methods: Dict[str, str] = {}
+
+    @classmethod
+    def load(cls, path: str) -> 'Cassette':
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != CASSETTE_VERSION:
+            raise ValueError(f"Cassette {path} has version {data.get('version')}, expected {CASSETTE_VERSION}")
+        return cls(path, data['interactions'])
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with gzip.open(self.path, 'wt', encoding='utf-8') as f:
+            json.dump({'version': CASSETTE_VERSION, 'interactions': self.interactions}, f, separators=(',', ':'))
+        logger.info("Saved %s interactions to cassette %s", len(self.interactions), self.path)
+
+    def record(self, command: str, params: Optional[Dict[str, Any]], response: Any):
+        key = _request_key(command, params)
+        # Round-trip through JSON so the stored response equals what replay will load
+        response = json.loads(json.dumps(response))
+        last = self.interactions[-1] if self.interactions else None
+        if last is not None and last[:2] == key and last[2] == response:
+            last[3] += 1
+        else:
+            self.interactions.append([*key, response, 1])
+
+    def play(self, command: str, params: Optional[Dict[str, Any]], method: str = 'POST') -> Any:
+        """Return the recorded response for the next command, failing on divergence.
+
+        ``method`` is the command's HTTP method; GETs may be polled more or fewer times than recorded.
+        """
+        key = _request_key(command, params)
+        self._methods[command] = method
+        if self._position < len(self.interactions):
+            current = self.interactions[self._position]
+            if current[:2] == key:
+                return self._serve(current)
+            following = self.interactions[self._position + 1] if self._position + 1 < len(self.interactions) else None
+            if (self._served and following is not None and following[:2] == key
+                    and _is_poll(current[0], self._methods.get(current[0]))):
+                # Fewer polls than recorded; move on to the next exchange
+                self._position += 1
+                self._served = 0
+                return self._serve(following)
+        if (self._position > 0 and self.interactions[self._position - 1][:2] == key
+                and _is_poll(command, method)):
+            # More polls than recorded; the last response stays in effect
+            return self.interactions[self._position - 1][2]
+        expected = self.interactions[self._position][:2] if self._position < len(self.interactions) else 'end of cassette'
+        message = (f"Cassette {self.path} diverged at interaction {self._position}: "
+                   f"expected {_brief(expected)}, got {_brief(key)}")
+        self.mismatches.append(message)
+        raise CassetteMismatch(message)
+
+    def unplayed(self) -> int:
+        """Number of recorded interactions replay never reached."""
+        remaining = len(self.interactions) - self._position
+        return remaining - 1 if self._served else remaining
+
+    def _serve(self, interaction: list) -> Any:
+        self._served += 1
+        if self._served >= interaction[3]:
+            self._position += 1
+            self._served = 0
+        return interaction[2]
+
+
+class RecordingConnection(AppiumConnection):
+    """Appium connection that writes every exchange to a cassette."""
+
+    def __init__(self, remote_server_addr: str, cassette: Cassette, **kwargs):
+        super().__init__(remote_server_addr, **kwargs)
+        self.cassette = cassette
+
+    def execute(self, command: str, params: Dict[str, Any]) -> Any:
+        # execute() pops the URL parameters (e.g. element ids) off ``params``
+        sent = dict(params or {})
+        response = super().execute(command, params)
+        self.cassette.record(command, sent, response)
+        return response
+
+
+class ReplayConnection(AppiumConnection):
+    """Appium connection that answers from a cassette without any network access."""
+
+    def __init__(self, cassette: Cassette):
+        super().__init__(REPLAY_URL)
+        self.cassette = cassette
+        self.clock = VirtualClock()
+
+    def execute(self, command: str, params: Dict[str, Any]) -> Any:
+        method = self._commands.get(command, ('POST',))[0]
+        return self.cassette.play(command, params, method)
+
+
+def recording_driver(server_url: str, options: UiAutomator2Options, cassette: Cassette) -> WebDriver:
+    """Start a real session whose traffic is recorded to ``cassette``."""
+    return webdriver.Remote(RecordingConnection(server_url, cassette, keep_alive=True),
+                            options=options, direct_connection=False)
+
+
+def replay_driver(options: UiAutomator2Options, cassette: Cassette) -> WebDriver:
+    """Start a session served entirely from ``cassette``."""
+    return webdriver.Remote(ReplayConnection(cassette), options=options, direct_connection=False)
@@ -0,0 +1,125 @@
+import json
+import os
+import statistics
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from appium.webdriver.webdriver import WebDriver
+
+# Off by default; drivers are only instrumented when enabled, so disabled runs pay nothing
+PROFILE_COMMANDS = os.getenv('PROFILE_COMMANDS', 'false').lower() == 'true'
+
+# Fields of a record, kept as a flat list so workers can ship them to the controller as-is
+RECORD_FIELDS = ('test', 'session', 'command', 'locator', 'seconds', 'request_bytes',
+                 'response_bytes', 'retries', 'ok')
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    """Return count, p50, p95, p99 and total of a list of durations."""
+    if not values:
+        return {'count': 0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'total': 0.0}
+    if len(values) == 1:
+        cuts = [values[0]] * 99
+    else:
+        cuts = statistics.quantiles(values, n=100, method='inclusive')
+    return {'count': len(values), 'p50': cuts[49], 'p95': cuts[94], 'p99': cuts[98], 'total': sum(values)}
+
+
+class CommandProfiler:
+    """Record every W3C command sent by instrumented drivers.
+
+    Each command becomes one small list appended to an in-memory buffer; all
+    aggregation (per command, test and session) happens at report time.
+    """
+
+    def __init__(self):
+        self.records: List[list] = []
+        self.current_test: Optional[str] = None
+        self._local = threading.local()
+
+    def instrument(self, driver: WebDriver) -> WebDriver:
+        """Wrap the driver's command executor so its commands are recorded."""
+        executor = driver.command_executor
+        execute = executor.execute
+        request = executor._request
+
+        def recording_request(method, url, body=None):
+            self._local.request_bytes = len(body) if body else 0
+            return request(method, url, body)
+
+        def recording_execute(command, params):
+            params = params or {}
+            locator = params.get('value') if 'using' in params else params.get('script')
+            if locator is not None and not isinstance(locator, str):
+                locator = None
+            session = params.get('sessionId')
+            self._local.request_bytes = 0
+            ok = False
+            start = time.perf_counter()
+            try:
+                response = execute(command, params)
+                ok = True
+                return response
+            finally:
+                elapsed = time.perf_counter() - start
+                value = response.get('value') if ok and isinstance(response, dict) else None
+                self.records.append([
+                    self.current_test, session, command,
+                    f"{params.get('using')}={locator}" if 'using' in params else locator,
+                    elapsed, self._local.request_bytes,
+                    len(value) if isinstance(value, str) else 0,
+                    getattr(self._local, 'retries', 0), ok,
+                ])
+
+        executor._request = recording_request
+        executor.execute = recording_execute
+        return driver
+
+    def note_retry(self, attempt: int):
+        """Mark the following commands on this thread as retry ``attempt`` of the previous one."""
+        self._local.retries = attempt
+
+    def merge(self, records: Iterable[list]):
+        self.records.extend(records)
+
+    def summary(self) -> Dict[str, Any]:
+        """Aggregate the records into per-command, per-test and per-session histograms."""
+        by_command: Dict[str, List[float]] = {}
+        by_test: Dict[str, List[float]] = {}
+        by_session: Dict[str, List[float]] = {}
+        failures = 0
+        retries = 0
+        for test, session, command, _locator, seconds, *_sizes, record_retries, ok in self.records:
+            by_command.setdefault(command, []).append(seconds)
+            by_test.setdefault(test or '<outside tests>', []).append(seconds)
+            by_session.setdefault(session or '<no session>', []).append(seconds)
+            failures += not ok
+            retries += bool(record_retries)
+        return {
+            'round_trips': len(self.records),
+            'failures': failures,
+            'retries': retries,
+            'request_bytes': sum(record[5] for record in self.records),
+            'response_bytes': sum(record[6] for record in self.records),
+            'commands': {name: percentiles(values) for name, values in by_command.items()},
+            'tests': {name: percentiles(values) for name, values in by_test.items()},
+            'sessions': {name: percentiles(values) for name, values in by_session.items()},
+        }
+
+    def slowest_commands(self, limit: int = 10) -> List[list]:
+        """Return the individual records that took longest."""
+        return sorted(self.records, key=lambda record: record[4], reverse=True)[:limit]
+
+    def write_json(self, path: str):
+        """Write the aggregated summary plus the raw records as a JSON artifact."""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump({
+                'summary': self.summary(),
+                'fields': RECORD_FIELDS,
+                'records': self.records,
+            }, f)
+
+
+command_profiler = CommandProfiler()
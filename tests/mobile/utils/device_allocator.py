@@ -0,0 +1,165 @@
+import json
+import logging
+import os
+import re
+import subprocess
+import tempfile
+import time
+from typing import List, Optional
+
+from appium.options.android import UiAutomator2Options
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+# First port of each range; slot N uses base + N
+SYSTEM_PORT_BASE = 8201
+CHROMEDRIVER_PORT_BASE = 9515
+MJPEG_SERVER_PORT_BASE = 7810
+APPIUM_PORT_BASE = 4723
+# Seconds acquire() waits for another worker (or run) to free a slot
+DEVICE_LEASE_TIMEOUT = float(os.getenv('DEVICE_LEASE_TIMEOUT', '300'))
+# Seconds between attempts while every slot is leased
+LEASE_POLL_INTERVAL = 0.5
+
+
+def worker_index(worker_id: Optional[str] = None) -> int:
+    """Return the numeric index of an xdist worker id ('gw3' -> 3, 'master' -> 0)."""
+    worker_id = worker_id or os.getenv('PYTEST_XDIST_WORKER', 'master')
+    match = re.search(r'(\d+)$', worker_id)
+    return int(match.group(1)) if match else 0
+
+
+def discover_devices() -> List[str]:
+    """List device UDIDs from DEVICE_UDIDS, falling back to `adb devices`."""
+    configured = os.getenv('DEVICE_UDIDS', '')
+    if configured.strip():
+        return [udid.strip() for udid in configured.split(',') if udid.strip()]
+    try:
+        output = subprocess.run(
+            ['adb', 'devices'], capture_output=True, text=True, timeout=10, check=True
+        ).stdout
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.info("Could not list devices with adb: %s", e)
+        return []
+    devices = []
+    for line in output.splitlines()[1:]:
+        parts = line.split()
+        if len(parts) == 2 and parts[1] == 'device':
+            devices.append(parts[0])
+    return devices
+
+
+class DeviceLease:
+    """Device and ports reserved for a single worker."""
+
+    def __init__(self, slot: int, udid: Optional[str], lock_file):
+        self.slot = slot
+        self.udid = udid
+        self.system_port = SYSTEM_PORT_BASE + slot
+        self.chromedriver_port = CHROMEDRIVER_PORT_BASE + slot
+        self.mjpeg_server_port = MJPEG_SERVER_PORT_BASE + slot
+        self.appium_port = APPIUM_PORT_BASE + slot
+        self._lock_file = lock_file
+
+    def apply(self, options: UiAutomator2Options):
+        """Point the capabilities at the leased device and ports."""
+        if self.udid:
+            options.udid = self.udid
+        options.system_port = self.system_port
+        options.chromedriver_port = self.chromedriver_port
+        options.mjpeg_server_port = self.mjpeg_server_port
+
+    def as_dict(self) -> dict:
+        return {
+            'slot': self.slot,
+            'udid': self.udid,
+            'system_port': self.system_port,
+            'chromedriver_port': self.chromedriver_port,
+            'mjpeg_server_port': self.mjpeg_server_port,
+            'appium_port': self.appium_port,
+            'pid': os.getpid(),
+        }
+
+
+class DeviceAllocator:
+    """Lease a device and a port range to each xdist worker.
+
+    Leases are exclusive locks on ``slot-<n>.lock`` files in ``lease_dir``, so
+    they hold across processes (and separate pytest runs on the same host) and
+    are dropped by the OS if a worker dies without releasing them.
+    """
+
+    def __init__(self, devices: List[str], lease_dir: Optional[str] = None):
+        self.devices = devices
+        self.lease_dir = lease_dir or os.path.join(tempfile.gettempdir(), 'appium-python-leases')
+        os.makedirs(self.lease_dir, exist_ok=True)
+
+    def acquire(self, worker_id: Optional[str] = None, timeout: float = DEVICE_LEASE_TIMEOUT) -> DeviceLease:
+        """Lease a free slot, preferring the one matching the worker index.
+
+        While every slot is leased, waits up to ``timeout`` seconds for one to be released.
+        """
+        slots = len(self.devices) or int(os.getenv('PARALLEL_TESTS', '1'))
+        preferred = worker_index(worker_id) % max(slots, 1)
+        candidates = [preferred] + [slot for slot in range(slots) if slot != preferred]
+        if not self.devices:
+            # Without known devices the slot only reserves ports, so any free index will do
+            candidates += range(slots, slots + 64)
+        deadline = time.monotonic() + timeout
+        waiting = False
+        while True:
+            for slot in candidates:
+                lock_file = self._try_lock(slot)
+                if lock_file is None:
+                    continue
+                udid = self.devices[slot] if slot < len(self.devices) else None
+                lease = DeviceLease(slot, udid, lock_file)
+                lock_file.seek(0)
+                lock_file.truncate()
+                lock_file.write(json.dumps(lease.as_dict()))
+                lock_file.flush()
+                logger.info("Leased slot %s (device %s, systemPort %s)", slot, udid or 'default', lease.system_port)
+                return lease
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise RuntimeError(f"No free device slot in {self.lease_dir}; all {slots} devices are leased "
+                                   f"and none was released within {timeout:g}s")
+            if not waiting:
+                logger.info("All %s device slots are leased, waiting up to %gs for one", slots, timeout)
+                waiting = True
+            time.sleep(min(LEASE_POLL_INTERVAL, remaining))
+
+    def release(self, lease: DeviceLease):
+        """Give the lease back so another worker can use the device."""
+        lock_file, lease._lock_file = lease._lock_file, None
+        if lock_file is None:
+            return
+        self._unlock(lock_file)
+        lock_file.close()
+        logger.info("Released slot %s", lease.slot)
+
+    def _try_lock(self, slot: int):
+        lock_file = open(os.path.join(self.lease_dir, f'slot-{slot}.lock'), 'a+')
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            lock_file.close()
+            return None
+        return lock_file
+
+    def _unlock(self, lock_file):
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
@@ -0,0 +1,790 @@
+import base64
+import itertools
+import json
+import logging
+import re
+import struct
+import threading
+import time
+import uuid
+import xml.etree.ElementTree as ET
+import zlib
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from appium.options.android import UiAutomator2Options
+
+logger = logging.getLogger(__name__)
+
+ELEMENT_KEY = 'element-6066-11e4-a52e-4f735466cecf'
+
+APP_PACKAGE = 'io.appium.android.apis'
+MAIN_ACTIVITY = '.ApiDemos'
+
+# The ApiDemos menu tree served by default. Leaves open a screen from SCREENS
+# when one is defined there, otherwise an empty screen.
+API_DEMOS_MENU = {
+    'Accessibility': {'Accessibility Node Provider': None, 'Accessibility Service': None},
+    'Animation': {'Bouncing Balls': None, 'Cloning': None},
+    'App': {'Action Bar': None, 'Activity': None, 'Alarm': None},
+    'Content': {'Assets': None, 'Clipboard': None},
+    'Graphics': {'Arcs': None, 'BitmapDecode': None},
+    'Media': {'AudioFx': None, 'MediaPlayer': None},
+    'NFC': {'ForegroundDispatch': None},
+    'OS': {'Morse Code': None, 'Sensors': None},
+    'Preference': {'1. Preferences from XML': None},
+    'Text': {'KeyEventText': None, 'Linkify': None},
+    # Long enough to need scrolling, like the real Views menu
+    'Views': {
+        'Animation': None, 'Auto Complete': None, 'Buttons': None, 'Chronometer': None, 'Controls': None,
+        'Custom': {'Custom Title': None}, 'Date Widgets': None, 'Drag and Drop': None,
+        'Expandable Lists': None, 'Focus': None, 'Gallery': None, 'Game Controller Input': None,
+        'Grid': None, 'Hover Events': None, 'ImageButton': None, 'ImageSwitcher': None, 'ImageView': None,
+        'Layout Animation': None, 'Layouts': None, 'Lists': None, 'Picker': None, 'Popup Menu': None,
+        'Progress Bar': None, 'Radio Group': None, 'Rating Bar': None, 'Rotating Button': None,
+        'ScrollBars': None, 'Search View': None, 'Secure View': None, 'Seek Bar': None, 'Spinner': None,
+        'Splitting Touches across Views': None, 'Switches': None, 'System UI Visibility': None,
+        'Tabs': None, 'TextClock': None, 'TextFields': None, 'TextSwitcher': None, 'Visibility': None,
+        'WebView': None, 'WebView2': None, 'WebView3': None,
+    },
+}
+
+# Menu list geometry, in screen pixels
+LIST_TOP = 210
+ITEM_HEIGHT = 126
+
+CUSTOM_TITLE_SCREEN = """
+<android.widget.LinearLayout class="android.widget.LinearLayout" bounds="[0,0][1080,2400]">
+  <android.widget.TextView class="android.widget.TextView" resource-id="io.appium.android.apis:id/left_text"
+    text="Left is best" bounds="[0,210][540,336]"/>
+  <android.widget.TextView class="android.widget.TextView" resource-id="io.appium.android.apis:id/right_text"
+    text="Right is always right" bounds="[540,210][1080,336]"/>
+  <android.widget.EditText class="android.widget.EditText" resource-id="io.appium.android.apis:id/left_text_edit"
+    text="Left is best" clickable="true" focusable="true" bounds="[0,400][760,526]"/>
+  <android.widget.Button class="android.widget.Button" resource-id="io.appium.android.apis:id/left_text_button"
+    text="Change Left" content-desc="Change Left" clickable="true" bounds="[760,400][1080,526]"/>
+  <android.widget.EditText class="android.widget.EditText" resource-id="io.appium.android.apis:id/right_text_edit"
+    text="Right is always right" clickable="true" focusable="true" bounds="[0,560][760,686]"/>
+  <android.widget.Button class="android.widget.Button" resource-id="io.appium.android.apis:id/right_text_button"
+    text="Change Right" content-desc="Change Right" clickable="true" bounds="[760,560][1080,686]"/>
+</android.widget.LinearLayout>
+"""
+
+# Leaf screens: name -> (activity, hierarchy fragment)
+SCREENS = {
+    'Custom Title': ('.app.CustomTitle', CUSTOM_TITLE_SCREEN),
+}
+
+# Android KEYCODE_PASTE
+KEYCODE_PASTE = 279
+
+# UiAutomator2 settings of a new session
+DEFAULT_SETTINGS = {
+    'waitForIdleTimeout': 10000,
+    'waitForSelectorTimeout': 10000,
+    'actionAcknowledgmentTimeout': 3000,
+    'ignoreUnimportantViews': False,
+    'allowInvisibleElements': False,
+    'enableMultiWindows': False,
+}
+
+PERFORMANCE_DATA_TYPES = ('cpuinfo', 'memoryinfo', 'batteryinfo', 'networkinfo')
+
+# Logcat entries a session holds until they are fetched
+LOGCAT_CAPACITY = 10000
+LOG_LEVELS = {'V': 'FINEST', 'D': 'FINE', 'I': 'INFO', 'W': 'WARNING', 'E': 'SEVERE', 'F': 'SEVERE'}
+SYSTEM_PID = 1042
+SURFACEFLINGER_PID = 577
+# Process ids handed to app launches
+_pids = itertools.count(20000)
+
+# Failures fail_next() can inject into session commands
+FAULTS = ('disconnect', 'disconnect_after', 'unavailable', 'crash', 'session_gone')
+
+# The step list and timeout ActionBatch writes into its WebdriverIO script
+_SCRIPT_STEPS = re.compile(r'^const steps = (.*);$', re.MULTILINE)
+_SCRIPT_TIMEOUT = re.compile(r'^const timeout = (\d+);$', re.MULTILINE)
+_SELECTOR_CALL = re.compile(r'\.(\w+)\(\s*("(?:[^"\\]|\\.)*"|true|false|-?\d+)\s*\)')
+
+
+def make_png(width: int, height: int, rgb: Tuple[int, int, int] = (250, 250, 250)) -> bytes:
+    """Build a solid-colour PNG without third-party imaging libraries."""
+    row = b'\x00' + bytes(rgb) * width
+    raw = row * height
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) + chunk(b'IDAT', zlib.compress(raw)) + chunk(b'IEND', b'')
+
+
+class W3CError(Exception):
+    def __init__(self, status: int, error: str, message: str):
+        super().__init__(message)
+        self.status = status
+        self.error = error
+        self.message = message
+
+
+class FakeSession:
+    """Navigation state of one session: a stack of rendered screens and their scroll offsets."""
+
+    def __init__(self, server: 'FakeAppiumServer', capabilities: Dict[str, Any]):
+        self.server = server
+        self.id = uuid.uuid4().hex
+        self.capabilities = capabilities
+        self.settings: Dict[str, Any] = dict(DEFAULT_SETTINGS)
+        self.busy_until = 0.0
+        # Performance data reads so far; the app's memory grows a little with each
+        self.perf_reads = 0
+        self.running = True
+        self.clipboard = ''
+        # Text field with input focus, and whether the soft keyboard is up for it
+        self.focused: Optional[ET.Element] = None
+        self.keyboard_shown = False
+        # Logcat entries not fetched yet, bounded like the device's ring buffer
+        self.logcat: deque = deque(maxlen=LOGCAT_CAPACITY)
+        self.pid = 0
+        # [menu path, scroll offset, activity, rendered hierarchy]
+        self._screens: List[list] = []
+        self._elements: Dict[str, ET.Element] = {}
+        self.start_process()
+        self.open_path(())
+
+    @property
+    def activity(self) -> str:
+        return self._screens[-1][2] if self._screens else MAIN_ACTIVITY
+
+    @property
+    def root(self) -> ET.Element:
+        return self._screens[-1][3]
+
+    def open_path(self, path: Tuple[str, ...]):
+        activity, root = self.server.render(path)
+        self._screens.append([path, 0, activity, root])
+        self._register(root)
+
+    def scroll(self, distance: int) -> bool:
+        """Move the list content up by ``distance`` pixels; return whether it moved."""
+        screen = self._screens[-1]
+        offset = min(max(screen[1] + distance, 0), self.server.max_offset(screen[0]))
+        if offset == screen[1]:
+            return False
+        screen[1] = offset
+        screen[2], screen[3] = self.server.render(screen[0], offset)
+        # Scrolling recycles the item views, so earlier handles go stale
+        self._register(screen[3])
+        return True
+
+    def can_scroll(self, direction: int) -> bool:
+        path, offset = self._screens[-1][:2]
+        return offset < self.server.max_offset(path) if direction > 0 else offset > 0
+
+    def scroll_into_view(self, selector: str):
+        """Model UiScrollable.scrollIntoView: rewind to the top, then page down until the target shows.
+
+        Every swipe and every hierarchy check costs a round of device work.
+        """
+        page = (self.server.screen_size[1] - LIST_TOP) // 2
+        target = selector.rsplit('new UiSelector()', 1)[-1]
+
+        def found():
+            self.server.device_work()
+            return any(_selector_matches(node, target) for node in self.root.iter() if node.tag != 'hierarchy')
+
+        if found():
+            return
+        while self.scroll(-page):
+            self.server.device_work()
+        while not found():
+            if not self.scroll(page):
+                return
+            self.server.device_work()
+
+    def back(self):
+        if len(self._screens) > 1:
+            self._screens.pop()
+            self._register(self.root)
+
+    def restart(self):
+        self.start_process()
+        self._screens = []
+        self.open_path(())
+
+    def start_process(self):
+        """Launch the app in a new process, as ActivityManager logs it."""
+        self.pid = next(_pids)
+        self.log(f'Start proc {self.pid}:{APP_PACKAGE}/u0a123 for activity {{{APP_PACKAGE}/{MAIN_ACTIVITY}}}',
+                 tag='ActivityManager', pid=SYSTEM_PID)
+
+    def log(self, message: str, level: str = 'I', tag: str = 'ApiDemos', pid: Optional[int] = None):
+        """Add a ``logcat -v threadtime`` line, by default from the app's process."""
+        now = time.time()
+        pid = self.pid if pid is None else pid
+        stamp = time.strftime('%m-%d %H:%M:%S', time.localtime(now)) + f'.{int(now * 1000) % 1000:03d}'
+        self.logcat.append({'timestamp': int(now * 1000), 'level': LOG_LEVELS.get(level, 'INFO'),
+                            'message': f'{stamp} {pid:5d} {pid:5d} {level} {tag}: {message}'})
+
+    def find(self, using: str, value: str) -> List[str]:
+        nodes = self.server.match(self.root, using, value)
+        ids = {id(node): element_id for element_id, node in self._elements.items()}
+        return [ids[id(node)] for node in nodes if id(node) in ids]
+
+    def element(self, element_id: str) -> ET.Element:
+        node = self._elements.get(element_id)
+        if node is None:
+            raise W3CError(404, 'stale element reference', f'Element {element_id} is no longer attached')
+        return node
+
+    def performance_data(self, data_type: str) -> List[List[str]]:
+        """A ``dumpsys``-derived table like UiAutomator2's getPerformanceData: a header row and a value row."""
+        if data_type not in PERFORMANCE_DATA_TYPES:
+            raise W3CError(500, 'unknown error', f"No performance data of type '{data_type}'. "
+                                                 f"Supported types: {', '.join(PERFORMANCE_DATA_TYPES)}")
+        self.perf_reads += 1
+        if data_type == 'cpuinfo':
+            return [['user', 'kernel'], [str(3 + self.perf_reads * 7 % 5), '1']]
+        if data_type == 'memoryinfo':
+            pss = 48000 + 64 * self.perf_reads
+            return [['totalPrivateDirty', 'nativePrivateDirty', 'dalvikPrivateDirty', 'totalPss', 'nativePss',
+                     'dalvikPss', 'nativeHeapAllocatedSize', 'nativeHeapSize', 'totalRss'],
+                    [str(pss - 12000), '9000', '4000', str(pss), '11000', '6000', '10240', '16384', str(pss + 40000)]]
+        if data_type == 'batteryinfo':
+            return [['power'], ['100']]
+        return [['bucketStart', 'activeTime', 'rxBytes', 'rxPackets', 'txBytes', 'txPackets', 'operations',
+                 'bucketDuration'],
+                ['1760000000000', '0', str(2048 * self.perf_reads), str(2 * self.perf_reads), '512', '1', '0', '3600']]
+
+    def dump_hierarchy(self):
+        """Wait for the screen to go idle, then pay for one accessibility hierarchy dump."""
+        idle_wait = min(self.busy_until - time.time(), self.settings['waitForIdleTimeout'] / 1000)
+        dump = self.server.dump_latency * (0.5 if self.settings['ignoreUnimportantViews'] else 1)
+        if max(idle_wait, 0) + dump > 0:
+            time.sleep(max(idle_wait, 0) + dump)
+
+    def click(self, node: ET.Element):
+        self.busy_until = time.time() + self.server.idle_delay
+        self.log(f"click on {node.get('text') or node.get('content-desc') or node.get('resource-id')}",
+                 tag='ViewRootImpl')
+        # Other processes keep logging too
+        self.log('Composition: 1 layers', level='D', tag='SurfaceFlinger', pid=SURFACEFLINGER_PID)
+        if node.get('class') == 'android.widget.EditText':
+            self.focus(node)
+        path = node.get('menu-path')
+        if path is not None:
+            self.open_path(tuple(json.loads(path)))
+        elif self.server.on_click is not None:
+            self.server.on_click(self, node)
+
+    def focus(self, node: ET.Element):
+        self.focused = node
+        self.keyboard_shown = True
+
+    def click_at(self, x: int, y: int):
+        for node in reversed(list(self.root.iter())):
+            left, top, right, bottom = _bounds(node)
+            if node.get('clickable') == 'true' and left <= x < right and top <= y < bottom:
+                self.click(node)
+                return
+
+    def _register(self, root: ET.Element):
+        screen = len(self._screens)
+        self._elements = {f'{screen}-{index}': node for index, node in enumerate(root.iter())
+                          if node.tag != 'hierarchy'}
+
+
+class FakeAppiumServer:
+    """In-process stand-in for an Appium/UiAutomator2 server.
+
+    Serves the W3C and Appium endpoints the framework uses against a
+    configurable ApiDemos-style hierarchy, with optional per-request latency,
+    so fixtures, page objects and waits can be exercised without a device.
+    """
+
+    def __init__(self, menu: Optional[Dict[str, Any]] = None, screens: Optional[Dict[str, Tuple[str, str]]] = None,
+                 latency: float = 0.0, screen_size: Tuple[int, int] = (1080, 2400), port: int = 0,
+                 execute_driver: bool = False, unsupported_scripts: Tuple[str, ...] = (),
+                 dump_latency: float = 0.0, idle_delay: float = 0.0):
+        self.menu = API_DEMOS_MENU if menu is None else menu
+        self.screens = SCREENS if screens is None else screens
+        self.latency = latency
+        # Seconds a full hierarchy dump takes; a compressed one (ignoreUnimportantViews) takes half
+        self.dump_latency = dump_latency
+        # Seconds the screen animates after a tap; dumps wait for idle, up to waitForIdleTimeout
+        self.idle_delay = idle_delay
+        self.screen_size = screen_size
+        self.execute_driver = execute_driver
+        # ``mobile:`` scripts answered as unknown, to mimic older drivers
+        self.unsupported_scripts = set(unsupported_scripts)
+        # Swipes and hierarchy checks done on the device side, e.g. by UiScrollable
+        self.device_steps = 0
+        self.faults: List[str] = []
+        # Optional ``on_click(session, node)`` hook for screens with custom behaviour
+        self.on_click = None
+        self.sessions: Dict[str, FakeSession] = {}
+        self.requests: List[Tuple[str, str]] = []
+        self.screenshot = base64.b64encode(make_png(*screen_size)).decode('ascii')
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'FakeAppiumServer':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='fake-appium', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> 'FakeAppiumServer':
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def fail_next(self, fault: str, count: int = 1):
+        """Make the next ``count`` session commands fail with one of FAULTS.
+
+        ``disconnect`` drops the connection without answering, ``disconnect_after``
+        runs the command and then drops the connection, ``unavailable``
+        answers 503, ``crash`` reports a crashed UiAutomator2 server and ends the
+        session, ``session_gone`` ends the session before the command runs.
+        """
+        if fault not in FAULTS:
+            raise ValueError(f"Unknown fault {fault!r}, expected one of {FAULTS}")
+        self.faults.extend([fault] * count)
+
+    def device_work(self):
+        self.device_steps += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def max_offset(self, path: Tuple[str, ...]) -> int:
+        """How far the menu list at ``path`` can scroll."""
+        node = self.menu
+        for name in path:
+            node = node.get(name) if isinstance(node, dict) else None
+        if not isinstance(node, dict):
+            return 0
+        return max(0, len(node) * ITEM_HEIGHT - (self.screen_size[1] - LIST_TOP))
+
+    def render(self, path: Tuple[str, ...], offset: int = 0) -> Tuple[str, ET.Element]:
+        """Build the hierarchy for a menu path, with its list scrolled by ``offset`` pixels."""
+        width, height = self.screen_size
+        node = self.menu
+        for name in path:
+            node = node.get(name) if isinstance(node, dict) else None
+        root = ET.Element('hierarchy', {'index': '0', 'class': 'hierarchy', 'rotation': '0',
+                                        'width': str(width), 'height': str(height)})
+        frame = ET.SubElement(root, 'android.widget.FrameLayout', {
+            'class': 'android.widget.FrameLayout', 'package': APP_PACKAGE,
+            'bounds': f'[0,0][{width},{height}]'})
+        if isinstance(node, dict):
+            title = ' / '.join(path) if path else 'API Demos'
+            ET.SubElement(frame, 'android.widget.TextView', {
+                'class': 'android.widget.TextView', 'text': title, 'content-desc': title,
+                'package': APP_PACKAGE, 'bounds': f'[0,80][{width},{LIST_TOP}]'})
+            listing = ET.SubElement(frame, 'android.widget.ListView', {
+                'class': 'android.widget.ListView', 'resource-id': 'android:id/list', 'scrollable': 'true',
+                'package': APP_PACKAGE, 'bounds': f'[0,{LIST_TOP}][{width},{height}]'})
+            for index, name in enumerate(node):
+                top = LIST_TOP + index * ITEM_HEIGHT - offset
+                bottom = top + ITEM_HEIGHT
+                if bottom <= LIST_TOP or top >= height:
+                    # Only views on screen exist in the hierarchy
+                    continue
+                # Partly visible items report their clipped bounds
+                ET.SubElement(listing, 'android.widget.TextView', {
+                    'class': 'android.widget.TextView', 'resource-id': 'android:id/text1', 'text': name,
+                    'content-desc': name, 'clickable': 'true', 'package': APP_PACKAGE,
+                    'bounds': f'[0,{max(top, LIST_TOP)}][{width},{min(bottom, height)}]',
+                    'menu-path': json.dumps(list(path) + [name])})
+            return MAIN_ACTIVITY, root
+        activity, fragment = self.screens.get(path[-1] if path else '', (MAIN_ACTIVITY, '<android.view.View/>'))
+        frame.append(ET.fromstring(fragment))
+        return activity, root
+
+    def match(self, root: ET.Element, using: str, value: str) -> List[ET.Element]:
+        """Resolve a locator against a hierarchy."""
+        nodes = [node for node in root.iter() if node.tag != 'hierarchy']
+        if using == 'id':
+            return [node for node in nodes if _id_matches(node.get('resource-id', ''), value)]
+        if using == 'accessibility id':
+            return [node for node in nodes if node.get('content-desc') == value]
+        if using == 'class name':
+            return [node for node in nodes if node.get('class') == value]
+        if using == 'xpath':
+            try:
+                if '|' in value:
+                    # A union, returned in document order
+                    matched = {id(node) for part in value.split('|') for node in self.match(root, using, part.strip())}
+                    return [node for node in nodes if id(node) in matched]
+                return root.findall('.' + value if value.startswith('/') else value)
+            except SyntaxError as e:
+                raise W3CError(400, 'invalid selector', str(e))
+        if using == '-android uiautomator':
+            return [node for node in nodes if _selector_matches(node, value)]
+        raise W3CError(400, 'invalid selector', f'Locator strategy {using!r} is not supported')
+
+    def page_source(self, session: FakeSession) -> str:
+        root = session.root
+        source = ET.tostring(root, encoding='unicode')
+        return "<?xml version='1.0' encoding='UTF-8' standalone='yes' ?>" + re.sub(r' menu-path="[^"]*"', '', source)
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body go out as separate writes; without this delayed ACKs add ~40ms per command
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                self._dispatch('GET')
+
+            def do_POST(self):
+                self._dispatch('POST')
+
+            def do_DELETE(self):
+                self._dispatch('DELETE')
+
+            def _dispatch(self, method: str):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = json.loads(self.rfile.read(length) or b'{}') if length else {}
+                server.requests.append((method, self.path))
+                if server.latency:
+                    time.sleep(server.latency)
+                fault = server.faults.pop(0) if server.faults and re.match(r'^/session/[^/]+/', self.path) else None
+                if fault == 'disconnect_after':
+                    try:
+                        server._route(method, self.path.rstrip('/'), body)
+                    except W3CError:
+                        pass
+                if fault in ('disconnect', 'disconnect_after'):
+                    self.close_connection = True
+                    return
+                try:
+                    if fault is not None:
+                        server._fault(fault, self.path)
+                    status, value = 200, server._route(method, self.path.rstrip('/'), body)
+                except W3CError as e:
+                    status, value = e.status, {'error': e.error, 'message': e.message, 'stacktrace': ''}
+                payload = json.dumps({'value': value}).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
+
+    def _route(self, method: str, path: str, body: Dict[str, Any]) -> Any:
+        if path == '/status':
+            return {'ready': True, 'message': 'fake appium server', 'build': {'version': 'fake'}}
+        if method == 'POST' and path == '/session':
+            capabilities = body.get('capabilities', {}).get('alwaysMatch', {})
+            session = FakeSession(self, capabilities)
+            self.sessions[session.id] = session
+            return {'sessionId': session.id, 'capabilities': {**capabilities, 'platformName': 'Android'}}
+
+        match = re.match(r'^/session/([^/]+)(/.*)?$', path)
+        if not match:
+            raise W3CError(404, 'unknown command', f'The requested resource could not be found: {path}')
+        session = self.sessions.get(match.group(1))
+        if session is None:
+            raise W3CError(404, 'invalid session id', f'Session {match.group(1)} does not exist')
+        command = match.group(2) or ''
+        if method == 'DELETE' and command == '':
+            del self.sessions[session.id]
+            return None
+        return self._session_command(session, method, command, body)
+
+    def _fault(self, fault: str, path: str):
+        if fault == 'unavailable':
+            raise W3CError(503, 'unknown error', 'Service Unavailable')
+        session_id = path.split('/')[2]
+        self.sessions.pop(session_id, None)
+        if fault == 'crash':
+            raise W3CError(500, 'unknown error',
+                           "An unknown server-side error occurred while processing the command. Original error: "
+                           "'POST /element' cannot be proxied to UiAutomator2 server because the instrumentation "
+                           "process is not running (probably crashed). Check the server log and/or the logcat "
+                           "output for more details")
+
+    def _session_command(self, session: FakeSession, method: str, command: str, body: Dict[str, Any]) -> Any:
+        element = re.match(r'^/element/([^/]+)/(\w+)(?:/(.+))?$', command)
+        if element:
+            node = session.element(element.group(1))
+            return self._element_command(session, node, method, element.group(2), element.group(3), body)
+        if command in ('/element', '/elements', '/source'):
+            session.dump_hierarchy()
+        if command in ('/element', '/elements'):
+            if body.get('using') == '-android uiautomator' and 'scrollIntoView' in body.get('value', ''):
+                session.scroll_into_view(body['value'])
+            ids = session.find(body.get('using'), body.get('value'))
+            if command == '/elements':
+                return [{ELEMENT_KEY: element_id} for element_id in ids]
+            if not ids:
+                raise W3CError(404, 'no such element',
+                               f"An element could not be located on the page using the given search parameters "
+                               f"({body.get('using')}={body.get('value')})")
+            return {ELEMENT_KEY: ids[0]}
+        if command == '/source':
+            return self.page_source(session)
+        if command == '/screenshot':
+            return self.screenshot
+        if command == '/timeouts':
+            return None
+        if command == '/back':
+            session.back()
+            return None
+        if command == '/appium/device/current_activity':
+            return session.activity
+        if command == '/appium/device/current_package':
+            return APP_PACKAGE
+        if command == '/appium/device/terminate_app':
+            session.running = False
+            return True
+        if command == '/appium/device/activate_app':
+            if not session.running:
+                session.running = True
+                session.restart()
+            return None
+        if command == '/appium/device/app_state':
+            return 4 if session.running else 1
+        if command == '/appium/device/set_clipboard':
+            session.clipboard = base64.b64decode(body.get('content', '')).decode('utf-8')
+            return None
+        if command == '/appium/device/hide_keyboard':
+            session.keyboard_shown = False
+            return None
+        if command in ('/se/log', '/log'):
+            # Appium hands out what was logged since the last fetch
+            if body.get('type') != 'logcat':
+                return []
+            entries = list(session.logcat)
+            session.logcat.clear()
+            return entries
+        if command == '/se/log/types':
+            return ['logcat', 'server']
+        if command == '/appium/getPerformanceData':
+            return session.performance_data(body.get('dataType', ''))
+        if command == '/appium/settings':
+            if method == 'POST':
+                session.settings.update(body.get('settings', {}))
+                return None
+            return dict(session.settings)
+        if command == '/appium/execute_driver':
+            if not self.execute_driver:
+                raise W3CError(404, 'unknown command', 'The requested resource could not be found')
+            return {'result': self._execute_driver(session, body.get('script', '')), 'logs': {}}
+        if command == '/execute/sync':
+            return self._execute_script(session, body.get('script', ''), (body.get('args') or [{}])[0])
+        raise W3CError(404, 'unknown command', f'The requested resource could not be found: {command}')
+
+    def _execute_driver(self, session: FakeSession, script: str) -> List[Dict[str, Any]]:
+        """Run an ActionBatch script, step by step, the way its WebdriverIO code does."""
+        steps = _SCRIPT_STEPS.search(script)
+        timeout = _SCRIPT_TIMEOUT.search(script)
+        if not steps or not timeout:
+            raise W3CError(500, 'unknown error', 'The fake server only runs ActionBatch scripts')
+        results = []
+        for step in json.loads(steps.group(1)):
+            started = time.perf_counter()
+            try:
+                value = self._batch_step(session, step, int(timeout.group(1)) / 1000)
+                results.append({'ok': True, 'value': value, 'ms': (time.perf_counter() - started) * 1000})
+            except W3CError as e:
+                results.append({'ok': False, 'error': e.message, 'ms': (time.perf_counter() - started) * 1000})
+                break
+        return results
+
+    def _batch_step(self, session: FakeSession, step: Dict[str, Any], timeout: float) -> Any:
+        action = step.get('action')
+        if action == 'back':
+            session.back()
+            return None
+        if action == 'execute':
+            return self._execute_script(session, step.get('script', ''), step.get('args') or {})
+        if action not in ('click', 'clear', 'send_keys', 'get_text', 'wait_for'):
+            raise W3CError(500, 'unknown error', f'Unknown batch action {action}')
+        deadline = time.monotonic() + timeout
+        while True:
+            session.dump_hierarchy()
+            ids = session.find(step.get('using'), step.get('value'))
+            if ids:
+                break
+            if time.monotonic() >= deadline:
+                raise W3CError(404, 'no such element',
+                               f"Element not found with {step.get('using')}: {step.get('value')}")
+            time.sleep(0.1)
+        node = session.element(ids[0])
+        if action == 'click':
+            return self._element_command(session, node, 'POST', 'click', None, {})
+        if action == 'clear':
+            return self._element_command(session, node, 'POST', 'clear', None, {})
+        if action == 'send_keys':
+            self._element_command(session, node, 'POST', 'clear', None, {})
+            return self._element_command(session, node, 'POST', 'value', None, {'text': step.get('text', '')})
+        if action == 'get_text':
+            return self._element_command(session, node, 'GET', 'text', None, {})
+        return None
+
+    def _element_command(self, session: FakeSession, node: ET.Element, method: str, name: str,
+                         argument: Optional[str], body: Dict[str, Any]) -> Any:
+        if name == 'click':
+            session.click(node)
+            return None
+        if name == 'clear':
+            node.set('text', '')
+            return None
+        if name == 'value':
+            # UiAutomator2 replaces the field's text rather than typing after it
+            node.set('text', body.get('text', ''))
+            session.focus(node)
+            return None
+        if name == 'text':
+            return node.get('text', '')
+        if name == 'displayed':
+            return node.get('displayed', 'true') == 'true'
+        if name == 'enabled':
+            return node.get('enabled', 'true') == 'true'
+        if name == 'attribute':
+            return node.get(argument)
+        if name == 'rect':
+            left, top, right, bottom = _bounds(node)
+            return {'x': left, 'y': top, 'width': right - left, 'height': bottom - top}
+        raise W3CError(404, 'unknown command', f'Element command {name} is not supported')
+
+    def _execute_script(self, session: FakeSession, script: str, args: Dict[str, Any]) -> Any:
+        if script in self.unsupported_scripts:
+            raise W3CError(405, 'unknown method', f"Unsupported execute method '{script}'")
+        if script == 'mobile: clickGesture':
+            session.click_at(int(args.get('x', 0)), int(args.get('y', 0)))
+            return None
+        if script == 'mobile: scrollGesture':
+            direction = 1 if args.get('direction', 'down') == 'down' else -1
+            distance = int(float(args.get('height', 0)) * float(args.get('percent', 1.0)))
+            self.device_work()
+            session.scroll(direction * distance)
+            return session.can_scroll(direction)
+        if script == 'mobile: dragGesture':
+            # The content follows the finger: dragging upwards reveals later items
+            self.device_work()
+            session.scroll(int(args.get('startY', 0)) - int(args.get('endY', 0)))
+            return None
+        if script == 'mobile: clearApp':
+            session.restart()
+            return True
+        if script == 'mobile: startActivity':
+            activity = args.get('intent', '').split('/', 1)[-1]
+            if activity == MAIN_ACTIVITY:
+                session.restart()
+                return None
+            for name, (screen_activity, _fragment) in self.screens.items():
+                if screen_activity == activity:
+                    session.running = True
+                    session.open_path((name,))
+                    return None
+            raise W3CError(500, 'unknown error', f"Error: Activity class {{{args.get('intent')}}} does not exist.")
+        if script == 'mobile: getCurrentActivity':
+            return session.activity
+        if script == 'mobile: getCurrentPackage':
+            return APP_PACKAGE
+        if script == 'mobile: terminateApp':
+            session.running = False
+            return True
+        if script == 'mobile: activateApp':
+            if not session.running:
+                session.running = True
+                session.restart()
+            return None
+        if script == 'mobile: queryAppState':
+            return 4 if session.running else 1
+        if script == 'mobile: getPerformanceData':
+            return session.performance_data(args.get('dataType', ''))
+        if script == 'mobile: getPerformanceDataTypes':
+            return list(PERFORMANCE_DATA_TYPES)
+        if script == 'mobile: replaceElementValue':
+            session.element(args.get('elementId', '')).set('text', args.get('text', ''))
+            return None
+        if script == 'mobile: pressKey':
+            if int(args.get('keycode', 0)) == KEYCODE_PASTE and session.focused is not None:
+                session.focused.set('text', session.focused.get('text', '') + session.clipboard)
+            return None
+        if script == 'mobile: hideKeyboard':
+            shown, session.keyboard_shown = session.keyboard_shown, False
+            return shown
+        if script == 'mobile: isKeyboardShown':
+            return session.keyboard_shown
+        if script.startswith('mobile:'):
+            raise W3CError(405, 'unknown method', f"Unsupported execute method '{script}'")
+        return None
+
+
+def fake_options() -> UiAutomator2Options:
+    """Capabilities of an ApiDemos session on the fake server."""
+    options = UiAutomator2Options()
+    options.platform_name = 'Android'
+    options.app_package = APP_PACKAGE
+    options.app_activity = MAIN_ACTIVITY
+    return options
+
+
+def _bounds(node: ET.Element) -> Tuple[int, int, int, int]:
+    match = re.match(r'\[(-?\d+),(-?\d+)\]\[(-?\d+),(-?\d+)\]', node.get('bounds', ''))
+    return tuple(int(value) for value in match.groups()) if match else (0, 0, 0, 0)
+
+
+def _id_matches(resource_id: str, value: str) -> bool:
+    return resource_id == value or (':' not in value and resource_id.endswith(f':id/{value}'))
+
+
+def _selector_matches(node: ET.Element, selector: str) -> bool:
+    # UiScrollable(...).scrollIntoView(new UiSelector()...) targets the last selector
+    selector = selector.rsplit('new UiSelector()', 1)[-1]
+    for method, raw in _SELECTOR_CALL.findall(selector):
+        value = json.loads(raw) if raw.startswith('"') else raw
+        if method == 'text' and node.get('text') != value:
+            return False
+        if method == 'textContains' and value not in node.get('text', ''):
+            return False
+        if method == 'resourceId' and node.get('resource-id') != value:
+            return False
+        if method == 'resourceIdMatches' and not re.fullmatch(value, node.get('resource-id', '')):
+            return False
+        if method == 'description' and node.get('content-desc') != value:
+            return False
+        if method == 'className' and node.get('class') != value:
+            return False
+        if method == 'scrollable' and (node.get('scrollable') == 'true') != (value == 'true'):
+            return False
+    return True
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Serve a fake ApiDemos Appium server')
+    parser.add_argument('--port', type=int, default=4723)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every request')
+    parser.add_argument('--execute-driver', action='store_true', help='run batch scripts like the plugin does')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    server = FakeAppiumServer(latency=args.latency, port=args.port, execute_driver=args.execute_driver)
+    logger.info("Fake Appium server listening on %s", server.url)
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,294 @@
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+import subprocess
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, NamedTuple, Optional
+
+from appium.options.android import UiAutomator2Options
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+# What was installed on which device, kept between runs; empty turns the cache off
+INSTALL_CACHE = os.getenv('INSTALL_CACHE', './results/install_cache.json')
+
+# Where Appium keeps its drivers; the UiAutomator2 server APKs ship inside the driver
+APPIUM_HOME = os.getenv('APPIUM_HOME') or os.path.join(os.path.expanduser('~'), '.appium')
+
+UIAUTOMATOR2_SERVER_PACKAGES = ('io.appium.uiautomator2.server', 'io.appium.uiautomator2.server.test')
+
+# Server APKs of the installed driver, with and without npm hoisting its dependency
+_SERVER_APK_PATTERNS = (
+    os.path.join('node_modules', 'appium-uiautomator2-driver', 'node_modules', 'appium-uiautomator2-server',
+                 'apks', '*.apk'),
+    os.path.join('node_modules', 'appium-uiautomator2-server', 'apks', '*.apk'),
+)
+
+_PACKAGE_FIELDS = {
+    'version_code': re.compile(r'versionCode=(\d+)'),
+    'version_name': re.compile(r'versionName=(\S+)'),
+    'last_update_time': re.compile(r'lastUpdateTime=([^\r\n]+)'),
+    'signatures': re.compile(r'signatures:\[([^\]]*)\]'),
+}
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DeviceProbe:
+    """Ask a device over adb what is installed on it."""
+
+    def __init__(self, udid: Optional[str], adb: str = 'adb', timeout: float = 15):
+        self.udid = udid
+        self.adb = adb
+        self.timeout = timeout
+
+    def shell(self, *command: str) -> Optional[str]:
+        """Run a shell command on the device; None when adb or the device is unavailable."""
+        args = [self.adb] + (['-s', self.udid] if self.udid else []) + ['shell', *command]
+        try:
+            return subprocess.run(args, capture_output=True, text=True, timeout=self.timeout, check=True).stdout
+        except (OSError, subprocess.SubprocessError) as e:
+            logger.info("adb shell %s failed: %s", ' '.join(command), e)
+            return None
+
+    def boot_id(self) -> Optional[str]:
+        """Changes on every boot of the device."""
+        return self._value('cat', '/proc/sys/kernel/random/boot_id')
+
+    def fingerprint(self) -> Optional[str]:
+        """Identifies the system image, e.g. tells two emulators on one serial apart."""
+        return self._value('getprop', 'ro.build.fingerprint')
+
+    def _value(self, *command: str) -> Optional[str]:
+        output = self.shell(*command)
+        if not output:
+            return None
+        return output.strip() or None
+
+    def package(self, name: str) -> Optional[Dict[str, str]]:
+        """Version code, version name, last update time and signatures of an installed package."""
+        output = self.shell('dumpsys', 'package', name)
+        if output is None:
+            return None
+        info = {}
+        for field, pattern in _PACKAGE_FIELDS.items():
+            match = pattern.search(output)
+            if match:
+                info[field] = match.group(1).strip()
+        # dumpsys prints nothing package-specific for packages that are not installed
+        return info if 'version_code' in info else None
+
+
+class InstallPlan(NamedTuple):
+    """Which install steps a new session on a device can skip."""
+    skip_app: bool
+    skip_server: bool
+    skip_initialization: bool
+
+
+class InstallCache:
+    """Remember what was installed on each device and skip reinstalling it.
+
+    For each device the cache keeps the SHA-256 of every APK installed through
+    it, together with what ``dumpsys package`` reported right after (version
+    code, last update time, signatures). An install is skipped only when the
+    APK on disk still has that digest and the device still reports the same
+    package details. The UiAutomator2 server packages are handled the same
+    way, keyed on the server APKs shipped with the installed driver, and
+    device initialization per boot.
+    """
+
+    def __init__(self, path: str = INSTALL_CACHE, probe_factory=DeviceProbe, appium_home: str = APPIUM_HOME):
+        self.path = path
+        self.probe_factory = probe_factory
+        self.appium_home = appium_home
+        self._lock = threading.Lock()
+        self._devices: Optional[Dict[str, Dict[str, Any]]] = None
+        self._digests: Dict[str, tuple] = {}
+        # Installs confirmed during this run, so repeated checks cost nothing
+        self._verified: Dict[tuple, str] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def digest(self, apk_path: str) -> str:
+        """SHA-256 of an APK, recomputed only when its size or mtime changes."""
+        stat = os.stat(apk_path)
+        key = (stat.st_size, stat.st_mtime_ns)
+        cached = self._digests.get(apk_path)
+        if cached is None or cached[0] != key:
+            cached = (key, file_digest(apk_path))
+            self._digests[apk_path] = cached
+        return cached[1]
+
+    def server_digest(self) -> Optional[str]:
+        """Digest of the UiAutomator2 server APKs the installed driver would push; None when not found."""
+        apks = sorted({path for pattern in _SERVER_APK_PATTERNS
+                       for path in glob.glob(os.path.join(self.appium_home, pattern))})
+        if not apks:
+            return None
+        digest = hashlib.sha256()
+        for apk in apks:
+            digest.update(f"{os.path.basename(apk)}:{self.digest(apk)}\n".encode('utf-8'))
+        return digest.hexdigest()
+
+    def plan(self, udid: Optional[str], apk_path: Optional[str], package: Optional[str]) -> InstallPlan:
+        """Work out which install steps a session on ``udid`` can skip."""
+        if not self.enabled or not udid:
+            return InstallPlan(False, False, False)
+        device = self._device(udid)
+        probe = self.probe_factory(udid)
+        if device.get('fingerprint') and device['fingerprint'] != probe.fingerprint():
+            # Another emulator image answers on this serial now
+            logger.info("Device %s changed since the install cache was written, forgetting it", udid)
+            self.forget(udid)
+            return InstallPlan(False, False, False)
+        skip_app = bool(apk_path and package and os.path.exists(apk_path)
+                        and self.is_installed(udid, package, self.digest(apk_path), probe))
+        server_digest = self.server_digest()
+        skip_server = bool(server_digest) and all(self.is_installed(udid, name, server_digest, probe)
+                                                  for name in UIAUTOMATOR2_SERVER_PACKAGES)
+        skip_initialization = bool(device.get('initialized_boot')) and device['initialized_boot'] == probe.boot_id()
+        return InstallPlan(skip_app, skip_server, skip_initialization)
+
+    def apply(self, options: UiAutomator2Options, udid: Optional[str]) -> InstallPlan:
+        """Drop the install steps ``udid`` does not need from the capabilities."""
+        plan = self.plan(udid, options.app, options.app_package)
+        if plan.skip_app:
+            # Without `app` Appium starts the installed package; noReset=False still clears its data
+            logger.info("%s is up to date on %s, skipping the app install", options.app_package, udid)
+            options.set_capability('app', None)
+        if plan.skip_server:
+            logger.info("UiAutomator2 server is up to date on %s, skipping the server install", udid)
+            options.skip_server_installation = True
+        if plan.skip_initialization:
+            options.skip_device_initialization = True
+        return plan
+
+    def is_installed(self, udid: str, package: str, digest: Optional[str],
+                     probe: Optional[DeviceProbe] = None) -> bool:
+        """Whether the device still has exactly the install recorded for ``digest``."""
+        if not digest:
+            return False
+        if self._verified.get((udid, package)) == digest:
+            return True
+        recorded = self._device(udid).get('packages', {}).get(package)
+        if not recorded or recorded.get('digest') != digest:
+            return False
+        current = (probe or self.probe_factory(udid)).package(package)
+        if current is None or any(current.get(field) != recorded.get(field) for field in _PACKAGE_FIELDS):
+            return False
+        self._verified[(udid, package)] = digest
+        return True
+
+    def confirmed(self, udid: str, package: str) -> bool:
+        """Whether this run already saw ``package`` installed on the device."""
+        return (udid, package) in self._verified
+
+    def record(self, udid: str, package: str, digest: str):
+        """Note that ``package`` with APK ``digest`` is now installed on the device."""
+        info = self.probe_factory(udid).package(package) or {}
+        self._verified[(udid, package)] = digest
+        self._update(udid, lambda device: device.setdefault('packages', {}).__setitem__(
+            package, {'digest': digest, **info}))
+
+    def record_session(self, udid: Optional[str], apk_path: Optional[str], package: Optional[str]):
+        """Record what a successfully started session installed and initialised."""
+        if not self.enabled or not udid:
+            return
+        probe = self.probe_factory(udid)
+        boot_id, fingerprint = probe.boot_id(), probe.fingerprint()
+        if boot_id is None:
+            # No adb access; nothing could be verified next time either
+            return
+        if apk_path and package and os.path.exists(apk_path):
+            self.record(udid, package, self.digest(apk_path))
+        server_digest = self.server_digest()
+        for name in UIAUTOMATOR2_SERVER_PACKAGES:
+            # Without the driver's APKs at hand an upgrade could not be noticed, so nothing is recorded
+            if server_digest and probe.package(name) is not None:
+                self.record(udid, name, server_digest)
+
+        def initialized(device: Dict[str, Any]):
+            device['initialized_boot'] = boot_id
+            device['fingerprint'] = fingerprint
+        self._update(udid, initialized)
+
+    def forget(self, udid: str, package: Optional[str] = None):
+        """Drop what is known about a device, or about one package on it."""
+        for key in [key for key in self._verified if key[0] == udid and package in (None, key[1])]:
+            del self._verified[key]
+        if package is None:
+            self._update(udid, lambda device: device.clear())
+        else:
+            self._update(udid, lambda device: device.get('packages', {}).pop(package, None))
+
+    def _device(self, udid: str) -> Dict[str, Any]:
+        with self._lock:
+            return self._load().get(udid, {})
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self._devices is None:
+            self._devices = self._read()
+        return self._devices
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _update(self, udid: str, change):
+        if not self.enabled:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with self._lock, self._file_lock():
+            # Workers on other devices write the same file; only this device's entry is ours
+            devices = self._read()
+            device = devices.setdefault(udid, {})
+            change(device)
+            self._devices = devices
+            temp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'w') as f:
+                json.dump(devices, f, indent=2)
+            os.replace(temp_path, self.path)
+
+    @contextmanager
+    def _file_lock(self):
+        """Hold an exclusive lock on ``<path>.lock`` across processes while the file is rewritten."""
+        with open(f"{self.path}.lock", 'a+') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+install_cache = InstallCache()
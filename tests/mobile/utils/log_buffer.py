@@ -0,0 +1,112 @@
+import json
+import logging
+import os
+from collections import deque
+from typing import Dict, List, Optional
+
+# 'live' logs to the console as it happens; 'buffered' keeps each test's records and shows them on failure
+LOG_MODES = ('live', 'buffered')
+# Records kept per test in buffered mode; older ones are dropped
+LOG_BUFFER_SIZE = int(os.getenv('LOG_BUFFER_SIZE', '2000'))
+# JSON lines file the logs of failed tests are appended to; empty turns it off
+LOG_JSON = os.getenv('LOG_JSON', '')
+
+LOG_FORMAT = '%(asctime)s [%(levelname)8s] %(message)s (%(filename)s:%(lineno)s)'
+LOG_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Loggers of the framework: everything under tests/ and the root conftest
+FRAMEWORK_LOGGERS = ('tests', 'conftest')
+
+
+class LogBuffer(logging.Handler):
+    """Keep the latest log records of the running test, unformatted.
+
+    Storing a record costs one append; its message is only built, and the
+    record formatted, when the buffer is flushed. Log calls therefore pass
+    their values as arguments (``logger.info("Clicked %s", locator)``) rather
+    than as f-strings, which would be formatted on every call.
+    """
+
+    def __init__(self, capacity: int = LOG_BUFFER_SIZE):
+        super().__init__()
+        self.records = deque(maxlen=capacity)
+        self.dropped = 0
+        self.active = False
+        self.setFormatter(logging.Formatter(LOG_FORMAT, LOG_DATE_FORMAT))
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        # deque.append is thread-safe; skip the handler lock Handler.handle takes
+        if len(self.records) == self.records.maxlen:
+            self.dropped += 1
+        self.records.append(record)
+        return True
+
+    def emit(self, record: logging.LogRecord):
+        self.handle(record)
+
+    def clear(self):
+        self.records.clear()
+        self.dropped = 0
+
+    def text(self) -> str:
+        """The buffered records, formatted like the live console output."""
+        lines = [self.format(record) for record in list(self.records)]
+        if self.dropped:
+            lines.insert(0, f"... {self.dropped} earlier records dropped")
+        return '\n'.join(lines)
+
+    def as_dicts(self, test: Optional[str] = None) -> List[Dict]:
+        """The buffered records as JSON-ready dicts, for CI log ingestion."""
+        entries = []
+        for record in list(self.records):
+            entry = {
+                'test': test,
+                'time': record.created,
+                'level': record.levelname,
+                'logger': record.name,
+                'message': record.getMessage(),
+                'file': record.filename,
+                'line': record.lineno,
+                'thread': record.threadName,
+            }
+            if record.exc_info:
+                entry['exception'] = self.formatter.formatException(record.exc_info)
+            entries.append(entry)
+        return entries
+
+    def write_json(self, path: str, test: Optional[str] = None):
+        """Append the buffered records to a JSON lines file."""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        lines = ''.join(json.dumps(entry, default=str) + '\n' for entry in self.as_dicts(test))
+        # One write per flush, so xdist workers appending to the same file do not interleave lines
+        with open(path, 'a') as f:
+            f.write(lines)
+
+
+framework_log = LogBuffer()
+
+
+def is_framework_record(record: logging.LogRecord) -> bool:
+    return record.name.partition('.')[0] in FRAMEWORK_LOGGERS
+
+
+def exclude_framework_records(handler: logging.Handler):
+    """Keep framework records away from ``handler``, before it formats them."""
+    handler.addFilter(lambda record: not is_framework_record(record))
+
+
+def configure_logging(mode: Optional[str] = None):
+    """Set up logging for the run in ``mode`` (``LOG_MODE`` when not given)."""
+    mode = mode or os.getenv('LOG_MODE', 'live')
+    if mode not in LOG_MODES:
+        raise ValueError(f"Unknown LOG_MODE {mode!r}, expected one of {LOG_MODES}")
+    logging.basicConfig(level=logging.INFO)
+    if mode != 'buffered':
+        return
+    # Framework records go to the buffer only, not to the console handler on the root logger
+    for name in FRAMEWORK_LOGGERS:
+        logger = logging.getLogger(name)
+        logger.setLevel(logging.INFO)
+        logger.addHandler(framework_log)
+        logger.propagate = False
+    framework_log.active = True
@@ -0,0 +1,190 @@
+import logging
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+from collections import deque
+from typing import Iterable, List, Optional, Set, Tuple
+
+from appium.webdriver.webdriver import WebDriver
+from selenium.common.exceptions import WebDriverException
+
+from tests.mobile.utils.retry import execute_directly
+
+logger = logging.getLogger(__name__)
+
+# Collect the app's logcat in the background and attach it to failed tests
+LOGCAT_CAPTURE = os.getenv('LOGCAT_CAPTURE', 'true').lower() == 'true'
+# Seconds between fetches of new entries
+LOGCAT_INTERVAL = float(os.getenv('LOGCAT_INTERVAL', '1'))
+# Entries kept per session; older ones are dropped
+LOGCAT_BUFFER_SIZE = int(os.getenv('LOGCAT_BUFFER_SIZE', '5000'))
+# Seconds of logcat before a failure attached to its report
+LOGCAT_WINDOW = float(os.getenv('LOGCAT_WINDOW', '30'))
+
+# `logcat -v threadtime`: date, time, pid, tid, level, tag: message
+_THREADTIME = re.compile(r'^\S+ \S+\s+(\d+)\s+\d+ [VDIWEFA] ')
+# Commands fetching entries logged since the last fetch; Appium 2 serves the first, older servers the second
+_LOG_COMMANDS = (
+    ('getLogcatSe', 'POST', '/session/$sessionId/se/log'),
+    ('getLogcatLegacy', 'POST', '/session/$sessionId/log'),
+)
+
+
+class PackageFilter:
+    """Tell the lines of one app from the rest of the device's logcat.
+
+    A line is kept when it names the package, or when it was logged by one of
+    the app's processes. Process ids are learned from the lines announcing a
+    new process, so an app restart is followed.
+    """
+
+    def __init__(self, package: str, pids: Iterable[int] = ()):
+        self.package = package
+        self.pids: Set[int] = set(pids)
+        self._started = re.compile(rf'(?:Start proc (\d+):{re.escape(package)}[/:\s]'
+                                   rf'|Process: {re.escape(package)}, PID: (\d+))')
+
+    def __call__(self, line: str) -> bool:
+        if self.package in line:
+            started = self._started.search(line)
+            if started:
+                self.pids.add(int(started.group(1) or started.group(2)))
+            return True
+        match = _THREADTIME.match(line)
+        return match is not None and int(match.group(1)) in self.pids
+
+
+class LogcatCollector:
+    """Fetch a session's new logcat entries in the background and keep the app's latest ones.
+
+    Entries come from the Appium session (``logcat`` log type), which hands
+    out only what was logged since the previous fetch, or, when the server
+    does not serve logs, from ``adb logcat`` streaming on this host. Either
+    way entries are filtered as they arrive and kept in a ring buffer, so
+    memory stays flat however long the session lives.
+    """
+
+    def __init__(self, driver: WebDriver, package: str, udid: Optional[str] = None,
+                 interval: float = LOGCAT_INTERVAL, capacity: int = LOGCAT_BUFFER_SIZE):
+        self.driver = driver
+        self.udid = udid
+        self.interval = interval
+        self.filter = PackageFilter(package)
+        # (host time in seconds, logcat line)
+        self.entries: deque = deque(maxlen=capacity)
+        self.dropped = 0
+        self.source: Optional[str] = None
+        self._command: Optional[str] = None
+        self._adb: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        driver._logcat_collector = self
+
+    def start(self) -> 'LogcatCollector':
+        self._command = self._find_command()
+        if self._command is not None:
+            self.source = 'appium'
+            self._thread = threading.Thread(target=self._poll_loop, name='logcat', daemon=True)
+        elif self.udid and shutil.which('adb'):
+            self.source = 'adb'
+            self._start_adb()
+            self._thread = threading.Thread(target=self._read_adb, name='logcat-adb', daemon=True)
+        else:
+            logger.info("Logcat capture unavailable: the server serves no logs and adb is not installed")
+            return self
+        self._thread.start()
+        logger.info("Collecting logcat of %s from %s", self.filter.package, self.source)
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._adb is not None:
+            self._adb.terminate()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.interval + 5)
+
+    def poll(self):
+        """Fetch what the session logged since the last fetch."""
+        if self._command is None:
+            return
+        with self._lock:
+            try:
+                entries = self._fetch(self._command)
+            except Exception as e:
+                # The session may be on its way out or being replaced; the next fetch catches up
+                logger.debug("Logcat fetch failed: %s", e)
+                return
+            self._take(entries)
+
+    def window(self, start: float, end: Optional[float] = None) -> List[Tuple[float, str]]:
+        """Entries logged between ``start`` and ``end`` (host time, seconds)."""
+        end = time.time() if end is None else end
+        return [(at, line) for at, line in list(self.entries) if start <= at <= end]
+
+    def text(self, start: float, end: Optional[float] = None) -> str:
+        lines = [line for _at, line in self.window(start, end)]
+        if self.dropped and self.entries and self.entries[0][0] > start:
+            lines.insert(0, f"... {self.dropped} earlier entries dropped")
+        return '\n'.join(lines)
+
+    def _take(self, entries: list):
+        now = time.time()
+        for entry in entries:
+            message = entry.get('message', '')
+            if self.filter(message):
+                # Appium stamps entries in milliseconds when it reads them from the device
+                self._add(entry.get('timestamp', now * 1000) / 1000, message)
+
+    def _add(self, at: float, line: str):
+        if len(self.entries) == self.entries.maxlen:
+            self.dropped += 1
+        self.entries.append((at, line))
+
+    def _find_command(self) -> Optional[str]:
+        """The first log command the server answers."""
+        executor = self.driver.command_executor
+        for name, method, path in _LOG_COMMANDS:
+            executor.add_command(name, method, path)
+        for name, _method, _path in _LOG_COMMANDS:
+            try:
+                # Keeps what the session logged so far, such as the app's launch
+                self._take(self._fetch(name))
+                return name
+            except WebDriverException as e:
+                logger.debug("Logcat via %s not served: %s", name, e.msg)
+        return None
+
+    def _fetch(self, command: str) -> list:
+        return execute_directly(self.driver, command, {'type': 'logcat'}).get('value') or []
+
+    def _poll_loop(self):
+        while not self._stopped.wait(self.interval):
+            self.poll()
+
+    def _start_adb(self):
+        try:
+            pids = subprocess.run(['adb', '-s', self.udid, 'shell', 'pidof', self.filter.package],
+                                  capture_output=True, text=True, timeout=10).stdout.split()
+            self.filter.pids.update(int(pid) for pid in pids if pid.isdigit())
+        except (OSError, subprocess.SubprocessError) as e:
+            logger.debug("pidof %s failed: %s", self.filter.package, e)
+        # -T 1 starts at the latest entry instead of replaying the whole buffer
+        self._adb = subprocess.Popen(['adb', '-s', self.udid, 'logcat', '-v', 'threadtime', '-T', '1'],
+                                     stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+                                     errors='replace')
+
+    def _read_adb(self):
+        for line in self._adb.stdout:
+            line = line.rstrip('\n')
+            if self.filter(line):
+                self._add(time.time(), line)
+        self._adb.wait()
+
+
+def collector_of(driver) -> Optional[LogcatCollector]:
+    """Return the logcat collector attached to a driver, if any."""
+    return getattr(driver, '_logcat_collector', None)
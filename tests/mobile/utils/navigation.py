@@ -0,0 +1,239 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple, Type, TypeVar, Union
+
+from appium.webdriver.webdriver import WebDriver
+from selenium.common.exceptions import WebDriverException
+
+from tests.mobile.base.base_page import BasePage
+from tests.mobile.utils.android_utils import AndroidUtils
+
+logger = logging.getLogger(__name__)
+
+NAVIGATION_CACHE = os.getenv('NAVIGATION_CACHE', './results/navigation_routes.json')
+
+# A tap on a page-object locator, e.g. ("ACCESSIBILITY_ID", "Views"); bare strings are accessibility ids
+Step = Tuple[str, str]
+P = TypeVar('P', bound=BasePage)
+
+
+def as_step(step: Union[str, Sequence[str]]) -> Step:
+    return ("ACCESSIBILITY_ID", step) if isinstance(step, str) else (step[0], step[1])
+
+
+def tap_path(driver: WebDriver, path: Sequence[Union[str, Sequence[str]]]):
+    """Tap through a UI path from the current screen."""
+    page = BasePage(driver)
+    for step in path:
+        page.click_element(*as_step(step))
+
+
+class Screen(NamedTuple):
+    """A node of the navigation graph."""
+    name: str
+    activity: Optional[str] = None
+    # Extra `mobile: startActivity` options, e.g. {'extras': [['s', 'key', 'value']]}
+    intent: Optional[Dict[str, Any]] = None
+
+
+class NavigationGraph:
+    """Screens of the app under test and the taps leading from one to another.
+
+    Page objects are added with their ``APP_STATE`` name, optional ``ACTIVITY``
+    and ``INTENT``, and ``NAVIGATION`` (the tap path from the root screen).
+    Shared path prefixes become shared intermediate screens.
+    """
+
+    def __init__(self, root: str = 'main', root_activity: Optional[str] = None):
+        self.root = root
+        self.screens: Dict[str, Screen] = {root: Screen(root, root_activity)}
+        self.edges: Dict[str, Dict[str, Step]] = {root: {}}
+
+    def add_screen(self, screen: Screen):
+        self.screens[screen.name] = screen
+        self.edges.setdefault(screen.name, {})
+
+    def add_edge(self, source: str, target: str, step: Step):
+        self.edges.setdefault(source, {})[target] = step
+
+    def add_page(self, page: Type[BasePage]):
+        name = getattr(page, 'APP_STATE', None)
+        if name is None:
+            raise ValueError(f"{page.__name__} does not declare APP_STATE")
+        screen = Screen(name, getattr(page, 'ACTIVITY', None), getattr(page, 'INTENT', None))
+        if name == self.root:
+            self.screens[name] = screen
+            return
+        path = [as_step(step) for step in getattr(page, 'NAVIGATION', ())]
+        node = self.root
+        for index, step in enumerate(path):
+            target = name if index == len(path) - 1 else '>'.join([self.root] + [s[1] for s in path[:index + 1]])
+            if target not in self.screens:
+                self.add_screen(Screen(target))
+            self.add_edge(node, target, step)
+            node = target
+        self.add_screen(screen)
+
+    def shortest_path(self, source: str, target: str) -> Optional[List[Step]]:
+        """Fewest taps from ``source`` to ``target`` (breadth-first), or None if unreachable."""
+        previous: Dict[str, Tuple[str, Step]] = {}
+        queue = deque([source])
+        seen = {source}
+        while queue:
+            node = queue.popleft()
+            if node == target:
+                steps = []
+                while node != source:
+                    node, step = previous[node]
+                    steps.append(step)
+                return steps[::-1]
+            for neighbour, step in self.edges.get(node, {}).items():
+                if neighbour not in seen:
+                    seen.add(neighbour)
+                    previous[neighbour] = (node, step)
+                    queue.append(neighbour)
+        return None
+
+
+class RouteCache:
+    """Routes that worked, persisted between runs, and direct launches that failed in this run.
+
+    Failed launches are kept in memory only: a launch can fail for a passing
+    reason (a slow device, an app in a bad state), so each run tries it again.
+    """
+
+    def __init__(self, path: str = NAVIGATION_CACHE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._routes: Optional[Dict[str, Dict[str, Any]]] = None
+        self._unlaunchable: Set[str] = set()
+
+    def get(self, target: str) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._load().get(target, {}))
+
+    def record(self, target: str, **route):
+        with self._lock:
+            self._load().setdefault(target, {}).update(route)
+            self._save()
+
+    def launchable(self, target: str) -> bool:
+        """Whether a direct launch of ``target`` is worth trying, i.e. it has not failed in this run."""
+        with self._lock:
+            return target not in self._unlaunchable
+
+    def launch_failed(self, target: str):
+        with self._lock:
+            self._unlaunchable.add(target)
+
+    def forget(self, target: str):
+        with self._lock:
+            if self._load().pop(target, None) is not None:
+                self._save()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self._routes is None:
+            try:
+                with open(self.path) as f:
+                    self._routes = json.load(f)
+            except (OSError, ValueError):
+                self._routes = {}
+        return self._routes
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        # Written atomically; xdist workers may share the file
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(self._routes, f, indent=2)
+        os.replace(temp_path, self.path)
+
+
+navigation_graph = NavigationGraph()
+route_cache = RouteCache()
+
+
+class Navigator:
+    """Take a session to any screen of the graph by the cheapest known route.
+
+    A direct activity (or intent) launch costs one command and is tried first
+    when the screen declares an activity; screens that could not be launched
+    directly are reached by the shortest tap path for the rest of the run,
+    from the current screen when known or from the root.
+    """
+
+    def __init__(self, driver: WebDriver, graph: NavigationGraph = navigation_graph,
+                 cache: RouteCache = route_cache, app_package: Optional[str] = None):
+        self.driver = driver
+        self.graph = graph
+        self.cache = cache
+        self.app_package = app_package or driver.capabilities.get('appPackage') or driver.current_package
+        self.current: Optional[str] = None
+
+    def open(self, page: Type[P]) -> P:
+        """Navigate to a page object's screen and return the page."""
+        self.graph.add_page(page)
+        self.go(page.APP_STATE)
+        return page(self.driver)
+
+    def go(self, target: str):
+        """Navigate to the screen named ``target``."""
+        if target == self.current:
+            return
+        screen = self.graph.screens[target]
+        route = self.cache.get(target)
+        start = time.perf_counter()
+
+        if screen.activity and self.cache.launchable(target):
+            if self.launch(screen):
+                self.cache.record(target, route='activity', seconds=time.perf_counter() - start)
+                self.current = target
+                return
+            logger.info("%s cannot be launched directly, navigating to %s by taps", screen.activity, target)
+            self.cache.launch_failed(target)
+
+        steps, source = self._tap_route(target, route)
+        if source != self.current:
+            self._launch_root()
+        logger.info("Navigating to %s: %s", target, ' > '.join(value for _, value in steps))
+        try:
+            tap_path(self.driver, steps)
+        except WebDriverException:
+            self.cache.forget(target)
+            self.current = None
+            raise
+        self.cache.record(target, route='path', source=source, steps=steps, seconds=time.perf_counter() - start)
+        self.current = target
+
+    def launch(self, screen: Screen) -> bool:
+        """Start a screen's activity; return whether it actually came up."""
+        try:
+            AndroidUtils(self.driver).start_activity(self.app_package, screen.activity, **(screen.intent or {}))
+            current = self.driver.current_activity
+        except WebDriverException as e:
+            logger.info("Starting %s failed: %s", screen.activity, e)
+            return False
+        return current in (screen.activity, f"{self.app_package}{screen.activity}")
+
+    def _tap_route(self, target: str, route: Dict[str, Any]) -> Tuple[List[Step], str]:
+        if route.get('route') == 'path' and route.get('source') in (self.current, self.graph.root):
+            return [tuple(step) for step in route['steps']], route['source']
+        from_root = self.graph.shortest_path(self.graph.root, target)
+        from_current = self.graph.shortest_path(self.current, target) if self.current else None
+        # Starting over costs one launch on top of the taps from the root
+        if from_current is not None and (from_root is None or len(from_current) <= len(from_root) + 1):
+            return from_current, self.current
+        if from_root is None:
+            raise ValueError(f"No route to screen {target!r}")
+        return from_root, self.graph.root
+
+    def _launch_root(self):
+        root = self.graph.screens[self.graph.root]
+        if root.activity is None or not self.launch(root):
+            self.driver.terminate_app(self.app_package)
+            self.driver.activate_app(self.app_package)
+        self.current = self.graph.root
@@ -0,0 +1,243 @@
+import json
+import logging
+import os
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from appium.webdriver.mobilecommand import MobileCommand
+from appium.webdriver.webdriver import WebDriver
+from selenium.common.exceptions import UnknownMethodException
+from selenium.webdriver.remote.command import Command
+
+from tests.mobile.utils.retry import execute_directly
+
+logger = logging.getLogger(__name__)
+
+# Off by default: every sample runs dumpsys on the device
+PERF_SAMPLING = os.getenv('PERF_SAMPLING', 'false').lower() == 'true'
+# Seconds between samples while a test runs
+PERF_INTERVAL = float(os.getenv('PERF_INTERVAL', '2'))
+# Performance data types sampled, out of cpuinfo, memoryinfo, batteryinfo and networkinfo
+PERF_METRICS = tuple(metric.strip() for metric in os.getenv('PERF_METRICS', 'cpuinfo,memoryinfo').split(',')
+                     if metric.strip())
+# Per-test summaries of this run, and the baseline they are compared against
+PERF_OUTPUT = os.getenv('PERF_OUTPUT', './results/perf_summary.json')
+PERF_BASELINE = os.getenv('PERF_BASELINE', './tests/mobile/baselines/perf_baseline.json')
+PERF_UPDATE_BASELINE = os.getenv('PERF_UPDATE_BASELINE', 'false').lower() == 'true'
+# Relative increase of a series' mean or peak over the baseline reported as a regression
+PERF_TOLERANCE = float(os.getenv('PERF_TOLERANCE', '0.2'))
+
+# Series where a higher value is better, e.g. the battery level
+_HIGHER_IS_BETTER = ('batteryinfo.power',)
+
+
+def parse_table(metric: str, table: List[List]) -> Dict[str, float]:
+    """Numeric columns of the latest row of a ``get_performance_data`` table, named ``metric.column``."""
+    if not table or len(table) < 2:
+        return {}
+    values = {}
+    for column, value in zip(table[0], table[-1]):
+        try:
+            values[f"{metric}.{column}"] = float(value)
+        except (TypeError, ValueError):
+            # Empty or textual cells, e.g. a network bucket's start date
+            continue
+    return values
+
+
+def summarize(times: array, values: array) -> Dict[str, float]:
+    """Peak, mean and least-squares slope (per second) of one series."""
+    count = len(values)
+    mean = sum(values) / count
+    slope = 0.0
+    if count > 1:
+        mean_time = sum(times) / count
+        spread = sum((t - mean_time) ** 2 for t in times)
+        if spread:
+            slope = sum((t - mean_time) * (v - mean) for t, v in zip(times, values)) / spread
+    return {'samples': count, 'peak': max(values), 'mean': mean, 'slope': slope}
+
+
+class PerfSampler:
+    """Sample the app's performance data on a background thread while a test runs.
+
+    Each series (one column of one data type, e.g. ``memoryinfo.totalPss``) is
+    a pair of ``array('d')``: seconds since the test started and values. The
+    arrays are cleared at the start of every test, so a session holds at most
+    one test's samples. Between tests the thread is idle and the device is
+    left alone.
+    """
+
+    def __init__(self, driver: WebDriver, package: str, metrics: Tuple[str, ...] = PERF_METRICS,
+                 interval: float = PERF_INTERVAL):
+        self.driver = driver
+        self.package = package
+        self.metrics = metrics
+        self.interval = interval
+        # series name -> (times, values)
+        self.series: Dict[str, Tuple[array, array]] = {}
+        self.failures = 0
+        self._script = True
+        self._test: Optional[str] = None
+        self._start = 0.0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        driver._perf_sampler = self
+
+    def start(self) -> 'PerfSampler':
+        self._thread = threading.Thread(target=self._run, name='perf-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.interval + 5)
+
+    def begin(self, test: str):
+        """Start sampling for ``test``, dropping the previous test's samples."""
+        with self._lock:
+            self.series = {}
+            self._test = test
+            self._start = time.monotonic()
+        # First sample right away, so short tests get one too
+        self._wake.set()
+
+    def end(self) -> Dict[str, Dict[str, float]]:
+        """Stop sampling and summarise each series of the test."""
+        with self._lock:
+            self._test = None
+            summary = {name: summarize(times, values) for name, (times, values) in self.series.items() if values}
+            self.series = {}
+        return summary
+
+    def sample(self):
+        """Read every metric once and add the values to the running test's series."""
+        with self._lock:
+            test, start = self._test, self._start
+        if test is None:
+            return
+        for metric in self.metrics:
+            try:
+                values = parse_table(metric, self._fetch(metric))
+            except Exception as e:
+                # The session may be on its way out or being replaced; the next round catches up
+                self.failures += 1
+                logger.debug("Performance data %s unavailable: %s", metric, e)
+                continue
+            at = time.monotonic() - start
+            with self._lock:
+                if self._test != test:
+                    # The test ended while the device was answering
+                    return
+                for name, value in values.items():
+                    times, series = self.series.setdefault(name, (array('d'), array('d')))
+                    times.append(at)
+                    series.append(value)
+
+    def _fetch(self, metric: str) -> List[List]:
+        args = {'packageName': self.package, 'dataType': metric}
+        if self._script:
+            try:
+                return execute_directly(self.driver, Command.W3C_EXECUTE_SCRIPT,
+                                        {'script': 'mobile: getPerformanceData', 'args': [args]})['value']
+            except UnknownMethodException:
+                # Older UiAutomator2 drivers only have the legacy endpoint
+                self._script = False
+        return execute_directly(self.driver, MobileCommand.GET_PERFORMANCE_DATA,
+                                {**args, 'dataReadTimeout': 5})['value']
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if not self._stopped.is_set():
+                self.sample()
+
+
+def sampler_of(driver) -> Optional[PerfSampler]:
+    """Return the performance sampler attached to a driver, if any."""
+    return getattr(driver, '_perf_sampler', None)
+
+
+def end_samplers(samplers: Dict[str, PerfSampler]) -> Dict[str, Dict[str, float]]:
+    """End every sampler of a test and merge their summaries.
+
+    With more than one sampler (e.g. one per device) each series is prefixed with
+    the sampler's name, such as ``second_driver:memoryinfo.totalPss``, so the
+    drivers' series do not overwrite each other.
+    """
+    if len(samplers) == 1:
+        return next(iter(samplers.values())).end()
+    return {f"{name}:{series}": stats for name, sampler in samplers.items()
+            for series, stats in sampler.end().items()}
+
+
+def compare(summaries: Dict[str, Dict[str, Dict[str, float]]], baseline: Dict[str, Dict[str, Dict[str, float]]],
+            tolerance: float = PERF_TOLERANCE) -> List[Tuple[str, str, str, float, float]]:
+    """Series whose mean or peak got worse than the baseline by more than ``tolerance``.
+
+    Returns (test, series, statistic, baseline value, value) tuples.
+    """
+    regressions = []
+    for test, series in summaries.items():
+        for name, stats in series.items():
+            known = baseline.get(test, {}).get(name)
+            if not known:
+                continue
+            for statistic in ('mean', 'peak'):
+                before, now = known[statistic], stats[statistic]
+                if name in _HIGHER_IS_BETTER:
+                    worse = now < before * (1 - tolerance)
+                else:
+                    worse = before > 0 and now > before * (1 + tolerance)
+                if worse:
+                    regressions.append((test, name, statistic, before, now))
+    return regressions
+
+
+class PerfReport:
+    """Per-test performance summaries of the run."""
+
+    def __init__(self):
+        self.tests: Dict[str, Dict[str, Dict[str, float]]] = {}
+
+    def add(self, test: str, summary: Dict[str, Dict[str, float]]):
+        if summary:
+            self.tests[test] = summary
+
+    def merge(self, tests: Dict[str, Dict[str, Dict[str, float]]]):
+        self.tests.update(tests)
+
+    def baseline(self, path: str = PERF_BASELINE) -> Dict[str, Dict[str, Dict[str, float]]]:
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def regressions(self, path: str = PERF_BASELINE, tolerance: float = PERF_TOLERANCE):
+        return compare(self.tests, self.baseline(path), tolerance)
+
+    def write_json(self, path: str = PERF_OUTPUT):
+        """Write the summaries, with the regressions found against the baseline."""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        regressions = [dict(zip(('test', 'series', 'statistic', 'baseline', 'value'), regression))
+                       for regression in self.regressions()]
+        with open(path, 'w') as f:
+            json.dump({'tests': self.tests, 'regressions': regressions}, f, indent=2)
+
+    def update_baseline(self, path: str = PERF_BASELINE):
+        """Store this run's summaries as the baseline, keeping tests that did not run."""
+        baseline = self.baseline(path)
+        baseline.update(self.tests)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+
+
+perf_report = PerfReport()
@@ -0,0 +1,262 @@
+import http.client
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, TypeVar, Union
+
+from appium.options.common.base import AppiumOptions
+from appium.webdriver.webdriver import WebDriver
+from selenium.common.exceptions import (
+    InvalidSessionIdException,
+    StaleElementReferenceException,
+    WebDriverException,
+)
+from selenium.webdriver.remote.command import Command
+from urllib3.exceptions import HTTPError, MaxRetryError, NewConnectionError
+
+from tests.mobile.utils.command_profiler import command_profiler
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# Retries of one failing command or page action; 0 turns the retry layer off
+RETRY_ATTEMPTS = int(os.getenv('RETRY_ATTEMPTS', '2'))
+# First backoff in seconds, doubled per attempt up to RETRY_MAX_BACKOFF
+RETRY_BACKOFF = float(os.getenv('RETRY_BACKOFF', '0.5'))
+RETRY_MAX_BACKOFF = float(os.getenv('RETRY_MAX_BACKOFF', '4'))
+
+# How a failure is recovered from, by kind
+RECOVERY_ACTIONS = {
+    'stale': 're-find element',
+    'transient': 'retry command',
+    'server_crash': 'new session',
+    'session_gone': 'new session',
+}
+
+# Messages Appium uses when the UiAutomator2 server on the device has died
+_CRASH_MESSAGES = (
+    'instrumentation process is not running',
+    'cannot be proxied to uiautomator2 server',
+    'uiautomator2 server is not running',
+    'could not proxy command to the remote server',
+)
+_SESSION_MESSAGES = (
+    'session is either terminated or not started',
+    'invalid session id',
+)
+_TRANSIENT_MESSAGES = (
+    'socket hang up',
+    'econnreset',
+    'econnrefused',
+    'service unavailable',
+    'bad gateway',
+    'gateway timeout',
+)
+
+# Commands never retried: creating and ending sessions is the healer's own business
+_UNRETRIED = (Command.NEW_SESSION, Command.QUIT)
+# POST commands that only read, so sending them twice is harmless
+_READ_ONLY_POSTS = (Command.FIND_ELEMENT, Command.FIND_ELEMENTS, Command.FIND_CHILD_ELEMENT,
+                    Command.FIND_CHILD_ELEMENTS)
+
+
+def classify(error: BaseException) -> Optional[str]:
+    """Return the kind of a recoverable failure (a RECOVERY_ACTIONS key), or None."""
+    if isinstance(error, StaleElementReferenceException):
+        return 'stale'
+    if isinstance(error, InvalidSessionIdException):
+        return 'session_gone'
+    if isinstance(error, (HTTPError, ConnectionError, TimeoutError, http.client.HTTPException)):
+        return 'transient'
+    if isinstance(error, WebDriverException):
+        message = (error.msg or '').lower()
+        if any(text in message for text in _CRASH_MESSAGES):
+            return 'server_crash'
+        if any(text in message for text in _SESSION_MESSAGES):
+            return 'session_gone'
+        if any(text in message for text in _TRANSIENT_MESSAGES):
+            return 'transient'
+    return None
+
+
+def never_sent(error: BaseException) -> bool:
+    """Whether a failed request never reached the server, e.g. the connection was refused."""
+    if isinstance(error, MaxRetryError):
+        error = error.reason
+    if isinstance(error, (NewConnectionError, ConnectionRefusedError)):
+        return True
+    message = str(error).lower()
+    return 'econnrefused' in message or 'connection refused' in message
+
+
+def is_idempotent(driver: WebDriver, command: str) -> bool:
+    """Whether running ``command`` twice has the same effect as once: GETs and element lookups."""
+    method = (driver.command_executor._commands.get(command) or ('POST',))[0]
+    return method == 'GET' or command in _READ_ONLY_POSTS
+
+
+def backoff(attempt: int) -> float:
+    """Seconds to wait before retry ``attempt`` (1-based)."""
+    return min(RETRY_BACKOFF * 2 ** (attempt - 1), RETRY_MAX_BACKOFF)
+
+
+# Fields of a recovery record, kept flat so workers can ship them to the controller
+RECOVERY_FIELDS = ('test', 'command', 'kind', 'attempts', 'action', 'seconds', 'recovered')
+
+
+class RecoveryLog:
+    """Every failure the retry layer stepped in for, and whether it recovered."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.records: List[list] = []
+        self.current_test: Optional[str] = None
+
+    def record(self, command: str, kind: str, attempts: int, seconds: float, recovered: bool):
+        with self._lock:
+            self.records.append([self.current_test, command, kind, attempts, RECOVERY_ACTIONS[kind],
+                                 seconds, recovered])
+
+    def merge(self, records: List[list]):
+        with self._lock:
+            self.records.extend(records)
+
+    def summary(self) -> Dict[str, Dict[str, int]]:
+        """Count recovered and failed recoveries per failure kind."""
+        kinds: Dict[str, Dict[str, int]] = {}
+        with self._lock:
+            for _test, _command, kind, _attempts, _action, _seconds, recovered in self.records:
+                counts = kinds.setdefault(kind, {'recovered': 0, 'failed': 0})
+                counts['recovered' if recovered else 'failed'] += 1
+        return kinds
+
+
+recovery_log = RecoveryLog()
+
+
+class SessionHealer:
+    """Retry failing commands of one driver and repair its session in place.
+
+    Installs itself as the driver's ``execute``, so page objects, helpers and
+    fixtures all go through it. Transient HTTP and socket errors retry the same
+    command after a bounded backoff, when repeating it is safe: reads and element
+    lookups, or any command whose connection was refused before it reached the
+    server. A tap or typing that failed mid-flight is not repeated, since the
+    server may already have done it. A crashed UiAutomator2 server or a lost
+    session gets a new session on the same driver object (which relaunches the
+    server on the device), then the command is retried. Stale elements are left
+    to the page-level retry (see :func:`retry_stale`), which looks them up again.
+    """
+
+    def __init__(self, driver: WebDriver, capabilities: Union[AppiumOptions, dict],
+                 attempts: int = RETRY_ATTEMPTS, log: RecoveryLog = recovery_log):
+        self.driver = driver
+        self.capabilities = capabilities
+        self.attempts = attempts
+        self.log = log
+        # Called with the driver after a new session, e.g. to navigate back to the test's screen
+        self.on_new_session: Optional[Callable[[WebDriver], None]] = None
+        self.sessions_recreated = 0
+        self._execute = driver.execute
+        self._recreating = False
+        driver.execute = self.execute
+        driver._session_healer = self
+
+    def execute(self, command: str, params: Optional[dict] = None) -> dict:
+        if command in _UNRETRIED or self._recreating:
+            return self._execute(command, params)
+        attempt = 0
+        kind = None
+        start = time.perf_counter()
+        while True:
+            try:
+                # The session id may have changed, and execute() consumes URL parameters
+                sent = {key: value for key, value in (params or {}).items() if key != 'sessionId'}
+                response = self._execute(command, sent)
+            except Exception as e:
+                failure = classify(e)
+                # A transient error may arrive after the server already tapped or typed; only
+                # repeat commands where that is harmless. A crashed server or lost session never ran it.
+                unsafe = failure == 'transient' and not (is_idempotent(self.driver, command) or never_sent(e))
+                if failure is None or failure == 'stale' or unsafe or attempt >= self.attempts:
+                    if attempt:
+                        self._finish(command, kind, attempt, start, recovered=False)
+                    raise
+                kind = kind or failure
+                attempt += 1
+                logger.warning("%s failed (%s: %s), %s %s/%s", command, failure, str(e).splitlines()[0],
+                               RECOVERY_ACTIONS[failure], attempt, self.attempts)
+                time.sleep(backoff(attempt))
+                if failure in ('server_crash', 'session_gone'):
+                    try:
+                        self.new_session()
+                    except Exception as session_error:
+                        logger.error("Re-creating the session failed: %s", session_error)
+                        self._finish(command, kind, attempt, start, recovered=False)
+                        raise e
+                command_profiler.note_retry(attempt)
+                continue
+            if attempt:
+                self._finish(command, kind, attempt, start, recovered=True)
+            return response
+
+    def new_session(self):
+        """Replace the driver's session with a fresh one, keeping the driver object."""
+        previous = self.driver.session_id
+        self._recreating = True
+        try:
+            try:
+                self._execute(Command.QUIT)
+            except Exception:
+                # Usually already gone; that is why we are here
+                pass
+            self.driver.start_session(self.capabilities)
+        finally:
+            self._recreating = False
+        self.sessions_recreated += 1
+        logger.warning("Replaced Appium session %s with %s", previous, self.driver.session_id)
+        if self.on_new_session is not None:
+            self.on_new_session(self.driver)
+
+    def _finish(self, command: str, kind: str, attempts: int, start: float, recovered: bool):
+        command_profiler.note_retry(0)
+        self.log.record(command, kind, attempts, time.perf_counter() - start, recovered)
+
+
+def healer_of(driver: WebDriver) -> Optional[SessionHealer]:
+    """Return the healer installed on a driver, if any."""
+    return getattr(driver, '_session_healer', None)
+
+
+def execute_directly(driver: WebDriver, command: str, params: dict) -> dict:
+    """Send a command straight to the HTTP layer, past the healer and the command profiler.
+
+    For background threads: they must not re-create a session, nor count as the running test's commands.
+    """
+    executor = driver.command_executor
+    response = type(executor).execute(executor, command, {'sessionId': driver.session_id, **params})
+    driver.error_handler.check_response(response)
+    return response
+
+
+def retry_stale(action: Callable[[], T], description: str, attempts: int = RETRY_ATTEMPTS,
+                on_stale: Optional[Callable[[], None]] = None, log: RecoveryLog = recovery_log) -> T:
+    """Run a find-and-act ``action``, running it again when its element went stale."""
+    start = time.perf_counter()
+    for attempt in range(attempts + 1):
+        try:
+            result = action()
+        except StaleElementReferenceException:
+            if attempt == attempts:
+                if attempt:
+                    log.record(description, 'stale', attempt, time.perf_counter() - start, False)
+                raise
+            logger.warning("Element went stale during %s, looking it up again", description)
+            if on_stale is not None:
+                on_stale()
+            continue
+        if attempt:
+            log.record(description, 'stale', attempt, time.perf_counter() - start, True)
+        return result
@@ -0,0 +1,186 @@
+import base64
+import hashlib
+import io
+import logging
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple
+
+from appium.webdriver.webdriver import WebDriver
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is only needed for downscaling
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+SCREENSHOT_DIR = os.getenv('SCREENSHOT_DIR', './results/screenshots')
+SCREENSHOT_WORKERS = int(os.getenv('SCREENSHOT_WORKERS', '2'))
+# Frames waiting to be written; capture() blocks once this many are pending
+SCREENSHOT_MAX_PENDING = int(os.getenv('SCREENSHOT_MAX_PENDING', '16'))
+# Downscale frames wider than this before writing them (0 keeps the device resolution)
+SCREENSHOT_MAX_WIDTH = int(os.getenv('SCREENSHOT_MAX_WIDTH', '0'))
+
+
+class ScreenshotStats:
+    """Counters describing the capture pipeline."""
+
+    def __init__(self):
+        self.captured = 0
+        self.duplicates = 0
+        self.written = 0
+        self.failed = 0
+        self.bytes_written = 0
+        self.max_queue_depth = 0
+        self.blocked_seconds = 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return dict(vars(self))
+
+    def merge(self, data: Dict[str, float]):
+        """Add counters reported by another pipeline (e.g. an xdist worker)."""
+        for key, value in data.items():
+            if key == 'max_queue_depth':
+                self.max_queue_depth = max(self.max_queue_depth, value)
+            else:
+                setattr(self, key, getattr(self, key) + value)
+
+
+class ScreenshotPipeline:
+    """Capture screenshots on the test thread and write them in the background.
+
+    The test thread only fetches the base64 payload and hashes it. Frames that
+    hash the same as the session's previous frame are not decoded again: the
+    previous file is copied to the new name. The others are decoded,
+    optionally downscaled and written by a small worker pool. At most
+    ``max_pending`` frames are held in memory; beyond that ``capture`` waits.
+    """
+
+    def __init__(self, directory: str = SCREENSHOT_DIR, workers: int = SCREENSHOT_WORKERS,
+                 max_pending: int = SCREENSHOT_MAX_PENDING, max_width: int = SCREENSHOT_MAX_WIDTH):
+        self.directory = directory
+        self.workers = workers
+        self.max_width = max_width
+        self.stats = ScreenshotStats()
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._pending: List[Future] = []
+        # Session id -> digest, path and write of its previous frame
+        self._last: Dict[str, Tuple[bytes, str, Future]] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if max_width and Image is None:
+            logger.warning("Pillow is not installed, screenshots are written at full size")
+
+    @property
+    def queue_depth(self) -> int:
+        with self._lock:
+            return sum(not future.done() for future in self._pending)
+
+    def capture(self, driver: WebDriver, filename: str) -> Future:
+        """Queue a screenshot of ``driver`` for writing to ``filename`` and return the write's future.
+
+        Relative names are taken relative to the directory.
+        """
+        payload = driver.get_screenshot_as_base64()
+        digest = hashlib.blake2b(payload.encode('ascii'), digest_size=16).digest()
+        path = os.path.join(self.directory, filename)
+        with self._lock:
+            self.stats.captured += 1
+            previous = self._last.get(driver.session_id)
+            duplicate = previous is not None and previous[0] == digest
+            if duplicate:
+                self.stats.duplicates += 1
+
+        start = time.perf_counter()
+        self._slots.acquire()
+        blocked = time.perf_counter() - start
+        if duplicate:
+            logger.info("Screenshot %s is identical to the previous frame, copying %s", filename, previous[1])
+            future = self._get_executor().submit(self._copy, previous[2], previous[1], path)
+        else:
+            future = self._get_executor().submit(self._write, payload, path)
+        future.add_done_callback(lambda _: self._slots.release())
+        with self._lock:
+            self._last[driver.session_id] = (digest, path, future)
+            self.stats.blocked_seconds += blocked
+            self._pending = [pending for pending in self._pending if not pending.done()]
+            self._pending.append(future)
+            self.stats.max_queue_depth = max(self.stats.max_queue_depth, len(self._pending))
+        return future
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait for every queued frame to be written; return False if some are still pending."""
+        with self._lock:
+            pending = list(self._pending)
+        _, not_done = wait(pending, timeout=timeout)
+        with self._lock:
+            self._pending = [future for future in self._pending if not future.done()]
+        return not not_done
+
+    def forget(self, session_id: Optional[str] = None):
+        """Drop the previous frame of a session, or of every session, e.g. when a test ends."""
+        with self._lock:
+            if session_id is None:
+                self._last.clear()
+            else:
+                self._last.pop(session_id, None)
+
+    def shutdown(self):
+        self.flush()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='screenshot')
+        return self._executor
+
+    def _write(self, payload: str, path: str):
+        try:
+            data = base64.b64decode(payload)
+            if self.max_width and Image is not None:
+                data = self._downscale(data)
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(data)
+        except Exception as e:
+            with self._lock:
+                self.stats.failed += 1
+            logger.error("Failed to write screenshot %s: %s", path, e)
+            raise
+        with self._lock:
+            self.stats.written += 1
+            self.stats.bytes_written += len(data)
+
+    def _copy(self, previous: Future, source: str, path: str):
+        # Submitted after the write of ``source``, so that write has at least started
+        previous.result()
+        try:
+            if os.path.abspath(source) != os.path.abspath(path):
+                os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+                shutil.copyfile(source, path)
+        except Exception as e:
+            with self._lock:
+                self.stats.failed += 1
+            logger.error("Failed to write screenshot %s: %s", path, e)
+            raise
+        with self._lock:
+            self.stats.written += 1
+            self.stats.bytes_written += os.path.getsize(path)
+
+    def _downscale(self, data: bytes) -> bytes:
+        image = Image.open(io.BytesIO(data))
+        if image.width > self.max_width:
+            height = round(image.height * self.max_width / image.width)
+            image = image.resize((self.max_width, height), Image.LANCZOS)
+        out = io.BytesIO()
+        image.save(out, format='PNG', optimize=True)
+        return out.getvalue()
+
+
+screenshot_pipeline = ScreenshotPipeline()
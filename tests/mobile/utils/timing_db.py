@@ -0,0 +1,107 @@
+import heapq
+import os
+import sqlite3
+import statistics
+import time
+from contextlib import closing
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+# SQLite file with each test's past duration (setup, call and teardown); empty turns it off
+TIMING_DB = os.getenv('TIMING_DB', './results/test_durations.sqlite')
+# Seconds assumed for a test when nothing is known about it or its module
+TIMING_DEFAULT = float(os.getenv('TIMING_DEFAULT', '10'))
+
+# Weight of the latest run in a test's stored duration; older runs fade out
+_LATEST_WEIGHT = 0.5
+
+
+def strip_group(nodeid: str) -> str:
+    """A node id without the ``@group`` suffix xdist adds under ``--dist loadgroup``."""
+    if nodeid.rfind('@') > nodeid.rfind(']'):
+        return nodeid.rsplit('@', 1)[0]
+    return nodeid
+
+
+def module_of(nodeid: str) -> str:
+    return nodeid.split('::', 1)[0]
+
+
+class TimingDB:
+    """Per-test durations of past runs, smoothed across runs."""
+
+    def __init__(self, path: str = TIMING_DB):
+        self.path = path
+        self._durations: Optional[Dict[str, float]] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def durations(self) -> Dict[str, float]:
+        """Stored duration of every test seen so far."""
+        if self._durations is None:
+            self._durations = {}
+            if self.enabled and os.path.exists(self.path):
+                try:
+                    with closing(self._connect()) as db:
+                        self._durations = dict(db.execute('SELECT nodeid, duration FROM durations'))
+                except sqlite3.Error:
+                    pass
+        return self._durations
+
+    def estimates(self, nodeids: Iterable[str]) -> Dict[str, float]:
+        """Expected duration of each test.
+
+        Unseen tests get the median of their module's known tests, failing
+        that the median of all known tests, failing that ``TIMING_DEFAULT``.
+        """
+        known = self.durations()
+        by_module: Dict[str, List[float]] = {}
+        for nodeid, duration in known.items():
+            by_module.setdefault(module_of(nodeid), []).append(duration)
+        overall = statistics.median(known.values()) if known else TIMING_DEFAULT
+        module_default = {module: statistics.median(values) for module, values in by_module.items()}
+        return {nodeid: known.get(strip_group(nodeid), module_default.get(module_of(nodeid), overall))
+                for nodeid in nodeids}
+
+    def record(self, durations: Mapping[str, float]):
+        """Fold one run's durations into the stored ones."""
+        if not self.enabled or not durations:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        now = time.time()
+        with closing(self._connect()) as db, db:
+            db.executemany(
+                'INSERT INTO durations (nodeid, duration, runs, updated) VALUES (?, ?, 1, ?) '
+                'ON CONFLICT(nodeid) DO UPDATE SET '
+                f'duration = duration * {1 - _LATEST_WEIGHT} + excluded.duration * {_LATEST_WEIGHT}, '
+                'runs = runs + 1, updated = excluded.updated',
+                [(strip_group(nodeid), duration, now) for nodeid, duration in durations.items()],
+            )
+        self._durations = None
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, timeout=30)
+        db.execute('CREATE TABLE IF NOT EXISTS durations '
+                   '(nodeid TEXT PRIMARY KEY, duration REAL NOT NULL, runs INTEGER NOT NULL, updated REAL NOT NULL)')
+        return db
+
+
+def lpt_assign(units: Mapping[str, float], workers: int) -> Tuple[List[float], Dict[str, int]]:
+    """Assign work units longest first, each to the least loaded worker.
+
+    Returns the predicted load of every worker and the worker of every unit.
+    """
+    loads = [(0.0, worker) for worker in range(max(workers, 1))]
+    assignment = {}
+    for unit, duration in sorted(units.items(), key=lambda item: item[1], reverse=True):
+        load, worker = heapq.heappop(loads)
+        assignment[unit] = worker
+        heapq.heappush(loads, (load + duration, worker))
+    predicted = [0.0] * max(workers, 1)
+    for load, worker in loads:
+        predicted[worker] = load
+    return predicted, assignment
+
+
+timing_db = TimingDB()
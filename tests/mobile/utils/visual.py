@@ -0,0 +1,227 @@
+import io
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+import numpy as np
+from appium.webdriver.webdriver import WebDriver
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+VISUAL_BASELINE_DIR = os.getenv('VISUAL_BASELINE_DIR', './tests/mobile/baselines')
+VISUAL_OUTPUT_DIR = os.getenv('VISUAL_OUTPUT_DIR', './results/visual')
+# Write the current screen as the baseline instead of comparing against it
+VISUAL_UPDATE_BASELINES = os.getenv('VISUAL_UPDATE_BASELINES', 'false').lower() == 'true'
+# A pixel differs when any channel moves by more than this
+VISUAL_PIXEL_TOLERANCE = int(os.getenv('VISUAL_PIXEL_TOLERANCE', '16'))
+# A region fails when more than this fraction of its pixels differ
+VISUAL_THRESHOLD = float(os.getenv('VISUAL_THRESHOLD', '0.001'))
+VISUAL_CACHE_SIZE = int(os.getenv('VISUAL_CACHE_SIZE', '32'))
+STATUS_BAR_HEIGHT = int(os.getenv('STATUS_BAR_HEIGHT', '128'))
+
+# (left, top, right, bottom) in screen pixels; None extends to the screen edge
+Region = Tuple[Optional[int], Optional[int], Optional[int], Optional[int]]
+
+# The status bar holds the clock, battery and notification icons
+STATUS_BAR: Region = (0, 0, None, STATUS_BAR_HEIGHT)
+DEFAULT_IGNORE = (STATUS_BAR,)
+
+# Perceptual hashes further apart than this are different screens; no pixel diff is needed
+HASH_DISTANCE = 10
+
+
+class VisualResult(NamedTuple):
+    name: str
+    passed: bool
+    reason: str
+    hash_distance: int
+    regions: Dict[str, float]
+    elapsed_ms: float
+
+
+def decode_png(data: bytes) -> np.ndarray:
+    """Decode a PNG screenshot into an ``(height, width, 3)`` uint8 array."""
+    return np.asarray(Image.open(io.BytesIO(data)).convert('RGB'))
+
+
+def _slice(region: Region) -> Tuple[slice, slice]:
+    left, top, right, bottom = region
+    return slice(top, bottom), slice(left, right)
+
+
+def ignore_mask(shape: Tuple[int, ...], ignore: Iterable[Region]) -> np.ndarray:
+    """Boolean ``(height, width)`` mask that is True for pixels taking part in comparisons."""
+    mask = np.ones(shape[:2], dtype=bool)
+    for region in ignore:
+        mask[_slice(region)] = False
+    return mask
+
+
+def dhash(pixels: np.ndarray, ignore: Iterable[Region] = (), size: int = 8) -> int:
+    """Difference hash: one bit per horizontally adjacent pair of a ``size`` x ``size + 1`` thumbnail."""
+    height, width = pixels.shape[:2]
+    # Sampling every n-th pixel still leaves ~16 per thumbnail cell and skips most of the frame
+    step = max(1, min(height // (size * 16), width // ((size + 1) * 16)))
+    sample = pixels[::step, ::step]
+    gray = (sample[..., 0] * 0.299 + sample[..., 1] * 0.587 + sample[..., 2] * 0.114).astype(np.uint8)
+    # Blank ignored areas so e.g. the clock does not change the hash
+    gray[~ignore_mask(pixels.shape, ignore)[::step, ::step]] = 0
+    thumbnail = np.asarray(Image.fromarray(gray).resize((size + 1, size), Image.BILINEAR), dtype=np.int16)
+    bits = np.packbits((thumbnail[:, 1:] > thumbnail[:, :-1]).ravel())
+    return int.from_bytes(bits.tobytes(), 'big')
+
+
+def hamming(first: int, second: int) -> int:
+    return bin(first ^ second).count('1')
+
+
+def diff_mask(actual: np.ndarray, baseline: np.ndarray, tolerance: int = VISUAL_PIXEL_TOLERANCE) -> np.ndarray:
+    """Boolean ``(height, width)`` mask of pixels where any channel differs by more than ``tolerance``."""
+    # max - min stays in uint8, avoiding a widening copy of both frames
+    delta = np.maximum(actual, baseline)
+    delta -= np.minimum(actual, baseline)
+    # Reducing the three channel planes directly is much faster than .any(axis=2)
+    changed = delta[..., 0] > tolerance
+    changed |= delta[..., 1] > tolerance
+    changed |= delta[..., 2] > tolerance
+    return changed
+
+
+def compare(name: str, actual: np.ndarray, baseline: np.ndarray, ignore: Iterable[Region] = DEFAULT_IGNORE,
+            regions: Optional[Dict[str, Region]] = None, tolerance: int = VISUAL_PIXEL_TOLERANCE,
+            threshold: float = VISUAL_THRESHOLD, baseline_hash: Optional[int] = None) -> VisualResult:
+    """Compare a frame with its baseline, region by region, outside the ignored areas."""
+    start = time.perf_counter()
+
+    def result(passed: bool, reason: str, distance: int = 0, ratios: Optional[Dict[str, float]] = None):
+        return VisualResult(name, passed, reason, distance, ratios or {}, (time.perf_counter() - start) * 1000)
+
+    if actual.shape != baseline.shape:
+        return result(False, f"size {actual.shape[1]}x{actual.shape[0]} differs from baseline "
+                             f"{baseline.shape[1]}x{baseline.shape[0]}")
+    if np.array_equal(actual, baseline):
+        return result(True, 'identical')
+
+    ignore = tuple(ignore)
+    if baseline_hash is None:
+        baseline_hash = dhash(baseline, ignore)
+    distance = hamming(dhash(actual, ignore), baseline_hash)
+    if distance > HASH_DISTANCE:
+        return result(False, f"different screen (perceptual hash distance {distance})", distance)
+
+    mask = ignore_mask(actual.shape, ignore)
+    changed = diff_mask(actual, baseline, tolerance)
+    changed &= mask
+    ratios = {}
+    for region_name, region in (regions or {'screen': (None, None, None, None)}).items():
+        area = _slice(region)
+        considered = np.count_nonzero(mask[area])
+        ratios[region_name] = float(np.count_nonzero(changed[area]) / considered) if considered else 0.0
+    failed = [region_name for region_name, ratio in ratios.items() if ratio > threshold]
+    if failed:
+        return result(False, f"regions differ: {', '.join(f'{n} {ratios[n]:.2%}' for n in failed)}", distance, ratios)
+    return result(True, 'within tolerance', distance, ratios)
+
+
+class BaselineCache:
+    """Decoded baselines kept in memory across tests, reloaded when the file changes."""
+
+    def __init__(self, directory: str = VISUAL_BASELINE_DIR, max_size: int = VISUAL_CACHE_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[str, Tuple[float, np.ndarray, Dict[tuple, int]]]' = OrderedDict()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.png")
+
+    def get(self, name: str) -> Optional[np.ndarray]:
+        """Return the decoded baseline, or None when it does not exist."""
+        entry = self._entry(name)
+        return entry[1] if entry else None
+
+    def hash(self, name: str, ignore: Tuple[Region, ...]) -> Optional[int]:
+        """Return the baseline's perceptual hash for an ignore set, computing it once."""
+        entry = self._entry(name)
+        if entry is None:
+            return None
+        hashes = entry[2]
+        if ignore not in hashes:
+            hashes[ignore] = dhash(entry[1], ignore)
+        return hashes[ignore]
+
+    def save(self, name: str, data: bytes):
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+        logger.info("Saved visual baseline %s", path)
+
+    def _entry(self, name: str):
+        path = self.path(name)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and entry[0] == mtime:
+                self._entries.move_to_end(name)
+                return entry
+        with open(path, 'rb') as f:
+            entry = (mtime, decode_png(f.read()), {})
+        with self._lock:
+            self._entries[name] = entry
+            self._entries.move_to_end(name)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return entry
+
+
+baseline_cache = BaselineCache()
+
+
+def check_screen(driver: WebDriver, name: str, ignore: Iterable[Region] = DEFAULT_IGNORE,
+                 regions: Optional[Dict[str, Region]] = None, tolerance: int = VISUAL_PIXEL_TOLERANCE,
+                 threshold: float = VISUAL_THRESHOLD, cache: BaselineCache = baseline_cache) -> VisualResult:
+    """Compare the current screen with baseline ``name``, writing the frame and a diff on failure."""
+    data = driver.get_screenshot_as_png()
+    if VISUAL_UPDATE_BASELINES:
+        cache.save(name, data)
+        return VisualResult(name, True, 'baseline updated', 0, {}, 0.0)
+    baseline = cache.get(name)
+    if baseline is None:
+        return VisualResult(name, False, f"no baseline at {cache.path(name)}; "
+                                         f"run with VISUAL_UPDATE_BASELINES=true to create it", 0, {}, 0.0)
+
+    ignore = tuple(ignore)
+    actual = decode_png(data)
+    result = compare(name, actual, baseline, ignore, regions, tolerance, threshold, cache.hash(name, ignore))
+    logger.info("Visual check %s: %s (%.1fms)", name, result.reason, result.elapsed_ms)
+    if not result.passed:
+        _write_failure(name, data, actual, baseline, ignore, tolerance)
+    return result
+
+
+def assert_screen_matches(driver: WebDriver, name: str, **kwargs) -> VisualResult:
+    """Fail the test unless the current screen matches baseline ``name``."""
+    result = check_screen(driver, name, **kwargs)
+    assert result.passed, f"Screen does not match baseline {name}: {result.reason}"
+    return result
+
+
+def _write_failure(name: str, data: bytes, actual: np.ndarray, baseline: np.ndarray,
+                   ignore: Tuple[Region, ...], tolerance: int):
+    os.makedirs(VISUAL_OUTPUT_DIR, exist_ok=True)
+    with open(os.path.join(VISUAL_OUTPUT_DIR, f"{name}.actual.png"), 'wb') as f:
+        f.write(data)
+    if actual.shape != baseline.shape:
+        return
+    # Differing pixels in red over a faded copy of the frame
+    overlay = actual // 3
+    overlay[diff_mask(actual, baseline, tolerance) & ignore_mask(actual.shape, ignore)] = (255, 0, 0)
+    Image.fromarray(overlay).save(os.path.join(VISUAL_OUTPUT_DIR, f"{name}.diff.png"))
@@ -0,0 +1,155 @@
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+from appium.webdriver.webdriver import WebDriver
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException, TimeoutException
+from selenium.webdriver.support import expected_conditions as EC
+
+T = TypeVar('T')
+
+# 'local' polls from the client; 'server' lets the driver's implicit wait poll on the device side
+WAIT_STRATEGY = os.getenv('WAIT_STRATEGY', 'local')
+
+
+def poll_intervals(initial: float = 0.05, maximum: float = 1.0, factor: float = 1.6) -> Iterator[float]:
+    """Yield sleep intervals that start short and back off towards ``maximum``."""
+    interval = initial
+    while True:
+        yield interval
+        interval = min(interval * factor, maximum)
+
+
+class WaitStats:
+    """Time spent waiting, per locator."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[float]] = {}
+
+    def record(self, locator: str, seconds: float, polls: int, timed_out: bool):
+        with self._lock:
+            entry = self._entries.setdefault(locator, [0, 0.0, 0, 0])
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] += polls
+            entry[3] += int(timed_out)
+
+    def slowest(self, limit: int = 10) -> List[Tuple[str, int, float, int, int]]:
+        """Return ``(locator, waits, seconds, polls, timeouts)`` ordered by total time waited."""
+        with self._lock:
+            rows = [(locator, *entry) for locator, entry in self._entries.items()]
+        return sorted(rows, key=lambda row: row[2], reverse=True)[:limit]
+
+    def as_dict(self) -> Dict[str, List[float]]:
+        with self._lock:
+            return {locator: list(entry) for locator, entry in self._entries.items()}
+
+    def merge(self, data: Dict[str, List[float]]):
+        with self._lock:
+            for locator, values in data.items():
+                entry = self._entries.setdefault(locator, [0, 0.0, 0, 0])
+                for index, value in enumerate(values):
+                    entry[index] += value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+wait_stats = WaitStats()
+
+
+def describe_locator(by: str, value: str) -> str:
+    return f"{by}={value}"
+
+
+class SystemClock:
+    """Wall-clock time source used by waits."""
+
+    monotonic = staticmethod(time.monotonic)
+    sleep = staticmethod(time.sleep)
+
+
+system_clock = SystemClock()
+
+
+def clock_for(driver: WebDriver):
+    """Return the clock waits on ``driver`` should use; replayed sessions bring their own."""
+    return getattr(getattr(driver, 'command_executor', None), 'clock', system_clock)
+
+
+class AdaptiveWait:
+    """Explicit wait that honours per-call timeouts and backs off between polls.
+
+    Polls start every 50 ms so elements that are already there, or appear
+    quickly, are found without the fixed half-second delay of WebDriverWait,
+    then slow down to spare the server on long waits. Every wait is recorded
+    in :data:`wait_stats` under its locator.
+    """
+
+    def __init__(self, driver: WebDriver, timeout: float = 10, initial_poll: float = 0.05,
+                 max_poll: float = 1.0, server_side: Optional[bool] = None, stats: WaitStats = wait_stats,
+                 clock=None):
+        self.driver = driver
+        self.timeout = timeout
+        self.initial_poll = initial_poll
+        self.max_poll = max_poll
+        self.server_side = WAIT_STRATEGY == 'server' if server_side is None else server_side
+        self.stats = stats
+        self.clock = clock or clock_for(driver)
+        self.ignored_exceptions = (NoSuchElementException, StaleElementReferenceException)
+
+    def until(self, condition: Callable[[WebDriver], T], message: str = '', timeout: Optional[float] = None,
+              locator: str = 'condition') -> T:
+        """Poll ``condition`` until it returns something truthy or the timeout expires."""
+        timeout = self.timeout if timeout is None else timeout
+        start = self.clock.monotonic()
+        deadline = start + timeout
+        intervals = poll_intervals(self.initial_poll, self.max_poll)
+        polls = 0
+        timed_out = False
+        try:
+            while True:
+                polls += 1
+                try:
+                    value = condition(self.driver)
+                    if value:
+                        return value
+                except self.ignored_exceptions:
+                    pass
+                remaining = deadline - self.clock.monotonic()
+                if remaining <= 0:
+                    timed_out = True
+                    raise TimeoutException(message)
+                self.clock.sleep(min(next(intervals), remaining))
+        finally:
+            self.stats.record(locator, self.clock.monotonic() - start, polls, timed_out)
+
+    def presence(self, by: str, value: str, timeout: Optional[float] = None, message: str = ''):
+        """Wait for an element to be present and return it."""
+        return self._present(by, value, timeout, message)[0]
+
+    def presence_of_all(self, by: str, value: str, timeout: Optional[float] = None, message: str = ''):
+        """Wait for at least one element to be present and return all matches."""
+        return self._present(by, value, timeout, message)
+
+    def _present(self, by: str, value: str, timeout: Optional[float], message: str):
+        timeout = self.timeout if timeout is None else timeout
+        locator = describe_locator(by, value)
+        if not self.server_side:
+            return self.until(EC.presence_of_all_elements_located((by, value)), message, timeout, locator)
+
+        # The driver polls on the device until the implicit wait expires. It is reset
+        # straight away so it never stacks on top of client-side polling.
+        start = self.clock.monotonic()
+        self.driver.implicitly_wait(timeout)
+        try:
+            elements = self.driver.find_elements(by, value)
+        finally:
+            self.driver.implicitly_wait(0)
+        self.stats.record(locator, self.clock.monotonic() - start, 1, not elements)
+        if not elements:
+            raise TimeoutException(message)
+        return elements
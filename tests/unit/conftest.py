@@ -0,0 +1,32 @@
+import pytest
+from appium import webdriver
+
+from tests.mobile.utils import retry
+from tests.mobile.utils.fake_appium_server import FakeAppiumServer, fake_options
+
+
+@pytest.fixture
+def fake_server():
+    """A fresh in-process Appium stand-in per test, so injected faults and sessions do not leak."""
+    with FakeAppiumServer() as server:
+        yield server
+
+
+@pytest.fixture
+def fake_driver(fake_server):
+    """A session on the fake server, on the main screen."""
+    driver = webdriver.Remote(fake_server.url, options=fake_options())
+    try:
+        yield driver
+    finally:
+        try:
+            driver.quit()
+        except Exception:
+            # Tests end sessions on purpose
+            pass
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    """Retry without sleeping."""
+    monkeypatch.setattr(retry, 'RETRY_BACKOFF', 0.0)
@@ -0,0 +1,57 @@
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+from tests.mobile.pages.api_demos_page import ApiDemosPage
+
+ITEM = ("ID", "android:id/text1")
+APP = ("ACCESSIBILITY_ID", "App")
+
+
+def _clicks(fake_server):
+    return [path for method, path in fake_server.requests if path.endswith('/click')]
+
+
+def test_batch_runs_locally_without_the_plugin(fake_server, fake_driver):
+    page = ApiDemosPage(fake_driver)
+
+    with page.batch() as batch:
+        batch.click(*APP)
+        batch.get_text(*ITEM)
+
+    assert not batch.result.remote
+    assert batch.result.ok, batch.result.error
+    assert batch.result.values == [None, "Action Bar"]
+    assert len(_clicks(fake_server)) == 1
+
+
+def test_failed_remote_batch_is_not_run_again_locally(fake_server, fake_driver):
+    page = ApiDemosPage(fake_driver)
+    fake_server.fail_next('unavailable')
+
+    with pytest.raises(WebDriverException, match="Service Unavailable"):
+        page.batch().click(*APP).run()
+
+    # The server may have run the click, so it is not sent again
+    assert _clicks(fake_server) == []
+    assert len(fake_server.sessions[fake_driver.session_id]._screens) == 1
+
+
+def test_batch_runs_remotely_in_one_request(fake_server, fake_driver):
+    fake_server.execute_driver = True
+    page = ApiDemosPage(fake_driver)
+    sent = len(fake_server.requests)
+
+    with page.batch(timeout=1) as batch:
+        batch.click(*APP)
+        batch.get_text(*ITEM)
+        batch.back()
+        batch.click(*APP)
+        batch.click("ACCESSIBILITY_ID", "NoSuchItem")
+        batch.back()
+
+    assert batch.result.remote
+    assert fake_server.requests[sent:] == [('POST', f'/session/{fake_driver.session_id}/appium/execute_driver')]
+    assert batch.result.values == [None, "Action Bar", None, None, None]
+    # The first failure stops the batch
+    assert "NoSuchItem" in batch.result.error
+    assert len(fake_server.sessions[fake_driver.session_id]._screens) == 2
@@ -0,0 +1,132 @@
+import time
+
+import aiohttp
+import pytest
+from appium import webdriver
+from appium.webdriver.common.appiumby import AppiumBy
+from selenium.common.exceptions import InvalidSessionIdException, TimeoutException
+
+from tests.mobile.fixtures.appium_fixture import AppiumHelper
+from tests.mobile.utils import async_appium_client
+from tests.mobile.utils.async_appium_client import AsyncAppiumClient, is_idempotent, run_on_devices
+from tests.mobile.utils.fake_appium_server import fake_options
+from tests.mobile.utils.retry import RecoveryLog, SessionHealer
+
+APP = (AppiumBy.ACCESSIBILITY_ID, "App")
+
+
+@pytest.fixture
+def log(monkeypatch, no_backoff) -> RecoveryLog:
+    log = RecoveryLog()
+    monkeypatch.setattr(async_appium_client, 'recovery_log', log)
+    monkeypatch.setattr(async_appium_client, 'RETRY_ATTEMPTS', 2)
+    return log
+
+
+@pytest.fixture
+def helper(fake_driver, event_loop):
+    helper = AppiumHelper(fake_driver)
+    try:
+        yield helper
+    finally:
+        event_loop.run_until_complete(helper.close())
+
+
+def _clicks(fake_server):
+    return [path for method, path in fake_server.requests if path.endswith('/click')]
+
+
+def test_lookups_and_reads_are_idempotent():
+    assert is_idempotent('GET', '/session/1/source')
+    assert is_idempotent('POST', '/session/1/element')
+    assert is_idempotent('POST', '/session/1/element/2/elements')
+    assert not is_idempotent('POST', '/session/1/element/2/click')
+    assert not is_idempotent('POST', '/session/1/execute/sync')
+    assert not is_idempotent('POST', '/session')
+
+
+def test_transient_error_retries_a_lookup(fake_server, helper, event_loop, log):
+    fake_server.fail_next('unavailable')
+
+    element = event_loop.run_until_complete(helper.session.find_element(*APP))
+
+    assert element.id
+    assert log.summary() == {'transient': {'recovered': 1, 'failed': 0}}
+
+
+def test_transient_error_does_not_repeat_a_click(fake_server, fake_driver, helper, event_loop, log):
+    element = event_loop.run_until_complete(helper.session.find_element(*APP))
+    fake_server.fail_next('disconnect_after')
+
+    with pytest.raises(aiohttp.ClientConnectionError):
+        event_loop.run_until_complete(element.click())
+
+    # The server handled the tap once, and it was not sent again
+    assert len(_clicks(fake_server)) == 1
+    assert len(fake_server.sessions[fake_driver.session_id]._screens) == 2
+    assert log.records == []
+
+
+def test_refused_connection_is_retried_for_any_request(event_loop, log):
+    client = AsyncAppiumClient('http://127.0.0.1:1')
+
+    async def create():
+        try:
+            await client.create_session({})
+        finally:
+            await client.close()
+
+    with pytest.raises(aiohttp.ClientConnectorError):
+        event_loop.run_until_complete(create())
+    # Nothing reached a server, so even a new session is tried again
+    assert log.records[0][1:4] == ['POST /session', 'transient', 2]
+
+
+def test_helper_clicks_and_waits(fake_server, fake_driver, helper, event_loop):
+    event_loop.run_until_complete(helper.find_and_click(APP))
+    event_loop.run_until_complete(helper.wait_for_text("Alarm", timeout=2))
+
+    assert len(fake_server.sessions[fake_driver.session_id]._screens) == 2
+    with pytest.raises(TimeoutException, match="Text not found: Not on any screen"):
+        event_loop.run_until_complete(helper.wait_for_text("Not on any screen", timeout=0.2))
+
+
+def test_helper_follows_a_replaced_session(fake_server, fake_driver, helper, event_loop, no_backoff):
+    previous = helper.session.session_id
+    SessionHealer(fake_driver, fake_options(), attempts=2, log=RecoveryLog())
+    fake_server.fail_next('crash')
+    fake_driver.find_element(*APP)
+
+    event_loop.run_until_complete(helper.find_and_click(APP))
+
+    assert helper.session.session_id == fake_driver.session_id != previous
+    assert len(fake_server.sessions[fake_driver.session_id]._screens) == 2
+
+
+def test_lost_session_is_not_waited_out(fake_server, fake_driver, helper, event_loop):
+    del fake_server.sessions[fake_driver.session_id]
+    start = time.monotonic()
+
+    with pytest.raises(InvalidSessionIdException):
+        event_loop.run_until_complete(helper.find_and_click(APP, timeout=5))
+    assert time.monotonic() - start < 1
+
+
+def test_flows_run_on_several_sessions_at_once(fake_server, event_loop):
+    drivers = [webdriver.Remote(fake_server.url, options=fake_options()) for _ in range(3)]
+    client = AsyncAppiumClient(fake_server.url)
+    helpers = [AppiumHelper(driver, client) for driver in drivers]
+    # A lookup, two state checks and the click: 0.4s per session when run one after another
+    fake_server.latency = 0.1
+    try:
+        start = time.monotonic()
+        event_loop.run_until_complete(run_on_devices(helpers, lambda helper: helper.find_and_click(APP)))
+        elapsed = time.monotonic() - start
+    finally:
+        fake_server.latency = 0
+        event_loop.run_until_complete(client.close())
+        for driver in drivers:
+            driver.quit()
+
+    assert elapsed < 0.8
+    assert len(_clicks(fake_server)) == 3
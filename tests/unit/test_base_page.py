@@ -0,0 +1,51 @@
+import threading
+
+from appium.webdriver.common.appiumby import AppiumBy
+
+from tests.mobile.pages.api_demos_page import ApiDemosPage
+
+ITEM = ("ID", "android:id/text1")
+
+
+def test_text_checks_read_the_screen_again(fake_driver):
+    page = ApiDemosPage(fake_driver)
+    assert page.is_main_screen_displayed()
+
+    # The screen changes behind the page's back, after its snapshot was taken
+    fake_driver.find_element(AppiumBy.ACCESSIBILITY_ID, "App").click()
+
+    assert page.is_text_displayed(*ITEM, "Action Bar", timeout=0)
+    assert not page.is_text_displayed(*ITEM, "Accessibility", timeout=0)
+
+
+def test_text_checks_wait_for_the_text_to_show(fake_server, fake_driver):
+    page = ApiDemosPage(fake_driver)
+    page.snapshot()
+    opener = threading.Timer(0.3, lambda: fake_driver.find_element(AppiumBy.ACCESSIBILITY_ID, "App").click())
+    opener.start()
+    try:
+        assert page.tap_text(*ITEM, "Alarm", timeout=5)
+    finally:
+        opener.join()
+    # App, then the Alarm screen the tap opened
+    assert len(fake_server.sessions[fake_driver.session_id]._screens) == 3
+
+
+def test_text_checks_give_up_at_the_timeout(fake_driver):
+    page = ApiDemosPage(fake_driver)
+
+    assert not page.is_text_displayed(*ITEM, "Not on any screen", timeout=0.2)
+
+
+def test_text_missing_from_the_dump_is_looked_up_right_away(fake_server, fake_driver):
+    page = ApiDemosPage(fake_driver)
+    # The dump leaves the App item's text out, as a compressed one can
+    page_source = fake_server.page_source
+    fake_server.page_source = lambda session: page_source(session).replace('text="App"', 'text=""')
+    dumps = len([path for method, path in fake_server.requests if path.endswith('/source')])
+
+    assert page.tap_text(*ITEM, "App", timeout=5)
+
+    # One fresh dump, then the targeted lookup found it without polling
+    assert len([path for method, path in fake_server.requests if path.endswith('/source')]) == dumps + 1
+    assert len(fake_server.sessions[fake_driver.session_id]._screens) == 2
@@ -0,0 +1,111 @@
+import pytest
+
+from tests.mobile.utils.cassette import Cassette, CassetteMismatch, cassette_path
+
+FIND = ('findElement', {'sessionId': 's1', 'using': 'accessibility id', 'value': 'App'})
+MISSING = {'status': 404, 'value': {'error': 'no such element'}}
+FOUND = {'status': 0, 'value': {'element-6066-11e4-a52e-4f735466cecf': '1-0'}}
+
+
+@pytest.fixture
+def cassette(tmp_path) -> Cassette:
+    cassette = Cassette(str(tmp_path / 'test.json.gz'))
+    cassette.record('newSession', {'capabilities': {'app': '/home/ci/app.apk'}}, {'sessionId': 's1'})
+    for _ in range(3):
+        cassette.record(*FIND, MISSING)
+    cassette.record(*FIND, FOUND)
+    cassette.record('clickElement', {'sessionId': 's1', 'id': '1-0'}, {'value': None})
+    return cassette
+
+
+def _replay(cassette: Cassette) -> Cassette:
+    cassette.save()
+    return Cassette.load(cassette.path)
+
+
+def test_cassette_path_is_a_safe_file_name(tmp_path):
+    assert cassette_path("tests/mobile/android/test_app.py::test_x[a b]", str(tmp_path)) == \
+        str(tmp_path / "tests_mobile_android_test_app.py_test_x_a_b.json.gz")
+
+
+def test_repeated_polls_are_collapsed(cassette):
+    assert [interaction[3] for interaction in cassette.interactions] == [1, 3, 1, 1]
+
+
+def test_replay_serves_the_recorded_responses(cassette):
+    replay = _replay(cassette)
+    # Sessions ids and capabilities may differ between recording and replay
+    assert replay.play('newSession', {'capabilities': {'app': '/tmp/app.apk'}}) == {'sessionId': 's1'}
+    assert [replay.play(*FIND) for _ in range(3)] == [MISSING] * 3
+    assert replay.play(FIND[0], {**FIND[1], 'sessionId': 's2'}) == FOUND
+    assert replay.play('clickElement', {'sessionId': 's2', 'id': '1-0'}) == {'value': None}
+    assert replay.unplayed() == 0
+
+
+def test_replay_absorbs_a_different_number_of_polls(tmp_path):
+    recorded = Cassette(str(tmp_path / 'polls.json.gz'))
+    for _ in range(3):
+        recorded.record('getCurrentActivity', {}, {'value': '.ApiDemos'})
+    recorded.record('back', {}, {'value': None})
+    recorded.record('getCurrentActivity', {}, {'value': '.Launcher'})
+    replay = _replay(recorded)
+
+    # The screen settles sooner than during the recording
+    assert replay.play('getCurrentActivity', {}, 'GET') == {'value': '.ApiDemos'}
+    assert replay.play('back', {}) == {'value': None}
+    # And later than during the recording: the last response stays in effect
+    assert [replay.play('getCurrentActivity', {}, 'GET') for _ in range(2)] == [{'value': '.Launcher'}] * 2
+    assert replay.mismatches == []
+
+
+def test_repeated_click_is_a_mismatch(cassette):
+    replay = _replay(cassette)
+    for command, params, _response, repeat in cassette.interactions:
+        for _ in range(repeat):
+            replay.play(command, params)
+
+    with pytest.raises(CassetteMismatch, match="end of cassette.*clickElement"):
+        replay.play('clickElement', {'sessionId': 's1', 'id': '1-0'})
+    assert len(replay.mismatches) == 1
+
+
+def test_skipped_click_is_a_mismatch(tmp_path):
+    recorded = Cassette(str(tmp_path / 'clicks.json.gz'))
+    recorded.record('clickElement', {'id': '1-0'}, {'value': None})
+    recorded.record('clickElement', {'id': '1-0'}, {'value': None})
+    recorded.record('back', {}, {'value': None})
+    replay = _replay(recorded)
+    replay.play('clickElement', {'id': '1-0'})
+
+    # The recording tapped twice before going back
+    with pytest.raises(CassetteMismatch, match="expected .*clickElement.*got .*back"):
+        replay.play('back', {})
+
+
+def test_divergence_is_reported(cassette):
+    replay = _replay(cassette)
+    replay.play('newSession', {})
+
+    with pytest.raises(CassetteMismatch, match="diverged at interaction 1: expected .*findElement.*got .*back"):
+        replay.play('back', {})
+    assert len(replay.mismatches) == 1
+    assert replay.unplayed() == 3
+
+
+def test_commands_past_the_end_are_a_mismatch(cassette):
+    replay = _replay(cassette)
+    for command, params, _response, repeat in cassette.interactions:
+        for _ in range(repeat):
+            replay.play(command, params)
+
+    with pytest.raises(CassetteMismatch, match="end of cassette"):
+        replay.play('quit', {})
+
+
+def test_other_versions_are_refused(cassette, monkeypatch):
+    from tests.mobile.utils import cassette as module
+    cassette.save()
+    monkeypatch.setattr(module, 'CASSETTE_VERSION', 2)
+
+    with pytest.raises(ValueError, match="has version 1, expected 2"):
+        Cassette.load(cassette.path)
@@ -0,0 +1,79 @@
+import json
+import threading
+import time
+
+import pytest
+
+from tests.mobile.utils.device_allocator import SYSTEM_PORT_BASE, DeviceAllocator, worker_index
+
+
+@pytest.fixture
+def allocator(tmp_path) -> DeviceAllocator:
+    return DeviceAllocator(['emulator-5554', 'emulator-5556'], lease_dir=str(tmp_path))
+
+
+def test_worker_index():
+    assert worker_index('gw3') == 3
+    assert worker_index('master') == 0
+
+
+def test_worker_gets_its_own_slot_and_ports(allocator, tmp_path):
+    lease = allocator.acquire('gw1')
+
+    assert (lease.slot, lease.udid) == (1, 'emulator-5556')
+    assert lease.system_port == SYSTEM_PORT_BASE + 1
+    assert json.loads((tmp_path / 'slot-1.lock').read_text())['udid'] == 'emulator-5556'
+    allocator.release(lease)
+
+
+def test_leased_slot_is_skipped_until_released(allocator, tmp_path):
+    first = allocator.acquire('gw0')
+    # Another process (or run) asking for the same slot gets the free one
+    second = DeviceAllocator(allocator.devices, lease_dir=str(tmp_path)).acquire('gw0')
+    assert (first.slot, second.slot) == (0, 1)
+
+    with pytest.raises(RuntimeError, match="all 2 devices are leased"):
+        allocator.acquire('gw0', timeout=0)
+
+    allocator.release(first)
+    again = allocator.acquire('gw1')
+    assert again.slot == 0
+    for lease in (second, again):
+        allocator.release(lease)
+
+
+def test_busy_devices_are_waited_for(allocator, tmp_path):
+    leases = [allocator.acquire('gw0'), allocator.acquire('gw1')]
+    # Another worker finishes with its device a moment later
+    releaser = threading.Timer(0.3, allocator.release, [leases[1]])
+    releaser.start()
+    try:
+        start = time.monotonic()
+        lease = DeviceAllocator(allocator.devices, lease_dir=str(tmp_path)).acquire('gw2', timeout=5)
+        waited = time.monotonic() - start
+    finally:
+        releaser.join()
+
+    assert lease.slot == 1
+    assert 0.3 <= waited < 5
+    for held in (leases[0], lease):
+        allocator.release(held)
+
+
+def test_wait_for_a_device_is_bounded(allocator):
+    leases = [allocator.acquire('gw0'), allocator.acquire('gw1')]
+    start = time.monotonic()
+
+    with pytest.raises(RuntimeError, match="none was released within 0.2s"):
+        allocator.acquire('gw2', timeout=0.2)
+    assert time.monotonic() - start < 1
+    for lease in leases:
+        allocator.release(lease)
+
+
+def test_release_is_idempotent(allocator):
+    lease = allocator.acquire()
+    allocator.release(lease)
+    allocator.release(lease)
+
+    assert allocator.acquire().slot == lease.slot
@@ -0,0 +1,84 @@
+import pytest
+from appium import webdriver
+
+from tests.mobile.fixtures.driver_pool import DriverPool
+from tests.mobile.utils.fake_appium_server import fake_options
+
+APP_PACKAGE = 'io.appium.android.apis'
+
+
+@pytest.fixture
+def pool(fake_server):
+    pool = DriverPool(lambda: webdriver.Remote(fake_server.url, options=fake_options()),
+                      app_package=APP_PACKAGE, reset_strategy='restart', prewarm=False)
+    try:
+        yield pool
+    finally:
+        pool.shutdown()
+
+
+def _screens(fake_server, driver) -> int:
+    return len(fake_server.sessions[driver.session_id]._screens)
+
+
+def test_unknown_reset_strategy_is_rejected():
+    with pytest.raises(ValueError, match="Unknown reset strategy 'reboot'"):
+        DriverPool(lambda: None, reset_strategy='reboot')
+
+
+def test_healthy_session_is_reused_with_the_app_restarted(fake_server, pool):
+    driver = pool.acquire()
+    driver.find_element('accessibility id', "App").click()
+    assert _screens(fake_server, driver) == 2
+
+    pool.release(driver)
+
+    assert pool.acquire() is driver
+    assert _screens(fake_server, driver) == 1
+    assert pool.stats.sessions_created == 1
+    assert pool.stats.sessions_reused == 1
+
+
+def test_reset_none_keeps_the_screen_and_its_state(fake_server, pool):
+    driver = pool.acquire()
+    driver.find_element('accessibility id', "App").click()
+
+    pool.release(driver, reset='none', state='app_menu')
+
+    assert pool.state == 'app_menu'
+    assert pool.acquire() is driver
+    assert _screens(fake_server, driver) == 2
+
+
+def test_dead_session_is_replaced(fake_server, pool):
+    driver = pool.acquire()
+    pool.release(driver)
+    # The server lost the session while it sat idle
+    fake_server.sessions.pop(driver.session_id)
+
+    assert not pool.is_healthy(driver)
+    replacement = pool.acquire()
+
+    assert replacement.session_id != driver.session_id
+    assert pool.is_healthy(replacement)
+    assert pool.stats.sessions_replaced == 1
+    assert pool.stats.sessions_created == 2
+
+
+def test_discarded_session_is_replaced_in_the_background(fake_server):
+    pool = DriverPool(lambda: webdriver.Remote(fake_server.url, options=fake_options()),
+                      app_package=APP_PACKAGE, reset_strategy='session', prewarm=True)
+    try:
+        driver = pool.acquire()
+        pool.release(driver)
+        assert driver.session_id not in fake_server.sessions
+
+        replacement = pool.acquire()
+
+        assert replacement is not driver
+        assert pool.stats.prewarmed == 1
+        assert pool.stats.sessions_created == 2
+        pool.release(replacement, reset='restart')
+    finally:
+        pool.shutdown()
+    assert fake_server.sessions == {}
@@ -0,0 +1,51 @@
+import pytest
+
+from tests.mobile.base import form_filler
+from tests.mobile.pages.custom_title_page import CustomTitlePage
+
+LEFT = ("ID", "left_text_edit")
+RIGHT = ("ID", "right_text_edit")
+FIELDS = {LEFT: "Left Title", RIGHT: "Right Title"}
+
+
+@pytest.fixture
+def page(fake_driver) -> CustomTitlePage:
+    fake_driver.execute_script('mobile: startActivity', {'intent': f"io.appium.android.apis/{CustomTitlePage.ACTIVITY}"})
+    return CustomTitlePage(fake_driver)
+
+
+def _lookups(fake_server):
+    return [path for method, path in fake_server.requests if path.endswith(('/element', '/elements'))]
+
+
+def test_fields_are_found_with_one_lookup(fake_server, page):
+    page.snapshot()
+    before = len(_lookups(fake_server))
+
+    result = page.fill_form(FIELDS, verify=True)
+
+    assert result.ok and result.method == 'replace'
+    # One XPath union for both fields, told apart by the snapshot
+    assert len(_lookups(fake_server)) == before + 1
+
+
+def test_entry_falls_back_to_the_clipboard_then_to_typing(fake_server, page):
+    fake_server.unsupported_scripts.add('mobile: replaceElementValue')
+    result = page.fill_form(FIELDS, verify=True)
+    assert result.ok and result.method == 'clipboard'
+    assert fake_server.sessions[page.driver.session_id].clipboard == "Right Title"
+
+    fake_server.unsupported_scripts.add('mobile: pressKey')
+    form_filler._entry_methods.pop(page.driver)
+    result = page.fill_form({LEFT: "Typed", RIGHT: "Also typed"}, verify=True)
+    assert result.ok and result.method == 'type'
+
+
+def test_working_method_is_remembered_per_driver(fake_server, page):
+    fake_server.unsupported_scripts.add('mobile: replaceElementValue')
+    page.fill_form(FIELDS)
+    fake_server.unsupported_scripts.clear()
+
+    # The session keeps pasting without trying replaceElementValue again
+    assert page.fill_form({LEFT: "Again", RIGHT: "And again"}, verify=True).method == 'clipboard'
+    assert form_filler._entry_methods[page.driver] == 'clipboard'
@@ -0,0 +1,134 @@
+import threading
+
+import pytest
+
+from tests.mobile.utils.install_cache import UIAUTOMATOR2_SERVER_PACKAGES, InstallCache, InstallPlan
+
+UDID = 'emulator-5554'
+PACKAGE = 'io.appium.android.apis'
+
+
+class FakeProbe:
+    """What `adb shell` would report for one device."""
+
+    def __init__(self):
+        self.boot = 'boot-1'
+        self.image = 'google/sdk_gphone64/emu64a:15'
+        self.packages = {name: {'version_code': '1', 'version_name': '7.0.0', 'last_update_time': '2026-10-01',
+                                'signatures': 'abc'} for name in UIAUTOMATOR2_SERVER_PACKAGES}
+        self.packages[PACKAGE] = {'version_code': '24', 'last_update_time': '2026-10-02', 'signatures': 'def'}
+
+    def boot_id(self):
+        return self.boot
+
+    def fingerprint(self):
+        return self.image
+
+    def package(self, name):
+        return dict(self.packages[name]) if name in self.packages else None
+
+
+@pytest.fixture
+def probe() -> FakeProbe:
+    return FakeProbe()
+
+
+@pytest.fixture
+def apk(tmp_path) -> str:
+    path = tmp_path / 'ApiDemos-debug.apk'
+    path.write_bytes(b'apk v1')
+    return str(path)
+
+
+@pytest.fixture
+def appium_home(tmp_path) -> str:
+    """An Appium home with the UiAutomator2 driver and the server APKs it ships."""
+    apks = tmp_path / 'appium' / 'node_modules' / 'appium-uiautomator2-driver' / 'node_modules'
+    apks = apks / 'appium-uiautomator2-server' / 'apks'
+    apks.mkdir(parents=True)
+    (apks / 'appium-uiautomator2-server-v7.0.0.apk').write_bytes(b'server v7')
+    (apks / 'appium-uiautomator2-server-debug-androidTest.apk').write_bytes(b'server test v7')
+    return str(tmp_path / 'appium')
+
+
+@pytest.fixture
+def cache(tmp_path, probe, apk, appium_home) -> InstallCache:
+    cache = InstallCache(str(tmp_path / 'install_cache.json'), probe_factory=lambda udid: probe,
+                         appium_home=appium_home)
+    cache.record_session(UDID, apk, PACKAGE)
+    # A later run, starting from what the previous one wrote
+    return InstallCache(cache.path, probe_factory=lambda udid: probe, appium_home=appium_home)
+
+
+def test_nothing_is_skipped_without_history(tmp_path, probe, apk):
+    cache = InstallCache(str(tmp_path / 'new.json'), probe_factory=lambda udid: probe)
+
+    assert cache.plan(UDID, apk, PACKAGE) == InstallPlan(False, False, False)
+    assert InstallCache('').plan(UDID, apk, PACKAGE) == InstallPlan(False, False, False)
+    assert cache.plan(None, apk, PACKAGE) == InstallPlan(False, False, False)
+
+
+def test_unchanged_device_skips_every_step(cache, apk):
+    assert cache.plan(UDID, apk, PACKAGE) == InstallPlan(True, True, True)
+    assert cache.confirmed(UDID, PACKAGE)
+
+
+def test_rebuilt_apk_is_installed_again(cache, apk):
+    with open(apk, 'wb') as f:
+        f.write(b'apk v2')
+
+    assert cache.plan(UDID, apk, PACKAGE) == InstallPlan(False, True, True)
+
+
+def test_app_changed_on_the_device_is_installed_again(cache, probe, apk):
+    probe.packages[PACKAGE]['version_code'] = '25'
+    assert not cache.plan(UDID, apk, PACKAGE).skip_app
+
+    del probe.packages[PACKAGE]
+    assert not cache.plan(UDID, apk, PACKAGE).skip_app
+
+
+def test_reboot_initializes_the_device_again(cache, probe, apk):
+    probe.boot = 'boot-2'
+
+    assert cache.plan(UDID, apk, PACKAGE) == InstallPlan(True, True, False)
+
+
+def test_other_system_image_forgets_the_device(cache, probe, apk):
+    probe.image = 'google/sdk_gphone64/emu64a:14'
+
+    assert cache.plan(UDID, apk, PACKAGE) == InstallPlan(False, False, False)
+    assert cache._device(UDID) == {}
+
+
+def test_upgraded_driver_installs_its_server_again(cache, apk, appium_home):
+    # The device still has the old server, unchanged, but the driver now ships another one
+    apks = f"{appium_home}/node_modules/appium-uiautomator2-driver/node_modules/appium-uiautomator2-server/apks"
+    with open(f"{apks}/appium-uiautomator2-server-v7.0.0.apk", 'wb') as f:
+        f.write(b'server v7.1')
+
+    assert cache.plan(UDID, apk, PACKAGE) == InstallPlan(True, False, True)
+
+
+def test_server_is_installed_when_the_driver_cannot_be_found(tmp_path, probe, apk):
+    cache = InstallCache(str(tmp_path / 'install_cache.json'), probe_factory=lambda udid: probe,
+                         appium_home=str(tmp_path / 'remote-appium'))
+    cache.record_session(UDID, apk, PACKAGE)
+
+    assert cache.plan(UDID, apk, PACKAGE) == InstallPlan(True, False, True)
+
+
+def test_workers_writing_at_once_keep_each_others_devices(tmp_path, probe, apk):
+    path = str(tmp_path / 'install_cache.json')
+    # One cache per worker process, each recording its own device
+    caches = [InstallCache(path, probe_factory=lambda udid: probe) for _ in range(8)]
+    threads = [threading.Thread(target=cache.record_session, args=(f'emulator-{5554 + 2 * n}', apk, PACKAGE))
+               for n, cache in enumerate(caches)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    devices = InstallCache(path)._read()
+    assert sorted(devices) == sorted(f'emulator-{5554 + 2 * n}' for n in range(8))
+    assert all(device['packages'][PACKAGE]['digest'] for device in devices.values())
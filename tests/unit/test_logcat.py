@@ -0,0 +1,40 @@
+from tests.mobile.utils.logcat import PackageFilter
+
+PACKAGE = 'io.appium.android.apis'
+
+
+def _line(pid: int, message: str, tag: str = 'ActivityManager') -> str:
+    return f"10-18 09:15:02.123  {pid}  {pid + 1} I {tag}: {message}"
+
+
+def test_lines_naming_the_package_are_kept():
+    keep = PackageFilter(PACKAGE)
+
+    assert keep(_line(500, f"Displayed {PACKAGE}/.ApiDemos: +412ms"))
+    assert not keep(_line(577, "Composition: 3 layers", tag='SurfaceFlinger'))
+
+
+def test_app_processes_are_learned_from_their_start():
+    keep = PackageFilter(PACKAGE)
+    assert not keep(_line(4321, "onBindViewHolder position=3", tag='RecyclerView'))
+
+    keep(_line(500, f"Start proc 4321:{PACKAGE}/u0a190 for activity {{{PACKAGE}/.ApiDemos}}"))
+
+    assert keep.pids == {4321}
+    assert keep(_line(4321, "onBindViewHolder position=3", tag='RecyclerView'))
+
+
+def test_crashed_process_is_followed():
+    keep = PackageFilter(PACKAGE, pids=[4321])
+
+    keep(f"10-18 09:15:03.000  4400  4400 E AndroidRuntime: Process: {PACKAGE}, PID: 4400")
+
+    assert keep.pids == {4321, 4400}
+    assert not keep("--------- beginning of crash")
+
+
+def test_other_apps_are_left_out():
+    keep = PackageFilter(PACKAGE)
+
+    assert not keep(_line(500, "Start proc 999:com.android.settings/1000 for service"))
+    assert keep.pids == set()
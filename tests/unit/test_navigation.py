@@ -0,0 +1,66 @@
+import pytest
+from appium import webdriver
+
+from tests.mobile.pages.api_demos_page import ApiDemosPage
+from tests.mobile.pages.custom_title_page import CustomTitlePage
+from tests.mobile.utils.fake_appium_server import FakeAppiumServer, fake_options
+from tests.mobile.utils.navigation import NavigationGraph, Navigator, RouteCache
+
+
+@pytest.fixture
+def flaky_launch_server():
+    """A server whose `mobile: startActivity` fails until the test lets it through."""
+    with FakeAppiumServer(unsupported_scripts=('mobile: startActivity',)) as server:
+        yield server
+
+
+def test_routes_are_kept_between_runs(tmp_path):
+    path = str(tmp_path / "results" / "routes.json")
+    cache = RouteCache(path)
+    cache.record("custom_title", route='path', source='main', steps=[["ACCESSIBILITY_ID", "App"]])
+    cache.record("custom_title", seconds=1.5)
+
+    next_run = RouteCache(path)
+    assert next_run.get("custom_title") == {'route': 'path', 'source': 'main', 'steps': [["ACCESSIBILITY_ID", "App"]],
+                                            'seconds': 1.5}
+    next_run.forget("custom_title")
+    assert RouteCache(path).get("custom_title") == {}
+
+
+def test_unreadable_cache_starts_empty(tmp_path):
+    path = tmp_path / "routes.json"
+    path.write_text("{not json")
+
+    assert RouteCache(str(path)).get("main") == {}
+
+
+def _navigator(driver, cache) -> Navigator:
+    graph = NavigationGraph()
+    graph.add_page(ApiDemosPage)
+    return Navigator(driver, graph, cache)
+
+
+def test_failed_launch_is_only_remembered_for_the_run(flaky_launch_server, tmp_path):
+    path = str(tmp_path / "routes.json")
+    driver = webdriver.Remote(flaky_launch_server.url, options=fake_options())
+    try:
+        cache = RouteCache(path)
+        _navigator(driver, cache).open(CustomTitlePage)
+        assert not cache.launchable(CustomTitlePage.APP_STATE)
+        assert cache.get(CustomTitlePage.APP_STATE)['route'] == 'path'
+
+        # The rest of the run taps its way there without trying the launch again
+        navigator = _navigator(driver, cache)
+        launch, launched = navigator.launch, []
+        navigator.launch = lambda screen: launched.append(screen.name) or launch(screen)
+        navigator.open(CustomTitlePage)
+        assert CustomTitlePage.APP_STATE not in launched
+
+        # The next run tries the launch again, and it works now
+        flaky_launch_server.unsupported_scripts.clear()
+        next_run = RouteCache(path)
+        assert next_run.launchable(CustomTitlePage.APP_STATE)
+        _navigator(driver, next_run).open(CustomTitlePage)
+        assert next_run.get(CustomTitlePage.APP_STATE)['route'] == 'activity'
+    finally:
+        driver.quit()
@@ -0,0 +1,92 @@
+from array import array
+
+import pytest
+from appium import webdriver
+
+from tests.mobile.utils.fake_appium_server import fake_options
+from tests.mobile.utils.perf_sampler import PerfSampler, compare, end_samplers, parse_table, summarize
+
+PACKAGE = 'io.appium.android.apis'
+
+
+@pytest.fixture
+def sampler(fake_driver) -> PerfSampler:
+    # Sampled by hand, without the background thread
+    return PerfSampler(fake_driver, PACKAGE, metrics=('memoryinfo', 'batteryinfo'))
+
+
+def test_latest_row_numeric_columns_are_kept():
+    table = [['bucketStart', 'rxBytes', 'label'], ['1', '100', 'old'], ['2', '300', 'wifi']]
+
+    assert parse_table('networkinfo', table) == {'networkinfo.bucketStart': 2.0, 'networkinfo.rxBytes': 300.0}
+    assert parse_table('cpuinfo', [['user', 'kernel']]) == {}
+    assert parse_table('cpuinfo', []) == {}
+
+
+def test_summary_has_peak_mean_and_slope():
+    summary = summarize(array('d', [0, 1, 2, 3]), array('d', [10, 12, 14, 16]))
+
+    assert summary == {'samples': 4, 'peak': 16, 'mean': 13, 'slope': 2}
+    assert summarize(array('d', [0]), array('d', [5]))['slope'] == 0
+
+
+def test_regressions_respect_the_direction_of_each_series():
+    baseline = {'t': {'memoryinfo.totalPss': {'mean': 100, 'peak': 120},
+                      'batteryinfo.power': {'mean': 100, 'peak': 100}}}
+    run = {'t': {'memoryinfo.totalPss': {'mean': 130, 'peak': 125},
+                 'batteryinfo.power': {'mean': 70, 'peak': 130}}}
+
+    assert compare(run, baseline, tolerance=0.2) == [
+        ('t', 'memoryinfo.totalPss', 'mean', 100, 130),
+        # A falling battery level is the regression; a higher one is not
+        ('t', 'batteryinfo.power', 'mean', 100, 70),
+    ]
+    assert compare(run, {}, tolerance=0.2) == []
+
+
+def test_samples_are_summarised_per_test(sampler):
+    sampler.begin('test_a')
+    sampler.sample()
+    sampler.sample()
+    summary = sampler.end()
+
+    assert summary['memoryinfo.totalPss']['samples'] == 2
+    assert summary['memoryinfo.totalPss']['slope'] > 0
+    assert summary['batteryinfo.power']['mean'] == 100
+    # Between tests nothing is sampled
+    sampler.sample()
+    assert sampler.end() == {}
+
+
+def test_sample_answered_after_its_test_ended_is_dropped(sampler):
+    fetch = sampler._fetch
+
+    def slow_fetch(metric):
+        # The test ends, and the next one begins, while the device is answering
+        table = fetch(metric)
+        sampler.end()
+        sampler.begin('test_b')
+        return table
+
+    sampler.begin('test_a')
+    sampler._fetch = slow_fetch
+    sampler.sample()
+    sampler._fetch = fetch
+
+    assert sampler.end() == {}
+
+
+def test_several_drivers_keep_their_own_series(fake_server, fake_driver):
+    other = webdriver.Remote(fake_server.url, options=fake_options())
+    try:
+        samplers = {'driver': PerfSampler(fake_driver, PACKAGE, metrics=('batteryinfo',)),
+                    'second_driver': PerfSampler(other, PACKAGE, metrics=('batteryinfo',))}
+        for sampler in samplers.values():
+            sampler.begin('test_a')
+            sampler.sample()
+
+        summary = end_samplers(samplers)
+    finally:
+        other.quit()
+
+    assert sorted(summary) == ['driver:batteryinfo.power', 'second_driver:batteryinfo.power']
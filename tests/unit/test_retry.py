@@ -0,0 +1,148 @@
+import pytest
+from appium.webdriver.common.appiumby import AppiumBy
+from selenium.common.exceptions import InvalidSessionIdException, StaleElementReferenceException, WebDriverException
+from urllib3.exceptions import MaxRetryError, NewConnectionError, ProtocolError
+
+from tests.mobile.utils.fake_appium_server import fake_options
+from tests.mobile.utils.retry import RecoveryLog, SessionHealer, backoff, classify, never_sent, retry_stale
+
+ITEM = (AppiumBy.ID, "android:id/text1")
+
+
+@pytest.fixture
+def log() -> RecoveryLog:
+    return RecoveryLog()
+
+
+@pytest.fixture
+def healer(fake_driver, log, no_backoff) -> SessionHealer:
+    return SessionHealer(fake_driver, fake_options(), attempts=2, log=log)
+
+
+def test_classify_by_message():
+    crash = WebDriverException("'POST /element' cannot be proxied to UiAutomator2 server because the "
+                               "instrumentation process is not running (probably crashed)")
+    assert classify(crash) == 'server_crash'
+    assert classify(InvalidSessionIdException("gone")) == 'session_gone'
+    assert classify(WebDriverException("A session is either terminated or not started")) == 'session_gone'
+    assert classify(WebDriverException("Service Unavailable")) == 'transient'
+    assert classify(ProtocolError("Connection aborted.")) == 'transient'
+    assert classify(StaleElementReferenceException("detached")) == 'stale'
+    assert classify(WebDriverException("no such element")) is None
+    assert classify(ValueError("bug")) is None
+
+
+def test_never_sent_only_for_refused_connections():
+    refused = MaxRetryError(None, '/session', NewConnectionError(None, "Connection refused"))
+    assert never_sent(refused)
+    assert never_sent(ConnectionRefusedError())
+    assert not never_sent(ProtocolError("Connection aborted.", ConnectionResetError()))
+
+
+def test_backoff_doubles_up_to_the_cap(monkeypatch):
+    from tests.mobile.utils import retry
+    monkeypatch.setattr(retry, 'RETRY_BACKOFF', 0.5)
+    monkeypatch.setattr(retry, 'RETRY_MAX_BACKOFF', 1.5)
+    assert [backoff(attempt) for attempt in (1, 2, 3, 4)] == [0.5, 1.0, 1.5, 1.5]
+
+
+def test_server_crash_replaces_the_session_in_place(fake_server, fake_driver, healer, log):
+    previous = fake_driver.session_id
+    renavigated = []
+    healer.on_new_session = lambda driver: renavigated.append(driver.session_id)
+    fake_server.fail_next('crash')
+
+    items = fake_driver.find_elements(*ITEM)
+
+    assert items
+    assert fake_driver.session_id != previous
+    assert previous not in fake_server.sessions
+    assert healer.sessions_recreated == 1
+    assert renavigated == [fake_driver.session_id]
+    assert [record[1:4] + record[6:] for record in log.records] == [['findElements', 'server_crash', 1, True]]
+
+
+def test_lost_session_retries_even_a_click(fake_server, fake_driver, healer, log):
+    item = fake_driver.find_element(AppiumBy.ACCESSIBILITY_ID, "App")
+    fake_server.fail_next('session_gone')
+
+    # The click never ran on the lost session, so it is sent again on the new one
+    item.click()
+
+    assert healer.sessions_recreated == 1
+    assert len(fake_server.sessions[fake_driver.session_id]._screens) == 2
+    assert log.summary() == {'session_gone': {'recovered': 1, 'failed': 0}}
+
+
+def test_transient_error_retries_a_lookup(fake_server, fake_driver, healer, log):
+    fake_server.fail_next('unavailable')
+
+    assert fake_driver.find_element(AppiumBy.ACCESSIBILITY_ID, "App")
+    assert healer.sessions_recreated == 0
+    assert log.summary() == {'transient': {'recovered': 1, 'failed': 0}}
+
+
+def test_transient_error_does_not_repeat_a_click(fake_server, fake_driver, healer, log):
+    item = fake_driver.find_element(AppiumBy.ACCESSIBILITY_ID, "App")
+    session = fake_server.sessions[fake_driver.session_id]
+    fake_server.fail_next('disconnect_after')
+
+    with pytest.raises(Exception) as failure:
+        item.click()
+
+    assert classify(failure.value) == 'transient'
+    # The server handled the tap once, and it was not sent again
+    assert len(session._screens) == 2
+    assert [path for method, path in fake_server.requests if path.endswith('/click')] == \
+        [f'/session/{fake_driver.session_id}/element/{item.id}/click']
+    assert log.records == []
+
+
+def test_gives_up_after_the_configured_attempts(fake_server, fake_driver, healer, log):
+    fake_server.fail_next('unavailable', count=5)
+
+    with pytest.raises(WebDriverException):
+        fake_driver.find_element(AppiumBy.ACCESSIBILITY_ID, "App")
+
+    assert fake_server.faults == ['unavailable', 'unavailable']
+    assert log.summary() == {'transient': {'recovered': 0, 'failed': 1}}
+    assert log.records[0][3] == 2
+
+
+def test_healer_stands_down_when_attempts_are_zero(fake_server, fake_driver, log):
+    SessionHealer(fake_driver, fake_options(), attempts=0, log=log)
+    fake_server.fail_next('crash')
+
+    with pytest.raises(WebDriverException):
+        fake_driver.find_element(AppiumBy.ACCESSIBILITY_ID, "App")
+    assert log.records == []
+
+
+def test_retry_stale_finds_the_element_again(fake_driver, log, no_backoff):
+    fake_driver.find_element(AppiumBy.ACCESSIBILITY_ID, "App").click()
+    handle = [fake_driver.find_element(*ITEM)]
+    # Leaving the screen detaches its views, so the handle goes stale
+    fake_driver.back()
+    found_again = []
+
+    def find_again():
+        found_again.append(True)
+        handle[0] = fake_driver.find_element(AppiumBy.ACCESSIBILITY_ID, "App")
+
+    retry_stale(lambda: handle[0].click(), "click App", on_stale=find_again, log=log)
+
+    assert found_again == [True]
+    assert log.summary() == {'stale': {'recovered': 1, 'failed': 0}}
+
+
+def test_recovery_log_merges_worker_records(log):
+    log.current_test = "test_a"
+    log.record('click', 'transient', 1, 0.1, True)
+    other = RecoveryLog()
+    other.merge(log.records)
+    other.record('findElement', 'server_crash', 2, 1.0, False)
+
+    assert other.summary() == {'transient': {'recovered': 1, 'failed': 0},
+                               'server_crash': {'recovered': 0, 'failed': 1}}
+    assert other.records[0][0] == "test_a"
+    assert other.records[0][4] == 'retry command'
@@ -0,0 +1,49 @@
+import os
+
+import pytest
+
+from tests.mobile.utils.android_utils import AndroidUtils
+from tests.mobile.utils.screenshots import ScreenshotPipeline
+
+
+@pytest.fixture
+def pipeline(tmp_path):
+    pipeline = ScreenshotPipeline(str(tmp_path / "screenshots"), workers=1)
+    try:
+        yield pipeline
+    finally:
+        pipeline.shutdown()
+
+
+def test_repeated_frame_is_copied_to_the_requested_name(pipeline, fake_driver):
+    first = pipeline.capture(fake_driver, "first.png")
+    second = pipeline.capture(fake_driver, "second.png")
+    assert pipeline.flush(timeout=10)
+
+    first.result(), second.result()
+    with open(os.path.join(pipeline.directory, "first.png"), 'rb') as f:
+        data = f.read()
+    with open(os.path.join(pipeline.directory, "second.png"), 'rb') as f:
+        assert f.read() == data
+    assert pipeline.stats.duplicates == 1
+    assert pipeline.stats.written == 2
+
+
+def test_next_test_on_a_pooled_session_starts_fresh(pipeline, fake_driver):
+    pipeline.capture(fake_driver, "test_a.png")
+    # What the screenshot_report teardown does between tests
+    pipeline.flush(timeout=10)
+    pipeline.forget()
+
+    pipeline.capture(fake_driver, "test_b.png")
+    assert pipeline.flush(timeout=10)
+    assert pipeline.stats.duplicates == 0
+    assert os.path.exists(os.path.join(pipeline.directory, "test_b.png"))
+
+
+def test_take_screenshot_writes_to_the_callers_path(fake_driver, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    AndroidUtils(fake_driver).take_screenshot("shot.png").result(timeout=10)
+
+    assert (tmp_path / "shot.png").exists()
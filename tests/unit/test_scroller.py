@@ -0,0 +1,61 @@
+import pytest
+from selenium.common.exceptions import NoSuchElementException
+
+from tests.mobile.base.base_page import BasePage
+from tests.mobile.base.page_snapshot import SnapshotNode
+from tests.mobile.base.scroller import Frame, ListIndex, Scroller, ScrollStats, scroll_indexes
+
+
+@pytest.fixture
+def views_page(fake_driver) -> BasePage:
+    """The Views list, with no list index left over from other tests."""
+    scroll_indexes.clear()
+    page = BasePage(fake_driver)
+    page.click_element("ACCESSIBILITY_ID", "Views")
+    try:
+        yield page
+    finally:
+        scroll_indexes.clear()
+
+
+def test_server_side_lookup_sweeps_a_fully_indexed_list(views_page):
+    with pytest.raises(NoSuchElementException):
+        views_page.scroll_to_text("NoSuchItem")
+
+    # The failed scroll indexed the whole list, yet the index cannot answer an XPath
+    result = views_page.scroll_to_element("XPATH", "//*[@text='WebView3']")
+
+    assert result.found
+    assert result.gestures > 0
+
+
+def test_missing_text_in_a_fully_indexed_list_needs_no_gestures(views_page):
+    with pytest.raises(NoSuchElementException):
+        views_page.scroll_to_text("NoSuchItem")
+
+    result = Scroller(views_page, stats=ScrollStats()).scroll_to(lambda node: node.text == "Still missing",
+                                                                 "Still missing")
+    assert not result.found
+    assert result.gestures == 0
+
+
+def _frame(*titles: str) -> Frame:
+    container = SnapshotNode('android.widget.ListView', 'android:id/list', '', '', (0, 100, 1080, 1100),
+                             False, True, True)
+    items = [SnapshotNode('android.widget.TextView', 'android:id/text1', title, '',
+                          (0, 150 + 100 * position, 1080, 240 + 100 * position), True, False, True)
+             for position, title in enumerate(titles)]
+    return Frame(container, items)
+
+
+def test_complete_index_is_reopened_by_unknown_items():
+    index = ListIndex()
+    index.merge(_frame("Animation", "App"), 0)
+    index.at_start = index.at_end = True
+
+    index.merge(_frame("Animation", "App"), 0)
+    assert index.complete
+
+    # An item shows up that the list did not have when it was explored
+    index.merge(_frame("Animation", "App", "Auto Complete"), 0)
+    assert not index.complete
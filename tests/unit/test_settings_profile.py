@@ -0,0 +1,33 @@
+from tests.mobile.base.settings_profile import apply_profile, restore_settings
+from tests.mobile.fixtures.driver_pool import DriverPool
+from tests.mobile.pages.api_demos_page import ApiDemosPage
+from tests.mobile.utils.fake_appium_server import DEFAULT_SETTINGS
+
+
+def _settings(fake_server, driver):
+    return fake_server.sessions[driver.session_id].settings
+
+
+def test_profile_changes_only_what_differs(fake_server, fake_driver):
+    assert apply_profile(fake_driver, "fast") == {'ignoreUnimportantViews': True, 'waitForIdleTimeout': 25}
+    assert apply_profile(fake_driver, "fast") == {}
+    assert _settings(fake_server, fake_driver)['waitForIdleTimeout'] == 25
+
+
+def test_released_session_gets_its_settings_back(fake_server, fake_driver):
+    pool = DriverPool(lambda: fake_driver, reset_strategy='none', prewarm=False)
+    driver = pool.acquire()
+    ApiDemosPage(driver)
+    assert _settings(fake_server, driver)['ignoreUnimportantViews'] is True
+
+    pool.release(driver)
+
+    assert _settings(fake_server, driver) == DEFAULT_SETTINGS
+    # The next test's page applies its profile again
+    assert ApiDemosPage(pool.acquire()).driver is driver
+    assert _settings(fake_server, driver)['ignoreUnimportantViews'] is True
+
+
+def test_nothing_to_restore_without_a_profile(fake_server, fake_driver):
+    assert restore_settings(fake_driver) == {}
+    assert [path for method, path in fake_server.requests if path.endswith('/appium/settings')] == []
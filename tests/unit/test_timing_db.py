@@ -0,0 +1,50 @@
+import pytest
+
+from tests.mobile.utils.timing_db import TIMING_DEFAULT, TimingDB, lpt_assign, strip_group
+
+APP = "tests/mobile/android/test_app.py"
+NAV = "tests/mobile/android/test_navigation.py"
+
+
+@pytest.fixture
+def db(tmp_path) -> TimingDB:
+    db = TimingDB(str(tmp_path / "durations.sqlite"))
+    db.record({f"{APP}::test_a": 2.0, f"{APP}::test_b": 4.0, f"{APP}::test_c": 9.0, f"{NAV}::test_x": 30.0})
+    return db
+
+
+def test_xdist_group_suffix_is_dropped():
+    assert strip_group(f"{APP}::test_a@device") == f"{APP}::test_a"
+    assert strip_group(f"{APP}::test_a[user@host]") == f"{APP}::test_a[user@host]"
+
+
+def test_estimates_fall_back_to_module_then_overall_median(db):
+    estimates = db.estimates([f"{APP}::test_a@group", f"{APP}::test_new", "tests/unit/test_new.py::test_y"])
+
+    assert estimates == {
+        f"{APP}::test_a@group": 2.0,
+        f"{APP}::test_new": 4.0,
+        "tests/unit/test_new.py::test_y": 6.5,
+    }
+
+
+def test_unknown_tests_get_the_default_without_history(tmp_path):
+    assert TimingDB(str(tmp_path / "empty.sqlite")).estimates(["t::a"]) == {"t::a": TIMING_DEFAULT}
+    assert not TimingDB('').enabled
+
+
+def test_runs_are_smoothed(db):
+    db.record({f"{APP}::test_a": 4.0})
+    assert db.durations()[f"{APP}::test_a"] == 3.0
+    assert TimingDB(db.path).durations()[f"{APP}::test_a"] == 3.0
+
+
+def test_lpt_assigns_longest_first_to_the_least_loaded_worker():
+    loads, assignment = lpt_assign({"a": 5, "b": 4, "c": 3, "d": 3, "e": 3}, workers=2)
+
+    assert loads == [8, 10]
+    assert assignment == {"a": 0, "b": 1, "c": 1, "d": 0, "e": 1}
+
+
+def test_lpt_needs_at_least_one_worker():
+    assert lpt_assign({"a": 1, "b": 2}, workers=0) == ([3], {"b": 0, "a": 0})